@@ -0,0 +1,200 @@
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+# If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/
+#
+# Original Author: Sergio Palma Hidalgo
+# Project URL: https://github.com/del-Pacifico/unicode-to-png
+# Copyright (c) 2025 Sergio Palma Hidalgo
+# All rights reserved.
+#
+
+"""Benchmark render speed and quality trade-offs of the Unicode to PNG CLI."""
+
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import statistics
+import sys
+import time
+from pathlib import Path
+from types import ModuleType
+from typing import List, Optional, Sequence
+
+
+LOG_PREFIX = "[utp-bench]"
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+SCRIPT_PATH = PROJECT_ROOT / "unicode_to_png.py"
+DEFAULT_EMOJI = "\U0001F600"
+# One sample per structure category for the layout engine comparison.
+LAYOUT_SAMPLES = (
+    ("SIMPLE", "\U0001F600"),
+    ("PRESENTATION_SELECTOR", "\u2764\ufe0f"),
+    ("SKIN_MODIFIER", "\U0001F44D\U0001F3FD"),
+    ("REGIONAL_FLAG", "\U0001F1E8\U0001F1F1"),
+    ("ZWJ_SEQUENCE", "\U0001F469\u200d\U0001F4BB"),
+)
+
+
+def write_console(level: str, message: str) -> None:
+    """Write a deterministic console message with the benchmark tooling prefix."""
+
+    print(f"{LOG_PREFIX} - {level.upper()} - {message}")
+
+
+def load_cli_module() -> ModuleType:
+    """Load the CLI script as a module so its render helpers can be timed directly."""
+
+    sys.path.insert(0, str(PROJECT_ROOT))
+    spec = importlib.util.spec_from_file_location("unicode_to_png_cli", SCRIPT_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def parse_args(argv: Sequence[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Benchmark Unicode to PNG rendering.",
+    )
+    parser.add_argument("--emoji", default=DEFAULT_EMOJI, help="Emoji to render. Default: grinning face.")
+    parser.add_argument(
+        "--sizes",
+        default="chrome,store",
+        help="Comma-separated icon sizes and/or size profiles. Default: chrome,store.",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Timed renders per measurement. Default: 3.")
+    parser.add_argument("--font", default=None, help="Emoji font file. Default: platform emoji font.")
+    parser.add_argument(
+        "--resample",
+        choices=("lanczos", "reduce"),
+        default="lanczos",
+        help="Downscaling mode passed to resize_icon(...). Default: lanczos.",
+    )
+    parser.add_argument(
+        "--layout-engines",
+        action="store_true",
+        help="Compare the basic and raqm layout engines per structure category instead of the supersampling factors.",
+    )
+    return parser.parse_args(argv)
+
+
+def time_render(
+    cli: ModuleType,
+    emoji: str,
+    size: int,
+    scale_factor: int,
+    structure_type: str,
+    repeat: int,
+    font_path: Optional[str],
+    resample: str = "lanczos",
+    layout_engine: str = "auto",
+    before_render=None,
+):
+    """Render one size repeatedly and return the median duration in milliseconds and the last image."""
+
+    durations: List[float] = []
+    image = None
+    for _ in range(repeat):
+        if before_render is not None:
+            before_render()
+        started = time.perf_counter()
+        rasterized = cli.rasterize_icon(
+            emoji, size, scale_factor, structure_type, cli.DEFAULT_MARGIN_RATIO, [], True, font_path,
+            layout_engine=layout_engine,
+        )
+        image = cli.resize_icon(*rasterized, size, False, [], True, resample) if rasterized else None
+        durations.append((time.perf_counter() - started) * 1000)
+    return statistics.median(durations), image
+
+
+def mean_channel_delta(image, reference) -> Optional[float]:
+    """Return the mean absolute RGBA difference between two images in 0-255 units."""
+
+    if image is None or reference is None:
+        return None
+    from PIL import ImageChops, ImageStat
+
+    difference = ImageChops.difference(image, reference)
+    return statistics.fmean(ImageStat.Stat(difference).mean)
+
+
+def benchmark_supersampling(
+    cli: ModuleType, emoji: str, sizes: Sequence[int], repeat: int, font_path: Optional[str], resample: str
+) -> None:
+    """Compare every supersampling factor against the maximum factor for each size."""
+
+    structure_type = cli.classify_unicode_structure(emoji)
+    write_console(
+        "info",
+        f"Supersampling trade-off for structure {structure_type} (reference: {cli.SCALE_FACTOR}x, resample: {resample}).",
+    )
+    print(f"{'size':>6} {'factor':>6} {'canvas':>8} {'MB':>7} {'ms':>9} {'delta':>7} {'default':>8}")
+
+    for size in sizes:
+        default_factor = cli.get_scale_factor(size, cli.SCALE_FACTOR, cli.DEFAULT_CANVAS_LIMIT_MB)
+        _, reference = time_render(cli, emoji, size, cli.SCALE_FACTOR, structure_type, 1, font_path, resample)
+        for factor in range(cli.SCALE_FACTOR, 0, -1):
+            canvas_size = size * factor
+            duration_ms, image = time_render(cli, emoji, size, factor, structure_type, repeat, font_path, resample)
+            delta = mean_channel_delta(image, reference)
+            delta_text = "n/a" if delta is None else f"{delta:.3f}"
+            marker = "*" if factor == default_factor else ""
+            print(
+                f"{size:>6} {factor:>6} {canvas_size:>8} {cli.get_canvas_memory_mb(canvas_size):>7.1f}"
+                f" {duration_ms:>9.1f} {delta_text:>7} {marker:>8}"
+            )
+
+
+def benchmark_layout_engines(
+    cli: ModuleType, sizes: Sequence[int], repeat: int, font_path: Optional[str], resample: str
+) -> None:
+    """Compare the layout engines per structure category, with a cold and a warm shaping cache."""
+
+    from unicode_to_png import clear_shaping_cache, has_raqm, resolve_layout_engine
+
+    engines = ("basic", "raqm") if has_raqm() else ("basic",)
+    if not has_raqm():
+        write_console("warning", "Pillow was built without libraqm. Only the basic layout engine is measured.")
+    write_console("info", f"Layout engine comparison (resample: {resample}). cold: empty shaping cache, warm: cached shaping.")
+    print(f"{'structure':<22} {'engine':>6} {'size':>6} {'cold ms':>9} {'warm ms':>9} {'delta':>7} {'auto':>5}")
+
+    for structure_type, emoji in LAYOUT_SAMPLES:
+        auto_engine = resolve_layout_engine("auto", structure_type)
+        for size in sizes:
+            scale_factor = cli.get_scale_factor(size, cli.SCALE_FACTOR, cli.DEFAULT_CANVAS_LIMIT_MB)
+            _, reference = time_render(cli, emoji, size, scale_factor, structure_type, 1, font_path, resample, engines[-1])
+            for engine in engines:
+                cold_ms, image = time_render(
+                    cli, emoji, size, scale_factor, structure_type, repeat, font_path, resample, engine, clear_shaping_cache
+                )
+                warm_ms, _ = time_render(cli, emoji, size, scale_factor, structure_type, repeat, font_path, resample, engine)
+                delta = mean_channel_delta(image, reference)
+                delta_text = "n/a" if delta is None else f"{delta:.3f}"
+                marker = "*" if engine == auto_engine else ""
+                print(
+                    f"{structure_type:<22} {engine:>6} {size:>6} {cold_ms:>9.1f} {warm_ms:>9.1f} {delta_text:>7} {marker:>5}"
+                )
+
+
+def main(argv: Sequence[str]) -> int:
+    args = parse_args(argv)
+    cli = load_cli_module()
+    if not cli.ensure_runtime_dependencies():
+        return 1
+
+    sizes, warnings = cli.parse_sizes(args.sizes)
+    for warning in warnings:
+        write_console("warning", warning)
+    if not sizes:
+        write_console("error", "No valid icon sizes were provided.")
+        return 1
+
+    if args.layout_engines:
+        benchmark_layout_engines(cli, sizes, max(args.repeat, 1), args.font, args.resample)
+    else:
+        benchmark_supersampling(cli, args.emoji, sizes, max(args.repeat, 1), args.font, args.resample)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
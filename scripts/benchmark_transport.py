@@ -0,0 +1,140 @@
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+# If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/
+#
+# Original Author: Sergio Palma Hidalgo
+# Project URL: https://github.com/del-Pacifico/unicode-to-png
+# Copyright (c) 2025 Sergio Palma Hidalgo
+# All rights reserved.
+#
+
+"""Benchmark pickled images against shared-memory buffers for canvas hand-off between processes."""
+
+from __future__ import annotations
+
+import argparse
+import pickle
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List, Sequence
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from unicode_to_png import (  # noqa: E402
+    DEFAULT_CANVAS_LIMIT_MB,
+    DEFAULT_SIZE_PROFILE,
+    MAX_SCALE_FACTOR,
+    get_canvas_memory_mb,
+    get_scale_factor,
+    parse_sizes,
+)
+from unicode_to_png.transport_utils import SharedImageBuffer, prepare_shared_transport, write_shared_image  # noqa: E402
+
+
+LOG_PREFIX = "[utp-bench]"
+CANVAS_COLOR = (255, 160, 0, 200)
+
+
+def write_console(level: str, message: str) -> None:
+    """Write a deterministic console message with the benchmark tooling prefix."""
+
+    print(f"{LOG_PREFIX} - {level.upper()} - {message}")
+
+
+def parse_args(argv: Sequence[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Benchmark pickled images against shared-memory buffers between worker processes.",
+    )
+    parser.add_argument(
+        "--sizes",
+        default=DEFAULT_SIZE_PROFILE,
+        help=f"Comma-separated icon sizes and/or size profiles. Default: {DEFAULT_SIZE_PROFILE}.",
+    )
+    parser.add_argument("--repeat", type=int, default=20, help="Timed hand-offs per measurement. Default: 20.")
+    parser.add_argument("--workers", type=int, default=2, help="Worker processes. Default: 2.")
+    return parser.parse_args(argv)
+
+
+def make_canvas(side: int):
+    """Build a canvas of the given side as a stand-in for a rasterized emoji."""
+
+    from PIL import Image
+
+    return Image.new("RGBA", (side, side), CANVAS_COLOR)
+
+
+def share_canvas(descriptor: dict) -> None:
+    """Worker: build a canvas and copy it into the shared buffer of the parent."""
+
+    write_shared_image(descriptor, make_canvas(descriptor["size"][0]))
+
+
+def time_pickled(executor: ProcessPoolExecutor, side: int, repeat: int) -> float:
+    """Return the median milliseconds to receive a pickled canvas from a worker and read it."""
+
+    durations: List[float] = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        canvas = executor.submit(make_canvas, side).result()
+        canvas.getbbox()
+        durations.append((time.perf_counter() - started) * 1000)
+    return statistics.median(durations)
+
+
+def time_shared(executor: ProcessPoolExecutor, side: int, repeat: int) -> float:
+    """Return the median milliseconds to receive a canvas through shared memory and read it."""
+
+    durations: List[float] = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        with SharedImageBuffer((side, side)) as buffer:
+            executor.submit(share_canvas, buffer.descriptor).result()
+            with buffer.image() as canvas:
+                canvas.getbbox()
+        durations.append((time.perf_counter() - started) * 1000)
+    return statistics.median(durations)
+
+
+def main(argv: Sequence[str]) -> int:
+    args = parse_args(argv)
+    try:
+        import PIL  # noqa: F401
+    except ImportError:
+        write_console("error", "Pillow is required but is not installed.")
+        return 1
+
+    sizes, warnings = parse_sizes(args.sizes)
+    for warning in warnings:
+        write_console("warning", warning)
+    if not sizes:
+        write_console("error", "No valid icon sizes were provided.")
+        return 1
+
+    repeat = max(args.repeat, 1)
+    write_console("info", f"Canvas hand-off from {max(args.workers, 1)} worker process(es), median of {repeat} runs.")
+    print(f"{'size':>6} {'canvas':>7} {'MB':>6} {'pickle_B':>9} {'shm_B':>6} {'pickle_ms':>10} {'shm_ms':>8} {'speedup':>8}")
+
+    prepare_shared_transport()
+    with ProcessPoolExecutor(max_workers=max(args.workers, 1)) as executor:
+        # Start the workers before timing.
+        executor.submit(make_canvas, 1).result()
+        for size in sizes:
+            side = size * get_scale_factor(size, MAX_SCALE_FACTOR, DEFAULT_CANVAS_LIMIT_MB)
+            pickled_bytes = len(pickle.dumps(make_canvas(side)))
+            with SharedImageBuffer((side, side)) as buffer:
+                descriptor_bytes = len(pickle.dumps(buffer.descriptor))
+            pickled_ms = time_pickled(executor, side, repeat)
+            shared_ms = time_shared(executor, side, repeat)
+            print(
+                f"{size:>6} {side:>7} {get_canvas_memory_mb(side):>6.2f} {pickled_bytes:>9} {descriptor_bytes:>6}"
+                f" {pickled_ms:>10.3f} {shared_ms:>8.3f} {pickled_ms / shared_ms:>7.2f}x"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
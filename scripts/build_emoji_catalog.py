@@ -0,0 +1,92 @@
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+# If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/
+#
+# Original Author: Sergio Palma Hidalgo
+# Project URL: https://github.com/del-Pacifico/unicode-to-png
+# Copyright (c) 2025 Sergio Palma Hidalgo
+# All rights reserved.
+#
+
+"""Build the bundled RGI emoji catalog used by --all.
+
+Reads emoji-test.txt from the Unicode emoji data files
+(https://unicode.org/Public/emoji/<version>/emoji-test.txt) and keeps every
+fully-qualified sequence, which together cover the RGI emoji set. The
+generated file is committed, so the download is only needed to move to a new
+Unicode emoji version.
+"""
+
+from __future__ import annotations
+
+import argparse
+import re
+import sys
+from pathlib import Path
+from typing import List, Sequence
+
+
+LOG_PREFIX = "[utp-catalog]"
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+OUTPUT_PATH = PROJECT_ROOT / "unicode_to_png" / "data" / "emoji_catalog.tsv"
+ENTRY_PATTERN = re.compile(r"^([0-9A-F ]+?)\s*;\s*fully-qualified\s*#\s*\S+\s+E(\d+\.\d+)\s+(.+)$")
+
+
+def write_console(level: str, message: str) -> None:
+    """Write a deterministic console message with the catalog tooling prefix."""
+
+    print(f"{LOG_PREFIX} - {level.upper()} - {message}")
+
+
+def parse_args(argv: Sequence[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Build the bundled RGI emoji catalog from emoji-test.txt.")
+    parser.add_argument("source", help="Path to emoji-test.txt from the Unicode emoji data files.")
+    parser.add_argument("--output", default=str(OUTPUT_PATH), help=f"Catalog file to write. Default: {OUTPUT_PATH}.")
+    return parser.parse_args(argv)
+
+
+def build_catalog(lines: Sequence[str]) -> List[str]:
+    """Return catalog lines: a version header, then one tab-separated line per fully-qualified emoji."""
+
+    version = "unknown"
+    group = subgroup = ""
+    rows: List[str] = []
+    for line in lines:
+        line = line.rstrip("\n")
+        if line.startswith("# Version:"):
+            version = line.split(":", 1)[1].strip()
+        elif line.startswith("# group:"):
+            group = line.split(":", 1)[1].strip()
+        elif line.startswith("# subgroup:"):
+            subgroup = line.split(":", 1)[1].strip()
+        else:
+            match = ENTRY_PATTERN.match(line)
+            if match:
+                codepoints, emoji_version, name = match.groups()
+                rows.append("\t".join((codepoints.strip(), group, subgroup, emoji_version, name.strip())))
+
+    header = [
+        f"# RGI emoji catalog generated from emoji-test.txt, Unicode emoji version {version}.",
+        "# Unicode data: Copyright (c) Unicode, Inc. Distributed under the Unicode License, https://www.unicode.org/license.txt",
+        "# codepoints\tgroup\tsubgroup\temoji_version\tname",
+    ]
+    return header + rows
+
+
+def main(argv: Sequence[str]) -> int:
+    args = parse_args(argv)
+    source = Path(args.source)
+    if not source.is_file():
+        write_console("error", f"Source file was not found: {source}.")
+        return 1
+
+    catalog = build_catalog(source.read_text(encoding="utf-8").splitlines())
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text("\n".join(catalog) + "\n", encoding="utf-8")
+    write_console("info", f"Wrote {len(catalog) - 3} catalog entries to {output}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,94 @@
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+# If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/
+#
+# Original Author: Sergio Palma Hidalgo
+# Project URL: https://github.com/del-Pacifico/unicode-to-png
+# Copyright (c) 2025 Sergio Palma Hidalgo
+# All rights reserved.
+#
+
+"""Build the small monochrome test font bundled with the test suite.
+
+The font maps every emoji range accepted by the CLI to one filled octagon glyph
+through a many-to-one (format 13) cmap, so CLI tests can render on any platform
+without a system emoji font. Requires fontTools, which is not a runtime or test
+dependency; the generated file is committed.
+"""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+from typing import Sequence
+
+from fontTools.fontBuilder import FontBuilder
+from fontTools.pens.ttGlyphPen import TTGlyphPen
+from fontTools.ttLib.tables._c_m_a_p import cmap_format_13
+
+
+LOG_PREFIX = "[utp-font]"
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+OUTPUT_PATH = PROJECT_ROOT / "tests" / "fonts" / "utp_test_emoji.ttf"
+UNITS_PER_EM = 1000
+EMOJI_RANGES = (
+    (0x2600, 0x27BF),
+    (0x1F1E6, 0x1F1FF),
+    (0x1F300, 0x1F6FF),
+    (0x1F700, 0x1FAFF),
+)
+
+
+def write_console(level: str, message: str) -> None:
+    """Write a deterministic console message with the font tooling prefix."""
+
+    print(f"{LOG_PREFIX} - {level.upper()} - {message}")
+
+
+def draw_octagon():
+    """Return a filled octagon glyph that spans most of the em square."""
+
+    pen = TTGlyphPen(None)
+    points = [(300, 0), (700, 0), (1000, 300), (1000, 700), (700, 1000), (300, 1000), (0, 700), (0, 300)]
+    pen.moveTo(points[0])
+    for point in points[1:]:
+        pen.lineTo(point)
+    pen.closePath()
+    return pen.glyph()
+
+
+def build_font(output_path: Path) -> None:
+    builder = FontBuilder(UNITS_PER_EM, isTTF=True)
+    builder.setupGlyphOrder([".notdef", "emoji"])
+    builder.setupCharacterMap({0x20: ".notdef"})
+    builder.setupGlyf({".notdef": TTGlyphPen(None).glyph(), "emoji": draw_octagon()})
+    builder.setupHorizontalMetrics({".notdef": (UNITS_PER_EM, 0), "emoji": (UNITS_PER_EM, 0)})
+    builder.setupHorizontalHeader(ascent=900, descent=-100)
+    builder.setupNameTable({"familyName": "UTP Test Emoji", "styleName": "Regular"})
+    builder.setupOS2(sTypoAscender=900, sTypoDescender=-100, usWinAscent=1000, usWinDescent=100)
+    builder.setupPost()
+
+    many_to_one = cmap_format_13(13)
+    many_to_one.platformID = 3
+    many_to_one.platEncID = 10
+    many_to_one.language = 0
+    many_to_one.cmap = {
+        codepoint: "emoji"
+        for start, end in EMOJI_RANGES
+        for codepoint in range(start, end + 1)
+    }
+    builder.font["cmap"].tables.append(many_to_one)
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    builder.save(str(output_path))
+
+
+def main(argv: Sequence[str]) -> int:
+    output_path = Path(argv[0]) if argv else OUTPUT_PATH
+    build_font(output_path)
+    write_console("info", f"Test font written: {output_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
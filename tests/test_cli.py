@@ -7,19 +7,28 @@
 # Copyright (c) 2025 Sergio Palma Hidalgo
 # All rights reserved.
 #
+import hashlib
+import json
 import shutil
 import subprocess
 import sys
 import importlib.util
 from pathlib import Path
 
+import pytest
 from PIL import Image
 
+from unicode_to_png.lock_utils import FileLock, get_lock_path
+from unicode_to_png.variant_utils import get_variant_filename
+from unicode_to_png.render_utils import has_raqm
+
 
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 SCRIPT_PATH = PROJECT_ROOT / "unicode_to_png.py"
 EMOJIS_ROOT = PROJECT_ROOT / "emojis"
 LOG_ROOT = PROJECT_ROOT / "log"
+MANIFEST_ROOT = PROJECT_ROOT / "manifest"
+TEST_FONT_PATH = PROJECT_ROOT / "tests" / "fonts" / "utp_test_emoji.ttf"
 _CLI_MODULE = None
 
 
@@ -55,6 +64,11 @@ def cleanup_codex_artifacts(*folder_names):
             for log_file in LOG_ROOT.glob(f"*{folder_name}.log"):
                 log_file.unlink(missing_ok=True)
 
+    if MANIFEST_ROOT.exists():
+        for folder_name in folder_names:
+            for manifest_file in MANIFEST_ROOT.glob(f"{folder_name}*.*"):
+                manifest_file.unlink(missing_ok=True)
+
 
 def assert_valid_icon_set(output_folder, filename_prefix="emoji"):
     for size in load_cli_module().ICON_SIZES:
@@ -69,28 +83,6 @@ def assert_valid_icon_set(output_folder, filename_prefix="emoji"):
             assert icon.getchannel("A").getbbox() is not None
 
 
-def test_check_visual_edges_reports_right_or_bottom_contact():
-    cli_module = load_cli_module()
-    image = Image.new("RGBA", (4, 4), (0, 0, 0, 0))
-    image.putpixel((3, 1), (255, 255, 255, 255))
-
-    log_entries = []
-
-    assert cli_module.check_visual_edges(image, 4, log_entries, quiet=True) is True
-    assert "Emoji touches right edge(s) at 4x4." in log_entries[0]
-
-
-def test_check_visual_edges_returns_false_when_output_has_padding():
-    cli_module = load_cli_module()
-    image = Image.new("RGBA", (4, 4), (0, 0, 0, 0))
-    image.putpixel((1, 1), (255, 255, 255, 255))
-
-    log_entries = []
-
-    assert cli_module.check_visual_edges(image, 4, log_entries, quiet=True) is False
-    assert log_entries == []
-
-
 def test_cli_help_returns_usage_without_runtime_dependency_checks():
     result = run_cli("--help")
 
@@ -139,7 +131,7 @@ def test_cli_without_input_arguments_exits_without_interactive_prompt():
     result = run_cli("--quiet")
 
     assert result.returncode == 1
-    assert "[utp] - ERROR - No emoji input was provided. Use --emoji or --batch." in result.stdout
+    assert "[utp] - ERROR - No emoji input was provided. Use --emoji, --batch, or --all." in result.stdout
     assert "Enter the emoji symbol:" not in result.stdout
     assert result.stderr == ""
 
@@ -214,7 +206,7 @@ def test_cli_generates_valid_png_icon_set_for_single_emoji():
 def test_cli_generates_valid_png_icon_sets_for_batch_argument():
     folder_base = "codex_integration_batch"
     output_folders = (f"{folder_base}_fire", f"{folder_base}_target")
-    cleanup_codex_artifacts(*output_folders)
+    cleanup_codex_artifacts(folder_base, *output_folders)
 
     try:
         result = run_cli(
@@ -230,7 +222,7 @@ def test_cli_generates_valid_png_icon_sets_for_batch_argument():
         for output_folder in output_folders:
             assert_valid_icon_set(EMOJIS_ROOT / output_folder)
     finally:
-        cleanup_codex_artifacts(*output_folders)
+        cleanup_codex_artifacts(folder_base, *output_folders)
 
 
 def test_cli_generates_valid_png_icon_set_with_custom_filename_prefix():
@@ -260,7 +252,7 @@ def test_cli_generates_valid_png_icon_set_with_custom_filename_prefix():
 def test_cli_generates_valid_png_icon_sets_with_folder_filename_prefix():
     folder_base = "codex_folder_prefix"
     output_folders = (f"{folder_base}_fire", f"{folder_base}_target")
-    cleanup_codex_artifacts(*output_folders)
+    cleanup_codex_artifacts(folder_base, *output_folders)
 
     try:
         result = run_cli(
@@ -278,4 +270,660 @@ def test_cli_generates_valid_png_icon_sets_with_folder_filename_prefix():
             assert_valid_icon_set(EMOJIS_ROOT / output_folder, filename_prefix=output_folder)
             assert not (EMOJIS_ROOT / output_folder / "emoji_16x16.png").exists()
     finally:
-        cleanup_codex_artifacts(*output_folders)
+        cleanup_codex_artifacts(folder_base, *output_folders)
+
+
+def test_cli_generates_ico_and_icns_containers_from_the_same_run():
+    folder_name = "codex_containers"
+    cleanup_codex_artifacts(folder_name)
+
+    try:
+        result = run_cli("--emoji", "😀", "--folder", folder_name, "--containers", "ico,icns", "--quiet")
+
+        assert result.returncode == 0
+        assert result.stderr == ""
+        output_folder = EMOJIS_ROOT / folder_name
+        assert_valid_icon_set(output_folder)
+
+        with Image.open(output_folder / "emoji.ico") as ico:
+            assert ico.format == "ICO"
+            assert set(ico.info["sizes"]) == {(size, size) for size in load_cli_module().ICON_SIZES}
+
+        with Image.open(output_folder / "emoji.icns") as icns:
+            assert icns.format == "ICNS"
+        assert not (output_folder / "emoji_1024x1024.png").exists()
+    finally:
+        cleanup_codex_artifacts(folder_name)
+
+
+def test_cli_generates_png_and_webp_from_the_same_run():
+    folder_name = "codex_webp_format"
+    cleanup_codex_artifacts(folder_name)
+
+    try:
+        result = run_cli("--emoji", "😀", "--folder", folder_name, "--format", "png,webp", "--parallel-encode")
+
+        assert result.returncode == 0
+        assert result.stderr == ""
+        output_folder = EMOJIS_ROOT / folder_name
+        assert_valid_icon_set(output_folder)
+        for size in load_cli_module().ICON_SIZES:
+            with Image.open(output_folder / f"emoji_{size}x{size}.webp") as icon:
+                assert icon.format == "WEBP"
+                assert icon.size == (size, size)
+        assert "Run summary: 6 WEBP file(s)" in result.stdout
+    finally:
+        cleanup_codex_artifacts(folder_name)
+
+
+def test_cli_generates_icon_set_with_explicit_font_on_any_platform():
+    folder_name = "codex_explicit_font"
+    cleanup_codex_artifacts(folder_name)
+
+    try:
+        result = run_cli("--emoji", "😀", "--folder", folder_name, "--font", str(TEST_FONT_PATH))
+
+        assert result.returncode == 0
+        assert result.stderr == ""
+        assert "Emoji font was not found" not in result.stdout
+        assert "Font routed by coverage: utp_test_emoji.ttf." in result.stdout
+        assert_valid_icon_set(EMOJIS_ROOT / folder_name)
+    finally:
+        cleanup_codex_artifacts(folder_name)
+
+
+def test_cli_batch_with_explicit_font_renders_complex_sequences_headless():
+    folder_base = "codex_explicit_font_batch"
+    output_folders = (f"{folder_base}_thumbs", f"{folder_base}_pencil")
+    cleanup_codex_artifacts(folder_base, *output_folders)
+
+    try:
+        result = run_cli(
+            "--batch",
+            "👍🏽:thumbs,✏️:pencil",
+            "--folder",
+            folder_base,
+            "--font",
+            str(TEST_FONT_PATH),
+            "--quiet",
+        )
+
+        assert result.returncode == 0
+        assert result.stderr == ""
+        for output_folder in output_folders:
+            assert_valid_icon_set(EMOJIS_ROOT / output_folder)
+    finally:
+        cleanup_codex_artifacts(folder_base, *output_folders)
+
+
+def test_cli_skips_missing_font_file_and_keeps_the_rest_of_the_chain():
+    folder_name = "codex_missing_font"
+    cleanup_codex_artifacts(folder_name)
+
+    try:
+        result = run_cli(
+            "--emoji",
+            "😀",
+            "--folder",
+            folder_name,
+            "--font",
+            "missing_font.ttf",
+            "--font",
+            str(TEST_FONT_PATH),
+            "--sizes",
+            "16",
+        )
+
+        assert result.returncode == 0
+        assert "[utp] - WARNING - Font file was not found and will be skipped: missing_font.ttf." in result.stdout
+        assert (EMOJIS_ROOT / folder_name / "emoji_16x16.png").exists()
+    finally:
+        cleanup_codex_artifacts(folder_name)
+
+
+def test_cli_shards_split_the_batch_and_merge_into_one_report():
+    folder_base = "codex_shard"
+    aliases = ("fire", "game", "idea", "lab", "rocket")
+    output_folders = [f"{folder_base}_{alias}" for alias in aliases]
+    batch = "🔥:fire,🎮:game,💡:idea,🧪:lab,🚀:rocket"
+    cleanup_codex_artifacts(folder_base, f"{folder_base}_merged", f"{folder_base}_shard1of2", f"{folder_base}_shard2of2", *output_folders)
+
+    try:
+        for shard in ("1/2", "2/2"):
+            result = run_cli("--batch", batch, "--folder", folder_base, "--shard", shard, "--font", str(TEST_FONT_PATH), "--sizes", "16")
+            assert result.returncode == 0
+            assert f"[utp] - INFO - Shard {shard} selected" in result.stdout
+
+        shard_aliases = []
+        for shard_index in (1, 2):
+            manifest = json.loads((MANIFEST_ROOT / f"{folder_base}_shard{shard_index}of2.json").read_text(encoding="utf-8"))
+            assert manifest["shard"] == f"{shard_index}/2"
+            shard_aliases.append({entry["alias"] for entry in manifest["entries"]})
+        assert shard_aliases[0].isdisjoint(shard_aliases[1])
+        assert shard_aliases[0] | shard_aliases[1] == set(aliases)
+        assert sorted(len(aliases_in_shard) for aliases_in_shard in shard_aliases) == [2, 3]
+
+        result = run_cli("--folder", folder_base, "--merge-shards")
+
+        assert result.returncode == 0
+        assert "[utp] - INFO - Merged 2 of 2 shard manifest(s): 5 entries, 5 file(s)." in result.stdout
+        merged = json.loads((MANIFEST_ROOT / f"{folder_base}.json").read_text(encoding="utf-8"))
+        assert merged["missing_shards"] == []
+        assert [entry["alias"] for entry in merged["entries"]] == sorted(aliases)
+        assert all([record["path"] for record in entry["files"]] == [f"emojis/{folder_base}_{entry['alias']}/emoji_16x16.png"] for entry in merged["entries"])
+        merged_log = (PROJECT_ROOT / merged["log_file"]).read_text(encoding="utf-8")
+        assert merged_log.count("===== Shard ") == 2
+        for alias in aliases:
+            assert f"[INFO] [{alias}] Starting PNG generation" in merged_log
+    finally:
+        cleanup_codex_artifacts(folder_base, f"{folder_base}_merged", f"{folder_base}_shard1of2", f"{folder_base}_shard2of2", *output_folders)
+
+
+def test_cli_empty_shard_with_chunking_writes_an_empty_manifest():
+    folder_base = "codex_empty_shard"
+    cleanup_codex_artifacts(f"{folder_base}_shard2of2")
+
+    try:
+        result = run_cli("--batch", "😀:a", "--folder", folder_base, "--shard", "2/2", "--chunk-size", "1", "--font", str(TEST_FONT_PATH))
+
+        assert result.returncode == 0
+        assert "[utp] - INFO - Shard 2/2 selected 0 of 1 batch entries." in result.stdout
+        manifest = json.loads((MANIFEST_ROOT / f"{folder_base}_shard2of2.json").read_text(encoding="utf-8"))
+        assert manifest["entries"] == []
+    finally:
+        cleanup_codex_artifacts(f"{folder_base}_shard2of2")
+
+
+def test_cli_rejects_invalid_shard():
+    result = run_cli("--emoji", "😀", "--folder", "codex_invalid_shard", "--shard", "3/2")
+
+    assert result.returncode == 1
+    assert "[utp] - ERROR - Invalid shard '3/2'. Use --shard i/N with 1 <= i <= N." in result.stdout
+
+
+def test_cli_merge_shards_reports_missing_manifests():
+    result = run_cli("--folder", "codex_no_shards", "--merge-shards")
+
+    assert result.returncode == 1
+    assert "[utp] - ERROR - No shard manifests were found for folder 'codex_no_shards'." in result.stdout
+
+
+def test_cli_resume_keeps_verified_outputs_and_renders_the_rest():
+    folder_name = "codex_resume"
+    output_folder = EMOJIS_ROOT / folder_name
+    cleanup_codex_artifacts(folder_name)
+    arguments = ("--emoji", "😀", "--folder", folder_name, "--font", str(TEST_FONT_PATH), "--sizes", "16,32,48")
+
+    try:
+        assert run_cli(*arguments).returncode == 0
+        journal_lines = (MANIFEST_ROOT / f"{folder_name}.journal").read_text(encoding="utf-8").splitlines()
+        assert len(journal_lines) == 4
+
+        (output_folder / "emoji_32x32.png").unlink()
+        (output_folder / "emoji_48x48.png").write_bytes(b"truncated")
+        kept_mtime = (output_folder / "emoji_16x16.png").stat().st_mtime_ns
+
+        result = run_cli(*arguments, "--resume")
+
+        assert result.returncode == 0
+        assert "[utp] - INFO - Resume verified 1 output file(s) from the checkpoint journal." in result.stdout
+        assert "2 journaled output file(s) are missing or changed and will be rendered again." in result.stdout
+        assert "[utp] - INFO - Run summary: 2 PNG file(s)" in result.stdout
+        assert (output_folder / "emoji_16x16.png").stat().st_mtime_ns == kept_mtime
+        with Image.open(output_folder / "emoji_48x48.png") as image:
+            assert image.size == (48, 48)
+
+        result = run_cli(*arguments, "--resume")
+
+        assert "[utp] - INFO - Resume verified 3 output file(s) from the checkpoint journal." in result.stdout
+        assert "[utp] - INFO - Run summary: 0 PNG file(s), 0 bytes." in result.stdout
+    finally:
+        cleanup_codex_artifacts(folder_name)
+
+
+def test_cli_resume_renders_again_when_an_alias_changes_its_emoji():
+    folder_name = "codex_resume_emoji"
+    cleanup_codex_artifacts(folder_name, f"{folder_name}_fire")
+    options = ("--folder", folder_name, "--font", str(TEST_FONT_PATH), "--sizes", "16,32")
+
+    try:
+        assert run_cli("--batch", "🔥:fire", *options).returncode == 0
+        journal_record = json.loads((MANIFEST_ROOT / f"{folder_name}.journal").read_text(encoding="utf-8").splitlines()[1])
+        assert journal_record["emoji"] == "🔥"
+        assert journal_record["font"] == str(TEST_FONT_PATH)
+
+        result = run_cli("--batch", "🎯:fire", *options, "--resume")
+
+        assert result.returncode == 0
+        assert "[utp] - INFO - Resume verified 2 output file(s) from the checkpoint journal." in result.stdout
+        assert "[utp] - INFO - Run summary: 2 PNG file(s)" in result.stdout
+        manifest = json.loads((MANIFEST_ROOT / f"{folder_name}.json").read_text(encoding="utf-8"))
+        assert {record["emoji"] for record in manifest["entries"][0]["files"]} == {"🎯"}
+    finally:
+        cleanup_codex_artifacts(folder_name, f"{folder_name}_fire")
+
+
+def test_cli_writes_run_manifest_with_output_hashes():
+    folder_name = "codex_run_manifest"
+    cleanup_codex_artifacts(folder_name)
+
+    try:
+        result = run_cli("--emoji", "😀", "--folder", folder_name, "--font", str(TEST_FONT_PATH), "--sizes", "16,32", "--containers", "ico")
+
+        assert result.returncode == 0
+        assert f"[utp] - INFO - Run manifest written: manifest/{folder_name}.json." in result.stdout
+        manifest = json.loads((MANIFEST_ROOT / f"{folder_name}.json").read_text(encoding="utf-8"))
+        assert manifest["shard"] is None
+        assert manifest["parameters"]["sizes"] == [16, 32]
+        assert manifest["parameters"]["containers"] == ["ico"]
+
+        records = manifest["entries"][0]["files"]
+        assert [record["path"] for record in records] == [
+            f"emojis/{folder_name}/emoji_16x16.png",
+            f"emojis/{folder_name}/emoji_32x32.png",
+            f"emojis/{folder_name}/emoji.ico",
+        ]
+        for record in records:
+            content = (PROJECT_ROOT / record["path"]).read_bytes()
+            assert record["bytes"] == len(content)
+            assert record["sha256"] == hashlib.sha256(content).hexdigest()
+        assert records[2]["container_sizes"] == [16, 32]
+        assert not list((EMOJIS_ROOT / folder_name).glob("*.tmp"))
+    finally:
+        cleanup_codex_artifacts(folder_name)
+
+
+def test_cli_pipeline_workers_render_every_entry_and_record_stage_stats():
+    folder_base = "codex_pipeline"
+    output_folders = [f"{folder_base}_fire", f"{folder_base}_game", f"{folder_base}_idea"]
+    cleanup_codex_artifacts(folder_base, *output_folders)
+
+    try:
+        result = run_cli(
+            "--batch", "🔥:fire,🎮:game,💡:idea",
+            "--folder", folder_base,
+            "--font", str(TEST_FONT_PATH),
+            "--containers", "ico",
+            "--workers", "rasterize=3,resize=2,encode=2",
+            "--queue-size", "1",
+            "--pipeline-stats",
+        )
+
+        assert result.returncode == 0
+        assert "[utp] - DEBUG - Pipeline statistics (queue size 1):" in result.stdout
+        for output_folder in output_folders:
+            assert_valid_icon_set(EMOJIS_ROOT / output_folder)
+            assert (EMOJIS_ROOT / output_folder / "emoji.ico").exists()
+
+        manifest = json.loads((MANIFEST_ROOT / f"{folder_base}.json").read_text(encoding="utf-8"))
+        assert [entry["alias"] for entry in manifest["entries"]] == ["fire", "game", "idea"]
+        assert all(entry["status"] == "completed" for entry in manifest["entries"])
+        stages = {stage["stage"]: stage for stage in manifest["pipeline"]["stages"]}
+        assert list(stages) == ["plan", "rasterize", "resize", "encode", "write"]
+        assert stages["plan"]["items"] == 3
+        assert stages["rasterize"]["workers"] == 3
+        assert stages["write"]["items"] == 3 * len(load_cli_module().ICON_SIZES)
+        assert all(stage["max_depth"] <= 1 for stage in stages.values())
+    finally:
+        cleanup_codex_artifacts(folder_base, *output_folders)
+
+
+def test_cli_skips_output_folders_locked_by_another_process():
+    folder_name = "codex_locked"
+    cleanup_codex_artifacts(folder_name)
+    folder_lock = FileLock(get_lock_path(str(EMOJIS_ROOT), f"{folder_name}_fire"))
+
+    try:
+        assert folder_lock.acquire()
+        result = run_cli(
+            "--batch", "🔥:fire,🎯:Fire,🎮:game", "--folder", folder_name, "--font", str(TEST_FONT_PATH),
+            "--lock-timeout", "0", "--sizes", "16",
+        )
+
+        assert result.returncode == 0
+        assert "Batch entry 2 alias 'Fire' collides with entry 1 after sanitization. Alias 'Fire_2' was used." in result.stdout
+        assert "Output folder is locked by another process after 0s and will be skipped" in result.stdout
+        manifest = json.loads((MANIFEST_ROOT / f"{folder_name}.json").read_text(encoding="utf-8"))
+        assert [(entry["alias"], entry["status"]) for entry in manifest["entries"]] == [
+            ("fire", "locked"), ("Fire_2", "completed"), ("game", "completed"),
+        ]
+        assert (EMOJIS_ROOT / f"{folder_name}_Fire_2" / "emoji_16x16.png").exists()
+        assert not (EMOJIS_ROOT / f"{folder_name}_fire" / "emoji_16x16.png").exists()
+        assert not Path(get_lock_path(str(EMOJIS_ROOT), f"{folder_name}_game")).exists()
+    finally:
+        folder_lock.release()
+        cleanup_codex_artifacts(folder_name, f"{folder_name}_fire", f"{folder_name}_Fire_2", f"{folder_name}_game")
+
+
+def test_cli_rejects_a_second_run_with_the_same_folder():
+    folder_name = "codex_run_lock"
+    cleanup_codex_artifacts(folder_name)
+    run_lock = FileLock(get_lock_path(str(EMOJIS_ROOT), f"{folder_name}.run"))
+
+    try:
+        assert run_lock.acquire()
+        result = run_cli("--emoji", "😀", "--folder", folder_name, "--font", str(TEST_FONT_PATH), "--lock-timeout", "0")
+
+        assert result.returncode == 1
+        assert f"Another run is writing --folder '{folder_name}'" in result.stdout
+        assert not (MANIFEST_ROOT / f"{folder_name}.journal").exists()
+    finally:
+        run_lock.release()
+        cleanup_codex_artifacts(folder_name)
+
+
+def test_cli_writes_one_run_log_with_startup_warnings_once():
+    folder_base = "codex_run_log"
+    output_folders = [f"{folder_base}_thumbs", f"{folder_base}_pencil"]
+    cleanup_codex_artifacts(folder_base, *output_folders)
+
+    try:
+        result = run_cli(
+            "--batch",
+            "👍🏽:thumbs,✏️:pencil",
+            "--folder",
+            folder_base,
+            "--font",
+            str(TEST_FONT_PATH),
+            "--font",
+            "missing_font.ttf",
+            "--sizes",
+            "16",
+            "--quiet",
+            "--background-log",
+            "--per-alias-logs",
+        )
+
+        assert result.returncode == 0
+        run_logs = list(LOG_ROOT.glob(f"*_{folder_base}.log"))
+        assert len(run_logs) == 1
+        run_log = run_logs[0].read_text(encoding="utf-8")
+        assert run_log.count("Font file was not found and will be skipped: missing_font.ttf.") == 1
+        assert "[INFO] [thumbs] Icon generated: emoji_16x16.png." in run_log
+        assert "[INFO] [pencil] Icon generated: emoji_16x16.png." in run_log
+        assert "Run summary: 2 PNG file(s)" in run_log
+
+        for output_folder in output_folders:
+            alias_logs = list(LOG_ROOT.glob(f"*_{output_folder}.log"))
+            assert len(alias_logs) == 1
+            alias_log = alias_logs[0].read_text(encoding="utf-8")
+            assert "Icon generated: emoji_16x16.png." in alias_log
+            assert "missing_font.ttf" not in alias_log
+    finally:
+        cleanup_codex_artifacts(folder_base, *output_folders)
+
+
+def test_cli_plan_writes_json_without_rendering():
+    folder_name = "codex_plan"
+    cleanup_codex_artifacts(folder_name)
+
+    try:
+        result = run_cli("--emoji", "😀", "--folder", folder_name, "--font", str(TEST_FONT_PATH), "--sizes", "16,1024", "--plan", "json")
+
+        assert result.returncode == 0
+        assert "[utp] - INFO - Planned 1 entries at 2 size(s) in " in result.stdout
+        plan = json.loads((MANIFEST_ROOT / f"{folder_name}.plan.json").read_text(encoding="utf-8"))
+        assert [entry["size"] for entry in plan["entries"]] == [16, 1024]
+        assert [entry["scale_factor"] for entry in plan["entries"]] == [4, 2]
+        assert all(entry["crop_box"] and entry["font_size"] for entry in plan["entries"])
+        assert not (EMOJIS_ROOT / folder_name).exists()
+        assert not (MANIFEST_ROOT / f"{folder_name}.journal").exists()
+        assert not list(LOG_ROOT.glob(f"*_{folder_name}.log"))
+    finally:
+        cleanup_codex_artifacts(folder_name)
+
+
+def test_cli_plan_prints_table():
+    result = run_cli("--batch", "😀:smile,✏️:pencil", "--folder", "codex_plan_table", "--font", str(TEST_FONT_PATH), "--sizes", "16", "--plan", "--quiet")
+
+    assert result.returncode == 0
+    lines = result.stdout.splitlines()
+    assert lines[0].split()[:3] == ["alias", "size", "scale"]
+    assert [line.split()[0] for line in lines[1:]] == ["smile", "pencil"]
+
+
+def test_cli_resample_reduce_is_recorded_in_the_manifest():
+    folder_name = "codex_resample"
+    cleanup_codex_artifacts(folder_name)
+
+    try:
+        result = run_cli("--emoji", "😀", "--folder", folder_name, "--font", str(TEST_FONT_PATH), "--resample", "reduce")
+
+        assert result.returncode == 0
+        assert_valid_icon_set(EMOJIS_ROOT / folder_name)
+        manifest = json.loads((MANIFEST_ROOT / f"{folder_name}.json").read_text(encoding="utf-8"))
+        assert manifest["parameters"]["resample"] == "reduce"
+    finally:
+        cleanup_codex_artifacts(folder_name)
+
+
+def test_cli_layout_engine_is_recorded_in_the_manifest():
+    folder_name = "codex_layout_engine"
+    cleanup_codex_artifacts(folder_name)
+
+    try:
+        result = run_cli("--emoji", "😀", "--folder", folder_name, "--font", str(TEST_FONT_PATH), "--layout-engine", "raqm")
+
+        assert result.returncode == 0
+        assert_valid_icon_set(EMOJIS_ROOT / folder_name)
+        manifest = json.loads((MANIFEST_ROOT / f"{folder_name}.json").read_text(encoding="utf-8"))
+        assert manifest["parameters"]["layout_engine"] == "raqm"
+        assert ("requires Pillow with libraqm" in result.stdout) != has_raqm()
+    finally:
+        cleanup_codex_artifacts(folder_name)
+
+
+def test_cli_metrics_file_exports_openmetrics_counters_for_the_run():
+    folder_name = "codex_metrics"
+    cleanup_codex_artifacts(folder_name)
+    metrics_path = MANIFEST_ROOT / f"{folder_name}.prom"
+
+    try:
+        result = run_cli(
+            "--emoji", "🧪",
+            "--folder", folder_name,
+            "--font", str(TEST_FONT_PATH),
+            "--sizes", "16,32",
+            "--format", "png,webp",
+            "--metrics-file", str(metrics_path),
+        )
+
+        assert result.returncode == 0
+        assert f"[utp] - INFO - Metrics written: {metrics_path}." in result.stdout
+        lines = metrics_path.read_text(encoding="utf-8").splitlines()
+        assert 'utp_icons_total{result="rendered"} 2' in lines
+        assert 'utp_icons_total{result="skipped"} 0' in lines
+        assert 'utp_files_written_total{format="webp"} 2' in lines
+        assert 'utp_render_seconds_count{size="32",structure="SIMPLE"} 1' in lines
+        assert any(line.startswith("utp_peak_rss_bytes ") for line in lines)
+        png_bytes = sum(path.stat().st_size for path in (EMOJIS_ROOT / folder_name).glob("*.png"))
+        assert f'utp_bytes_written_total{{format="png"}} {png_bytes}' in lines
+        assert lines[-1] == "# EOF"
+    finally:
+        cleanup_codex_artifacts(folder_name)
+
+
+def test_cli_metrics_file_counts_an_icon_with_a_failed_write_only_as_failed():
+    folder_name = "codex_metrics_write_failure"
+    cleanup_codex_artifacts(folder_name)
+    metrics_path = MANIFEST_ROOT / f"{folder_name}.prom"
+    # A directory in place of the 16x16 icon makes its write fail after encoding succeeded.
+    (EMOJIS_ROOT / folder_name / "emoji_16x16.png").mkdir(parents=True)
+
+    try:
+        result = run_cli(
+            "--emoji", "🧪",
+            "--folder", folder_name,
+            "--font", str(TEST_FONT_PATH),
+            "--sizes", "16,32",
+            "--metrics-file", str(metrics_path),
+        )
+
+        assert "[utp] - ERROR - Failed to save output file: emoji_16x16.png." in result.stdout
+        lines = metrics_path.read_text(encoding="utf-8").splitlines()
+        assert 'utp_icons_total{result="rendered"} 1' in lines
+        assert 'utp_icons_total{result="failed"} 1' in lines
+        assert 'utp_render_seconds_count{size="16",structure="SIMPLE"} 1' not in lines
+        assert 'utp_render_seconds_count{size="32",structure="SIMPLE"} 1' in lines
+    finally:
+        cleanup_codex_artifacts(folder_name)
+
+
+def test_cli_memory_abort_writes_a_partial_manifest_marked_aborted(monkeypatch, capsys):
+    folder_name = "codex_memory_abort"
+    cleanup_codex_artifacts(folder_name)
+    cli_module = load_cli_module()
+    # Usage stays over the limit, so every degradation step is taken and the next check aborts.
+    monkeypatch.setattr(cli_module, "get_memory_usage_mb", lambda: 10_000.0)
+    monkeypatch.setattr(sys, "argv", [
+        str(SCRIPT_PATH), "--emoji", "🧪", "--folder", folder_name, "--font", str(TEST_FONT_PATH), "--memlimit", "500", "--progress",
+    ])
+
+    try:
+        with pytest.raises(SystemExit) as exit_info:
+            cli_module.main()
+
+        assert exit_info.value.code == 1
+        output = capsys.readouterr().out
+        assert output.count("Process aborted due to excessive memory usage: 10000.0 MB.") == 1
+        manifest = json.loads((MANIFEST_ROOT / f"{folder_name}.json").read_text(encoding="utf-8"))
+        assert manifest["status"] == "aborted"
+        assert [entry["emoji"] for entry in manifest["entries"]] == ["🧪"]
+    finally:
+        cleanup_codex_artifacts(folder_name)
+
+
+def test_cli_variants_are_written_next_to_every_size_and_recorded():
+    folder_name = "codex_variants"
+    cleanup_codex_artifacts(folder_name)
+
+    try:
+        result = run_cli("--emoji", "🚀", "--folder", folder_name, "--font", str(TEST_FONT_PATH), "--sizes", "16,48", "--variants", "mono,grayscale")
+
+        assert result.returncode == 0
+        assert "[utp] - INFO - Run summary: 6 PNG file(s)" in result.stdout
+        for size in (16, 48):
+            base = Image.open(EMOJIS_ROOT / folder_name / get_variant_filename("emoji", size, None, "png"))
+            for variant in ("grayscale", "mono"):
+                with Image.open(EMOJIS_ROOT / folder_name / get_variant_filename("emoji", size, variant, "png")) as variant_icon:
+                    assert variant_icon.size == (size, size)
+                    assert variant_icon.getchannel("A").tobytes() == base.getchannel("A").tobytes()
+            base.close()
+
+        manifest = json.loads((MANIFEST_ROOT / f"{folder_name}.json").read_text(encoding="utf-8"))
+        assert manifest["parameters"]["variants"] == ["grayscale", "mono"]
+        records = manifest["entries"][0]["files"]
+        assert [record.get("variant") for record in records if record["size"] == 16] == [None, "grayscale", "mono"]
+    finally:
+        cleanup_codex_artifacts(folder_name)
+
+
+def test_cli_badges_render_once_and_write_one_file_per_badge_and_size():
+    folder_name = "codex_badges"
+    cleanup_codex_artifacts(folder_name)
+
+    try:
+        result = run_cli(
+            "--emoji", "💡",
+            "--folder", folder_name,
+            "--font", str(TEST_FONT_PATH),
+            "--sizes", "16,32",
+            "--badges", "1-12,dot:green",
+            "--badge-position", "top-right",
+        )
+
+        assert result.returncode == 0
+        assert "[utp] - INFO - Run summary: 28 PNG file(s)" in result.stdout
+        with Image.open(EMOJIS_ROOT / folder_name / "emoji_32x32.png") as base, Image.open(EMOJIS_ROOT / folder_name / "emoji_32x32_badge-12.png") as badged:
+            assert badged.size == (32, 32)
+            # The lower half keeps the pixels of the base render; the badge sits in the top-right corner.
+            assert base.crop((0, 16, 32, 32)).tobytes() == badged.crop((0, 16, 32, 32)).tobytes()
+            assert base.crop((16, 0, 32, 16)).tobytes() != badged.crop((16, 0, 32, 16)).tobytes()
+
+        manifest = json.loads((MANIFEST_ROOT / f"{folder_name}.json").read_text(encoding="utf-8"))
+        assert manifest["parameters"]["badges"][-1] == "badge-dot-green"
+        assert manifest["parameters"]["badge_position"] == "top-right"
+    finally:
+        cleanup_codex_artifacts(folder_name)
+
+
+def test_cli_all_renders_a_catalog_group_in_chunks_with_progress():
+    folder_base = "codex_all"
+    aliases = [
+        "grinning_face_with_big_eyes", "grinning_face_with_smiling_eyes", "beaming_face_with_smiling_eyes", "grinning_squinting_face",
+        "grinning_face_with_sweat", "face_with_tears_of_joy", "winking_face", "smiling_face_with_smiling_eyes",
+    ]
+    output_folders = [f"{folder_base}_{alias}" for alias in aliases]
+    cleanup_codex_artifacts(folder_base, *output_folders)
+
+    try:
+        result = run_cli(
+            "--all",
+            "--group", "face-smiling",
+            "--max-emoji-version", "0.6",
+            "--folder", folder_base,
+            "--font", str(TEST_FONT_PATH),
+            "--sizes", "16",
+            "--chunk-size", "3",
+        )
+
+        assert result.returncode == 0
+        assert "[utp] - INFO - Emoji catalog 15.1 selected 8 entries." in result.stdout
+        assert "[utp] - INFO - Chunk 1/3 completed: 3/8 entries, 3 file(s)," in result.stdout
+        assert "[utp] - INFO - Chunk 3/3 completed: 8/8 entries, 8 file(s)," in result.stdout
+        for output_folder in output_folders:
+            assert (EMOJIS_ROOT / output_folder / "emoji_16x16.png").exists()
+
+        manifest = json.loads((MANIFEST_ROOT / f"{folder_base}.json").read_text(encoding="utf-8"))
+        assert [entry["alias"] for entry in manifest["entries"]] == aliases
+    finally:
+        cleanup_codex_artifacts(folder_base, *output_folders)
+
+
+def test_cli_progress_replaces_per_icon_lines_with_one_status_line():
+    folder_base = "codex_progress"
+    output_folders = [f"{folder_base}_fire", f"{folder_base}_target"]
+    cleanup_codex_artifacts(folder_base, *output_folders)
+
+    try:
+        result = run_cli(
+            "--batch", "🔥:fire,🎯:target",
+            "--folder", folder_base,
+            "--font", str(TEST_FONT_PATH),
+            "--sizes", "16,32",
+            "--progress",
+        )
+
+        assert result.returncode == 0
+        assert "Icon generated" not in result.stdout
+        assert "Starting PNG generation" not in result.stdout
+        assert "[utp] - PROGRESS - 2/2 emoji (100%)" in result.stdout
+        assert "[utp] - INFO - Run summary: 4 PNG file(s)" in result.stdout
+        # The run log still records every event.
+        run_log = next(LOG_ROOT.glob(f"*{folder_base}.log")).read_text(encoding="utf-8")
+        assert run_log.count("Icon generated") == 4
+    finally:
+        cleanup_codex_artifacts(folder_base, *output_folders)
+
+
+def test_cli_render_timeout_reports_timed_out_entries_and_keeps_running():
+    folder_base = "codex_timeout"
+    output_folders = [f"{folder_base}_fire", f"{folder_base}_target"]
+    cleanup_codex_artifacts(folder_base, *output_folders)
+
+    try:
+        result = run_cli(
+            "--batch", "🔥:fire,🎯:target",
+            "--folder", folder_base,
+            "--font", str(TEST_FONT_PATH),
+            "--sizes", "16,32",
+            "--render-timeout", "0.000001",
+        )
+
+        assert result.returncode == 0
+        assert "[utp] - ERROR - Render of 16x16 exceeded the 1e-06s budget of this emoji and was cancelled. Size will be skipped." in result.stdout
+        assert "[utp] - WARNING - 2 emoji exceeded the 1e-06s render budget and are marked timed_out in the run manifest: fire, target." in result.stdout
+        manifest = json.loads((MANIFEST_ROOT / f"{folder_base}.json").read_text(encoding="utf-8"))
+        assert [entry["status"] for entry in manifest["entries"]] == ["timed_out", "timed_out"]
+    finally:
+        cleanup_codex_artifacts(folder_base, *output_folders)
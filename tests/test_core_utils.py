@@ -7,18 +7,77 @@
 # Copyright (c) 2025 Sergio Palma Hidalgo
 # All rights reserved.
 #
+import asyncio
+import io
+import struct
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
 
-from unicode_to_png.logging_utils import console_message
+import pytest
+from PIL import Image, ImageChops, ImageStat
+
+from unicode_to_png import async_utils, font_utils, render_utils
+from unicode_to_png.async_utils import iter_render_batch_async, render_icon_set_async
+from unicode_to_png.badge_utils import BADGE_SCALE, composite_badge, get_badge_offset, parse_badges, rasterize_badge
+from unicode_to_png.font_utils import (
+    format_codepoints,
+    get_default_font_paths,
+    get_font_coverage,
+    read_bitmap_strike_sizes,
+    read_cmap_codepoints,
+    select_font_for_emoji,
+)
+from unicode_to_png.batch_utils import parse_shard, resolve_alias_collisions, select_shard
+from unicode_to_png.catalog_utils import filter_catalog, get_catalog_slug, iter_catalog_chunks, load_emoji_catalog, read_catalog_version
+from unicode_to_png.journal_utils import append_journal_record, hash_bytes, load_journal, open_journal, verify_journal_records
+from unicode_to_png.lock_utils import FileLock, FolderLocks, get_lock_path
+from unicode_to_png.logging_utils import LogView, ProgressLine, RunLog, console_message, format_progress, log, relay_log_lines
 from unicode_to_png.logging_utils import write_log_if_needed
-from unicode_to_png.path_utils import prepare_log_path, sanitize_folder_name
-from unicode_to_png.unicode_utils import classify_unicode_structure, get_adjusted_margin
+from unicode_to_png.manifest_utils import merge_shard_manifests
+from unicode_to_png.memory_utils import MEMORY_SETTLE_CHECKS, MemoryGovernor, MemoryLimitExceeded
+from unicode_to_png.metrics_utils import MetricsFileWriter, MetricsRegistry, create_run_metrics, write_metrics_file
+from unicode_to_png.output_utils import CONTAINER_FORMATS, ICNS_SIZES, encode_image_formats, get_container_sizes, parse_format_list, write_file_atomic
+from unicode_to_png.path_utils import OutputInventory, get_log_path, prepare_log_path, sanitize_folder_name
+from unicode_to_png.pipeline_utils import Pipeline, PipelineStage, format_pipeline_stats, parse_stage_workers
+from unicode_to_png.render_utils import (
+    RESAMPLE_MODES,
+    check_visual_edges,
+    clear_shaping_cache,
+    get_icon_layout,
+    measure_text,
+    plan_icon,
+    rasterize_icon,
+    render_icon,
+    resample_glyph,
+    resize_icon,
+    resolve_layout_engine,
+)
+from unicode_to_png.size_utils import SIZE_PROFILES, get_scale_factor, parse_sizes
+from unicode_to_png.stage_utils import RenderStages
+from unicode_to_png.transport_utils import SharedImageBuffer, prepare_shared_transport, rasterize_icon_shared, write_shared_image
+from unicode_to_png.unicode_utils import classify_unicode_structure, get_adjusted_margin, get_sequence_limit_issue
+from unicode_to_png.variant_utils import DISABLED_OPACITY, VARIANTS, make_variant
 from unicode_to_png.version import read_version
+from unicode_to_png.watchdog_utils import RenderTimeout, RenderWatchdog
 from unicode_to_png import parse_batch
 
 
 SAMPLE_LOG_ENTRY = "[TEST] Example event."
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
+TEST_FONT_PATH = PROJECT_ROOT / "tests" / "fonts" / "utp_test_emoji.ttf"
+
+
+def write_cmap_font(path, codepoint_ranges):
+    """Write a minimal sfnt file whose only table is a format 12 cmap."""
+    groups = b"".join(struct.pack(">III", start, end, 1) for start, end in codepoint_ranges)
+    subtable = struct.pack(">HHIII", 12, 0, 16 + len(groups), 0, len(codepoint_ranges)) + groups
+    cmap = struct.pack(">HHHHI", 0, 1, 3, 10, 12) + subtable
+    header = struct.pack(">IHHHH", 0x00010000, 1, 16, 0, 0)
+    directory = struct.pack(">4sIII", b"cmap", 0, 12 + 16, len(cmap))
+    path.write_bytes(header + directory + cmap)
+    return str(path)
 
 
 def test_read_version_reads_root_version_file(tmp_path):
@@ -78,6 +137,22 @@ def test_parse_batch_skips_invalid_non_emoji_entries_and_continues():
     assert warnings == ["Skipped batch entry 1 because 'abc' is not a valid emoji."]
 
 
+def test_parse_batch_skips_entries_over_the_sequence_caps():
+    pairs, warnings = parse_batch("🎯" + "🔥" * 16 + ":junk,🎯" + "\ufe0f" * 20 + ":selectors,👍🏽:thumbs")
+
+    assert pairs == [("👍🏽", "thumbs")]
+    assert warnings == [
+        "Skipped batch entry 1 because the emoji has 17 codepoints, more than the limit of 16.",
+        "Skipped batch entry 2 because the emoji has 21 codepoints, more than the limit of 16.",
+    ]
+
+
+def test_get_sequence_limit_issue_checks_codepoints():
+    assert get_sequence_limit_issue("🎯") is None
+    assert get_sequence_limit_issue("🎯\u200d🔥\u200d💡") is None
+    assert get_sequence_limit_issue("🎯🔥💡", max_codepoints=2) == "has 3 codepoints, more than the limit of 2"
+
+
 def test_parse_batch_uses_fallback_when_alias_sanitizes_to_empty():
     pairs, warnings = parse_batch("🎯:!!!")
 
@@ -85,6 +160,315 @@ def test_parse_batch_uses_fallback_when_alias_sanitizes_to_empty():
     assert warnings == ["Batch entry 1 alias was empty after sanitization. Fallback alias 'emoji1' was used."]
 
 
+def test_parse_batch_resolves_aliases_that_collide_after_sanitization():
+    pairs, warnings = parse_batch("🔥:fire,🎯:Fire,🔥:fire,💡:fire!,🎮")
+
+    assert pairs == [("🔥", "fire"), ("🎯", "Fire_2"), ("💡", "fire_3"), ("🎮", "emoji1")]
+    assert warnings == [
+        "Batch entry 5 has no alias. Fallback alias 'emoji1' was used.",
+        "Batch entry 2 alias 'Fire' collides with entry 1 after sanitization. Alias 'Fire_2' was used.",
+        "Skipped batch entry 3 because it repeats entry 1 ('fire').",
+        "Batch entry 4 alias 'fire' collides with entry 1 after sanitization. Alias 'fire_3' was used.",
+    ]
+
+
+def test_resolve_alias_collisions_keeps_unique_aliases_and_skips_taken_suffixes():
+    pairs = [("🔥", "fire"), ("🎯", "fire_2"), ("💡", "fire")]
+
+    assert resolve_alias_collisions(pairs[:2]) == (pairs[:2], [])
+    resolved, warnings = resolve_alias_collisions(pairs)
+    assert resolved == [("🔥", "fire"), ("🎯", "fire_2"), ("💡", "fire_3")]
+    assert warnings == ["Batch entry 3 alias 'fire' collides with entry 1 after sanitization. Alias 'fire_3' was used."]
+
+
+def test_file_lock_excludes_a_second_holder_until_release(tmp_path):
+    lock_path = get_lock_path(str(tmp_path), "icons_fire")
+    first = FileLock(lock_path)
+    second = FileLock(lock_path)
+
+    assert first.acquire()
+    assert Path(lock_path).exists()
+    started = time.perf_counter()
+    assert not second.acquire(timeout=0.1)
+    assert time.perf_counter() - started >= 0.1
+
+    first.release()
+    assert not Path(lock_path).exists()
+    assert second.acquire()
+    second.release()
+    first.release()
+
+
+def test_folder_locks_release_one_folder_or_all(tmp_path):
+    run_locks = FolderLocks(str(tmp_path), timeout=0)
+    other_run = FolderLocks(str(tmp_path), timeout=0)
+
+    assert run_locks.acquire("icons_fire") and run_locks.acquire("icons_game")
+    assert run_locks.acquire("icons_fire")
+    assert not other_run.acquire("icons_fire")
+
+    run_locks.release("icons_fire")
+    assert other_run.acquire("icons_fire")
+    assert not other_run.acquire("icons_game")
+
+    run_locks.release_all()
+    other_run.release_all()
+    assert list((tmp_path / ".locks").iterdir()) == []
+
+
+def test_parse_shard_accepts_one_based_index():
+    assert parse_shard("2/4") == (2, 4)
+    assert parse_shard(" 1 / 1 ") == (1, 1)
+
+
+def test_parse_shard_rejects_invalid_values():
+    for value in ("0/4", "5/4", "1/0", "2", "a/b", "-1/2", ""):
+        assert parse_shard(value) is None
+
+
+def test_select_shard_partitions_batch_deterministically_and_balanced():
+    pairs = [(chr(0x1F600 + offset), f"alias{offset}") for offset in range(23)]
+    shards = [select_shard(pairs, index, 4) for index in range(1, 5)]
+
+    assert sorted(pair for shard in shards for pair in shard) == sorted(pairs)
+    assert max(len(shard) for shard in shards) - min(len(shard) for shard in shards) <= 1
+    assert select_shard(list(reversed(pairs)), 2, 4) == list(reversed(shards[1]))
+    assert select_shard(pairs, 1, 1) == pairs
+
+
+def test_merge_shard_manifests_reports_missing_shards():
+    manifest = {"folder": "catalog", "entries": [{"alias": "b", "files": ["x.png", "y.png"]}, {"alias": "a", "files": []}]}
+
+    merged, warnings = merge_shard_manifests([(1, 3, manifest)])
+
+    assert merged["missing_shards"] == [2, 3]
+    assert [entry["alias"] for entry in merged["entries"]] == ["a", "b"]
+    assert merged["shards"] == [{"shard": "1/3", "status": "completed", "started_at": None, "finished_at": None, "entries": 2, "files": 2}]
+    assert warnings == ["Shard manifests are missing for shard(s) 2, 3 of 3. The merged report is incomplete."]
+
+
+def test_merge_shard_manifests_reports_aborted_shards():
+    completed = {"folder": "catalog", "status": "completed", "entries": [{"alias": "a", "files": []}]}
+    aborted = {"folder": "catalog", "status": "aborted", "entries": [{"alias": "b", "files": []}]}
+
+    merged, warnings = merge_shard_manifests([(1, 2, completed), (2, 2, aborted)])
+
+    assert [shard["status"] for shard in merged["shards"]] == ["completed", "aborted"]
+    assert warnings == ["Shard(s) 2 of 2 did not finish their run. The merged report is incomplete."]
+
+
+def test_journal_round_trip_ignores_truncated_last_line(tmp_path):
+    journal_path = tmp_path / "run.journal"
+    parameters = {"sizes": [16], "formats": ["png"]}
+    record = {"path": "emojis/a/emoji_16x16.png", "sha256": hash_bytes(b"icon")}
+
+    with open_journal(str(journal_path), parameters) as journal_file:
+        append_journal_record(journal_file, record)
+        journal_file.write('{"path": "emojis/a/emo')
+
+    records, warnings = load_journal(str(journal_path), parameters)
+
+    assert records == {record["path"]: record}
+    assert warnings == ["Skipped 1 incomplete checkpoint journal line(s)."]
+
+
+def test_load_journal_discards_records_written_with_other_parameters(tmp_path):
+    journal_path = tmp_path / "run.journal"
+    with open_journal(str(journal_path), {"sizes": [16]}, [{"path": "x.png", "sha256": "0"}]):
+        pass
+
+    records, warnings = load_journal(str(journal_path), {"sizes": [32]})
+
+    assert records == {}
+    assert warnings == ["Checkpoint journal was written with different render parameters. Every output will be rendered again."]
+
+
+def test_verify_journal_records_rejects_missing_and_changed_files(tmp_path):
+    (tmp_path / "kept.png").write_bytes(b"kept")
+    (tmp_path / "changed.png").write_bytes(b"changed")
+    records = {
+        "kept.png": {"path": "kept.png", "sha256": hash_bytes(b"kept")},
+        "changed.png": {"path": "changed.png", "sha256": hash_bytes(b"original")},
+        "missing.png": {"path": "missing.png", "sha256": hash_bytes(b"missing")},
+    }
+
+    verified, failed = verify_journal_records(records, str(tmp_path))
+
+    assert list(verified) == ["kept.png"]
+    assert sorted(failed) == ["changed.png", "missing.png"]
+
+
+def test_parse_sizes_expands_profiles_and_merges_explicit_sizes():
+    sizes, warnings = parse_sizes("store, 48,512")
+
+    assert sizes == (48, 256, 512, 1024)
+    assert warnings == []
+
+
+def test_parse_sizes_skips_unknown_and_out_of_range_entries():
+    sizes, warnings = parse_sizes("chrome,huge,0")
+
+    assert sizes == SIZE_PROFILES["chrome"]
+    assert warnings == [
+        "Skipped size entry 2 because 'huge' is neither a number nor a known size profile.",
+        "Skipped size entry 3 because 0px is outside the supported range 1-2048px.",
+    ]
+
+
+def test_get_scale_factor_keeps_maximum_factor_for_small_sizes():
+    assert get_scale_factor(128, 4, 16) == 4
+
+
+def test_get_scale_factor_reduces_factor_to_respect_canvas_limit():
+    assert get_scale_factor(1024, 4, 16) == 2
+    assert get_scale_factor(2048, 4, 16) == 1
+
+
+def test_parse_format_list_keeps_canonical_order_and_skips_unknown_values():
+    formats, warnings = parse_format_list("icns, ico,bmp", CONTAINER_FORMATS, "--containers")
+
+    assert formats == ("ico", "icns")
+    assert warnings == ["Skipped --containers entry 3 because 'bmp' is not supported. Supported values: ico, icns."]
+
+
+def test_write_file_atomic_replaces_file_without_leaving_temp_files(tmp_path):
+    target = tmp_path / "emoji_16x16.png"
+    target.write_bytes(b"old")
+
+    write_file_atomic(str(target), b"new")
+
+    assert target.read_bytes() == b"new"
+    assert [path.name for path in tmp_path.iterdir()] == ["emoji_16x16.png"]
+
+
+def test_write_file_atomic_keeps_previous_file_when_replace_fails(tmp_path, monkeypatch):
+    target = tmp_path / "emoji_16x16.png"
+    target.write_bytes(b"old")
+
+    def fail_replace(source, destination):
+        raise OSError("disk full")
+
+    monkeypatch.setattr("unicode_to_png.output_utils.os.replace", fail_replace)
+
+    try:
+        write_file_atomic(str(target), b"new")
+    except OSError as error:
+        assert str(error) == "disk full"
+    else:
+        raise AssertionError("write_file_atomic should raise when the replace fails")
+
+    assert target.read_bytes() == b"old"
+    assert [path.name for path in tmp_path.iterdir()] == ["emoji_16x16.png"]
+
+
+def test_get_container_sizes_limits_ico_to_256_pixels():
+    assert get_container_sizes("ico", (16, 48, 256, 512)) == (16, 48, 256)
+
+
+def test_get_container_sizes_uses_fixed_icns_set():
+    assert get_container_sizes("icns", (16, 48)) == ICNS_SIZES
+
+
+def test_read_cmap_codepoints_reads_format_12_groups(tmp_path):
+    font_path = write_cmap_font(tmp_path / "groups.ttf", [(0x1F600, 0x1F602), (0x2600, 0x2600)])
+
+    assert read_cmap_codepoints(font_path) == {0x1F600, 0x1F601, 0x1F602, 0x2600}
+
+
+def test_read_cmap_codepoints_reads_only_the_directory_and_cmap_of_a_collection_face(tmp_path, monkeypatch):
+    single_face = tmp_path / "face.ttf"
+    write_cmap_font(single_face, [(0x1F525, 0x1F525)])
+    face = single_face.read_bytes()
+    padding = b"\0" * 1024 * 1024
+    # Two faces behind a TTC header: a dummy face first, then the cmap face after a large glyph data block.
+    face_offset = 20 + len(padding)
+    cmap_offset, cmap_length = struct.unpack_from(">II", face, 12 + 8)
+    relocated = face[:12] + struct.pack(">4sIII", b"cmap", 0, face_offset + cmap_offset, cmap_length) + face[28:]
+    collection = tmp_path / "collection.ttc"
+    collection.write_bytes(struct.pack(">4sHHIII", b"ttcf", 1, 0, 2, 0, face_offset) + padding + relocated)
+
+    bytes_read = []
+    real_open = open
+
+    def counting_open(*args, **kwargs):
+        font_file = real_open(*args, **kwargs)
+        read = font_file.read
+        font_file.read = lambda size=-1: bytes_read.append(len(data := read(size))) or data
+        return font_file
+
+    monkeypatch.setattr(font_utils, "open", counting_open, raising=False)
+
+    assert read_cmap_codepoints(str(collection), font_index=1) == {0x1F525}
+    assert sum(bytes_read) < 200
+
+
+def test_iter_render_batch_async_routes_fonts_off_the_event_loop_thread(tmp_path, monkeypatch):
+    font_path = write_cmap_font(tmp_path / "faces.ttf", [(0x1F600, 0x1F64F)])
+    routing_threads = []
+
+    def record_routing(emoji, font_paths):
+        routing_threads.append(threading.current_thread())
+        return font_paths[0], set()
+
+    monkeypatch.setattr(async_utils, "select_font_for_emoji", record_routing)
+    monkeypatch.setattr(async_utils, "_render_size", lambda *args: (None, []))
+
+    async def render():
+        return [result async for result in async_utils.iter_render_batch_async([("😀", "smile"), ("😁", "grin")], (16,), font_paths=(font_path,))]
+
+    results = asyncio.run(render())
+
+    assert [(result["alias"], result["font"]) for result in results] == [("smile", font_path), ("grin", font_path)]
+    assert len(routing_threads) == 2
+    assert threading.main_thread() not in routing_threads
+
+
+def test_get_font_coverage_returns_none_for_non_font_files(tmp_path):
+    not_a_font = tmp_path / "notes.ttf"
+    not_a_font.write_text("not a font", encoding="utf-8")
+
+    assert get_font_coverage(str(not_a_font)) is None
+
+
+def test_select_font_for_emoji_routes_to_first_covering_font(tmp_path):
+    faces = write_cmap_font(tmp_path / "faces.ttf", [(0x1F600, 0x1F64F)])
+    people = write_cmap_font(tmp_path / "people.ttf", [(0x1F468, 0x1F468), (0x1F4BB, 0x1F4BB)])
+
+    assert select_font_for_emoji("😀", (faces, people)) == (faces, set())
+    assert select_font_for_emoji("👨‍💻", (faces, people)) == (people, set())
+
+
+def test_select_font_for_emoji_reports_codepoints_missing_from_the_chain(tmp_path):
+    faces = write_cmap_font(tmp_path / "faces.ttf", [(0x1F600, 0x1F64F)])
+
+    font_path, missing = select_font_for_emoji("🔥", (faces,))
+
+    assert font_path is None
+    assert format_codepoints(missing) == "U+1F525"
+
+
+def test_read_bitmap_strike_sizes_reads_sbix_strikes(tmp_path):
+    strikes = [20, 160, 64]
+    sbix = struct.pack(">HHI", 1, 1, len(strikes))
+    sbix += b"".join(struct.pack(">I", 8 + len(strikes) * 4 + index * 4) for index in range(len(strikes)))
+    sbix += b"".join(struct.pack(">HH", ppem, 72) for ppem in strikes)
+    header = struct.pack(">IHHHH", 0x00010000, 1, 16, 0, 0)
+    directory = struct.pack(">4sIII", b"sbix", 0, 12 + 16, len(sbix))
+    font_path = tmp_path / "bitmap.ttf"
+    font_path.write_bytes(header + directory + sbix)
+
+    assert read_bitmap_strike_sizes(str(font_path)) == (20, 64, 160)
+
+
+def test_read_bitmap_strike_sizes_returns_empty_tuple_for_outline_fonts():
+    assert read_bitmap_strike_sizes(str(PROJECT_ROOT / "tests" / "fonts" / "utp_test_emoji.ttf")) == ()
+
+
+def test_get_default_font_paths_uses_platform_specific_chain():
+    assert get_default_font_paths("Windows")[0] == "C:/Windows/Fonts/seguiemj.ttf"
+    assert any("NotoColorEmoji" in path for path in get_default_font_paths("Linux"))
+
+
 def test_classify_unicode_structure_detects_simple_emoji():
     assert classify_unicode_structure("🧱") == "SIMPLE"
 
@@ -160,3 +544,703 @@ def test_write_log_if_needed_warns_when_log_file_cannot_be_written(tmp_path, cap
     output = capsys.readouterr().out
     assert f"[utp] - WARNING - Failed to write runtime log file: {blocked_log_path}." in output
     assert "[utp] - WARNING - Log persistence error detail:" in output
+
+
+def test_run_log_writes_entries_through_background_thread(tmp_path):
+    log_file = tmp_path / "run.log"
+    run_log = RunLog(str(log_file), background=True)
+
+    for index in range(100):
+        run_log.append(f"[TEST] Event {index}.")
+
+    assert run_log.close() is True
+    assert log_file.read_text(encoding="utf-8").splitlines() == [f"[TEST] Event {index}." for index in range(100)]
+
+
+def test_log_view_tags_run_log_lines_and_keeps_untagged_alias_lines(tmp_path):
+    log_file = tmp_path / "run.log"
+    run_log = RunLog(str(log_file))
+    alias_entries = []
+
+    log("Icon generated.", LogView(run_log, "fire", alias_entries), quiet=True)
+    run_log.close()
+
+    assert log_file.read_text(encoding="utf-8").strip().endswith("[INFO] [fire] Icon generated.")
+    assert alias_entries[0].endswith("[INFO] Icon generated.")
+
+
+def test_run_log_warns_when_log_path_is_unavailable(capsys):
+    run_log = RunLog(None)
+    run_log.append(SAMPLE_LOG_ENTRY)
+
+    assert run_log.close() is False
+    assert capsys.readouterr().out.strip() == console_message("WARNING", "Log file path is unavailable. Runtime log entries were not persisted.")
+
+
+def test_parse_stage_workers_sets_counts_and_warns_on_invalid_entries():
+    workers, warnings = parse_stage_workers("rasterize=3, encode=2,paint=4,write=0")
+
+    assert workers == {"plan": 1, "rasterize": 3, "resize": 1, "encode": 2, "write": 1}
+    assert len(warnings) == 2
+    assert "paint=4" in warnings[0]
+    assert "write=0" in warnings[1]
+
+
+def test_pipeline_fans_out_items_and_keeps_order_with_single_workers():
+    results = []
+    pipeline = Pipeline([
+        PipelineStage("split", lambda item: [(item, part) for part in "ab"]),
+        PipelineStage("double", lambda item: [item * 2]),
+        PipelineStage("collect", results.append),
+    ], queue_size=2)
+
+    stats = pipeline.run(range(3))
+
+    assert results == [((0, "a") * 2), ((0, "b") * 2), ((1, "a") * 2), ((1, "b") * 2), ((2, "a") * 2), ((2, "b") * 2)]
+    assert [stage["items"] for stage in stats] == [3, 6, 6]
+    assert all(stage["max_depth"] <= 2 for stage in stats)
+
+
+def test_pipeline_bounds_items_in_flight_whatever_the_batch_size():
+    lock = threading.Lock()
+    counters = {"produced": 0, "consumed": 0, "peak": 0}
+
+    def source():
+        for item in range(200):
+            with lock:
+                counters["produced"] += 1
+                counters["peak"] = max(counters["peak"], counters["produced"] - counters["consumed"])
+            yield item
+
+    def slow_sink(item):
+        time.sleep(0.001)
+        with lock:
+            counters["consumed"] += 1
+
+    pipeline = Pipeline([PipelineStage("pass", lambda item: [item], workers=2), PipelineStage("sink", slow_sink)], queue_size=1)
+    pipeline.run(source())
+
+    assert counters["consumed"] == 200
+    # Two queues of one item, three workers, and the item the feeder is waiting to queue.
+    assert counters["peak"] <= 6
+
+
+def test_pipeline_raises_the_first_stage_error_and_drains():
+    processed = []
+
+    def fail_on_three(item):
+        if item == 3:
+            raise ValueError("stage failed")
+        return [item]
+
+    pipeline = Pipeline([PipelineStage("check", fail_on_three), PipelineStage("collect", processed.append)], queue_size=1)
+
+    with pytest.raises(ValueError, match="stage failed"):
+        pipeline.run(range(100))
+    assert 3 not in processed
+    assert len(processed) < 100
+
+
+def test_format_pipeline_stats_marks_the_busiest_stage_per_worker():
+    stats = [
+        {"stage": "rasterize", "workers": 4, "items": 10, "busy_seconds": 2.0, "blocked_seconds": 0.0, "queue_size": 4, "max_depth": 4, "mean_depth": 3.5},
+        {"stage": "encode", "workers": 1, "items": 10, "busy_seconds": 1.0, "blocked_seconds": 0.5, "queue_size": 4, "max_depth": 1, "mean_depth": 0.2},
+    ]
+
+    lines = format_pipeline_stats(stats)
+
+    assert lines[0].split()[0] == "stage"
+    assert not lines[1].endswith("<- bottleneck")
+    assert lines[2].endswith("<- bottleneck")
+
+
+def test_metrics_registry_renders_openmetrics_counters_gauges_and_histograms():
+    metrics = MetricsRegistry(buckets=(0.1, 1.0))
+    metrics.describe("utp_icons", "counter", "Icon sizes by render result.")
+    metrics.describe("utp_render_seconds", "histogram", "Render latency.")
+    metrics.describe("utp_peak_rss_bytes", "gauge", "Peak RSS.")
+    metrics.inc("utp_icons", result="rendered")
+    metrics.inc("utp_icons", 2, result="rendered")
+    metrics.inc("utp_icons", result='odd "label"')
+    metrics.observe("utp_render_seconds", 0.05, size=16, structure="SIMPLE")
+    metrics.observe("utp_render_seconds", 0.5, size=16, structure="SIMPLE")
+    metrics.set("utp_peak_rss_bytes", 1024)
+
+    assert metrics.render().splitlines() == [
+        "# TYPE utp_icons counter",
+        "# HELP utp_icons Icon sizes by render result.",
+        'utp_icons_total{result="odd \\"label\\""} 1',
+        'utp_icons_total{result="rendered"} 3',
+        "# TYPE utp_render_seconds histogram",
+        "# HELP utp_render_seconds Render latency.",
+        'utp_render_seconds_bucket{size="16",structure="SIMPLE",le="0.1"} 1',
+        'utp_render_seconds_bucket{size="16",structure="SIMPLE",le="1.0"} 2',
+        'utp_render_seconds_bucket{size="16",structure="SIMPLE",le="+Inf"} 2',
+        'utp_render_seconds_count{size="16",structure="SIMPLE"} 2',
+        'utp_render_seconds_sum{size="16",structure="SIMPLE"} 0.55',
+        "# TYPE utp_peak_rss_bytes gauge",
+        "# HELP utp_peak_rss_bytes Peak RSS.",
+        "utp_peak_rss_bytes 1024",
+        "# EOF",
+    ]
+    with pytest.raises(KeyError):
+        metrics.inc("utp_peak_rss_bytes")
+    with pytest.raises(ValueError):
+        metrics.inc("utp_icons", -1, result="rendered")
+
+
+def test_create_run_metrics_starts_every_result_and_format_at_zero(tmp_path):
+    metrics = create_run_metrics(("png", "webp"))
+    metrics_path = tmp_path / "textfile" / "utp.prom"
+
+    write_metrics_file(metrics, str(metrics_path))
+
+    lines = metrics_path.read_text(encoding="utf-8").splitlines()
+    for result in ("rendered", "skipped", "failed"):
+        assert f'utp_icons_total{{result="{result}"}} 0' in lines
+    assert 'utp_bytes_written_total{format="webp"} 0' in lines
+    assert "utp_fit_attempts_total 0" in lines
+    assert lines[-1] == "# EOF"
+    assert not list(metrics_path.parent.glob("*.tmp"))
+
+
+def test_metrics_file_writer_rewrites_periodically_and_once_at_close(tmp_path):
+    metrics = create_run_metrics()
+    metrics_path = tmp_path / "utp.prom"
+    writes = []
+
+    def count_write(registry):
+        writes.append(time.perf_counter())
+        registry.set("utp_run_seconds", len(writes))
+
+    writer = MetricsFileWriter(metrics, str(metrics_path), interval=0.02, before_write=count_write)
+    deadline = time.perf_counter() + 5
+    while len(writes) < 2 and time.perf_counter() < deadline:
+        time.sleep(0.01)
+
+    assert metrics_path.exists()
+    assert writer.close() is True
+    assert len(writes) >= 3
+    assert f"utp_run_seconds {len(writes)}" in metrics_path.read_text(encoding="utf-8")
+    assert writer.errors == []
+
+
+def test_output_inventory_scans_requested_folders_once_and_creates_missing_ones(tmp_path, monkeypatch):
+    (tmp_path / "icons_fire").mkdir()
+    (tmp_path / "icons_fire" / "emoji_16x16.png").write_bytes(b"png")
+    (tmp_path / "unrelated").mkdir()
+    (tmp_path / "unrelated" / "other.png").write_bytes(b"png")
+
+    inventory = OutputInventory.scan(str(tmp_path), ["icons_fire", "icons_game"])
+
+    assert inventory.folders == {"icons_fire": {"emoji_16x16.png"}}
+    assert inventory.prepare(["icons_fire", "icons_game", "icons_game"]) == {}
+    assert (tmp_path / "icons_game").is_dir()
+
+    # Existence checks during the run never touch the filesystem.
+    monkeypatch.setattr("os.path.exists", lambda path: pytest.fail("os.path.exists was called"))
+    assert inventory.exists("icons_fire", "emoji_16x16.png")
+    assert not inventory.exists("icons_game", "emoji_16x16.png")
+    inventory.add("icons_game", "emoji_16x16.png")
+    assert inventory.exists("icons_game", "emoji_16x16.png")
+
+
+def test_output_inventory_reports_missing_folders_under_an_unwritable_root(tmp_path):
+    inventory = OutputInventory.scan(str(tmp_path), ["icons_fire"])
+    inventory.root_writable = False
+
+    errors = inventory.prepare(["icons_fire"])
+
+    assert errors == {"icons_fire": f"Output root is not writable: {tmp_path}"}
+    assert not (tmp_path / "icons_fire").exists()
+
+
+def test_get_log_path_matches_prepare_log_path(tmp_path):
+    log_path = prepare_log_path(str(tmp_path), "icons")
+
+    assert log_path == get_log_path(str(tmp_path / "log"), "icons")
+
+
+def test_load_emoji_catalog_lists_every_fully_qualified_emoji_with_a_unique_alias():
+    catalog = load_emoji_catalog()
+    aliases = [entry["alias"] for entry in catalog]
+
+    assert read_catalog_version() == "15.1"
+    assert len(catalog) == 3773
+    assert len(set(aliases)) == len(aliases)
+    assert catalog[0] == {
+        "emoji": "\U0001F600",
+        "name": "grinning face",
+        "group": "Smileys & Emotion",
+        "subgroup": "face-smiling",
+        "emoji_version": "1.0",
+        "alias": "grinning_face",
+    }
+    assert get_catalog_slug("flag: Côte d’Ivoire") == "flag_cote_divoire"
+
+
+def test_filter_catalog_keeps_groups_and_versions_and_reports_unknown_groups():
+    catalog = load_emoji_catalog()
+
+    entries, warnings = filter_catalog(catalog, "face-smiling, Flags,nope", "1.0")
+
+    assert {entry["subgroup"] for entry in entries if entry["group"] != "Flags"} == {"face-smiling"}
+    assert all(entry["emoji_version"] in ("0.6", "0.7", "1.0") for entry in entries)
+    assert warnings == ["Skipped --group entry 3 because 'nope' is not a catalog group or subgroup."]
+    assert filter_catalog(catalog, "nope") == ((), ["Skipped --group entry 1 because 'nope' is not a catalog group or subgroup."])
+    assert filter_catalog(catalog, max_version="new")[1] == ["Invalid emoji version 'new' was ignored. Use a version such as 13.0."]
+
+
+def test_iter_catalog_chunks_covers_every_entry_once():
+    chunks = list(iter_catalog_chunks(list(range(12)), 5))
+
+    assert [(number, count, len(chunk)) for number, count, chunk in chunks] == [(1, 3, 5), (2, 3, 5), (3, 3, 2)]
+    assert [value for _, _, chunk in chunks for value in chunk] == list(range(12))
+    assert list(iter_catalog_chunks([], 5)) == []
+
+
+class FakeTerminal(io.StringIO):
+    def isatty(self):
+        return True
+
+
+def test_format_progress_reports_rate_and_eta():
+    assert format_progress(12, 30, 4.0) == "[utp] - PROGRESS - 12/30 emoji (40%), 3.0 emoji/s, ETA 0:00:06"
+    assert format_progress(0, 30, 0.0) == "[utp] - PROGRESS - 0/30 emoji (0%), 0.0 emoji/s, ETA --:--:--"
+
+
+def test_progress_line_is_rate_limited_and_keeps_warnings_visible(capsys):
+    now = [0.0]
+    terminal = FakeTerminal()
+    progress = ProgressLine(3, stream=terminal, clock=lambda: now[0]).start()
+    try:
+        now[0] = 0.05
+        progress.advance()
+        assert terminal.getvalue().count("PROGRESS") == 1
+        now[0] = 0.2
+        progress.advance()
+        assert terminal.getvalue().endswith("2/3 emoji (66%), 10.0 emoji/s, ETA 0:00:00")
+
+        entries = []
+        log("Icon generated: emoji_16x16.png.", entries)
+        log("Memory usage is high: 900.0 MB.", entries, level="WARNING")
+        assert len(entries) == 2
+        assert capsys.readouterr().out == "[utp] - WARNING - Memory usage is high: 900.0 MB.\n"
+    finally:
+        progress.close()
+
+    # The warning cleared the line and drew it again; close ends the line.
+    line = format_progress(2, 3, 0.2)
+    assert terminal.getvalue().count("\r" + " " * len(line) + "\r\r" + line) == 1
+    assert terminal.getvalue().endswith("\n")
+    log("Run summary: 3 PNG file(s), 300 bytes.", [])
+    assert "Run summary" in capsys.readouterr().out
+
+
+def test_relay_log_lines_records_worker_lines_and_prints_them_like_log(capsys):
+    worker_entries = []
+    log("Supersampling applied.", worker_entries, quiet=True, level="DEBUG")
+    log("Emoji did not fit.", worker_entries, quiet=True, level="WARNING", detail="10 attempts")
+
+    run_entries = []
+    relay_log_lines(worker_entries, run_entries)
+
+    assert run_entries == worker_entries
+    assert capsys.readouterr().out == "[utp] - DEBUG - Supersampling applied.\n[utp] - WARNING - Emoji did not fit.\n"
+    relay_log_lines(worker_entries, [], quiet=True)
+    assert capsys.readouterr().out == ""
+
+
+def test_memory_governor_degrades_step_by_step_before_aborting():
+    cleared = []
+    governor = MemoryGovernor(500, 4, parallelism=4, clear_caches=lambda: cleared.append(True))
+
+    assert governor.check(400) is None
+    assert governor.check(430) == ("evict_caches", "Memory usage 430.0 MB is near the 500 MB limit. Font, shaping, and badge caches were cleared.")
+    assert cleared == [True]
+    # Freed memory needs a few checks to show up in the usage, so the next step waits.
+    for _ in range(MEMORY_SETTLE_CHECKS - 1):
+        assert governor.check(430) is None
+    assert governor.check(430)[0] == "reduce_parallelism"
+    assert governor.parallelism == 1
+    # Over the hard limit, steps are taken without waiting.
+    assert governor.check(520) == ("reduce_supersampling", "Memory usage 520.0 MB is over the 500 MB limit. Maximum supersampling factor reduced to 2x for the remaining sizes.")
+    assert governor.check(520)[0] == "reduce_supersampling"
+    assert governor.max_scale_factor == 1
+    assert governor.check(480) is None
+    assert governor.check(520) == ("abort", "Memory usage exceeded configured limit: 520.0 MB > 500 MB after every degradation step.")
+    assert governor.steps == ["evict_caches", "reduce_parallelism", "reduce_supersampling", "reduce_supersampling"]
+
+
+def test_memory_governor_render_slots_follow_the_reduced_parallelism():
+    governor = MemoryGovernor(500, 4, parallelism=1)
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def render():
+        with governor.render_slot():
+            with lock:
+                active.append(1)
+                peak.append(len(active))
+            time.sleep(0.01)
+            with lock:
+                active.pop()
+
+    threads = [threading.Thread(target=render) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert max(peak) == 1
+
+
+def test_check_visual_edges_reports_right_or_bottom_contact():
+    image = Image.new("RGBA", (4, 4), (0, 0, 0, 0))
+    image.putpixel((3, 1), (255, 255, 255, 255))
+
+    log_entries = []
+
+    assert check_visual_edges(image, 4, log_entries, quiet=True) is True
+    assert "Emoji touches right edge(s) at 4x4." in log_entries[0]
+
+
+def test_check_visual_edges_returns_false_when_output_has_padding():
+    image = Image.new("RGBA", (4, 4), (0, 0, 0, 0))
+    image.putpixel((1, 1), (255, 255, 255, 255))
+
+    log_entries = []
+
+    assert check_visual_edges(image, 4, log_entries, quiet=True) is False
+    assert log_entries == []
+
+
+def test_plan_icon_measures_layout_without_rasterizing():
+    plan = plan_icon("😀", 32, 4, "SIMPLE", 0.0, [], True, str(TEST_FONT_PATH))
+
+    assert plan["canvas"] == 128
+    assert plan["font_size"] is not None
+    assert plan["margin"] == 0
+    assert plan["output_margin"] == 1
+    assert plan["glyph_size"] == list(get_icon_layout(plan["crop_box"], 32, 0)[0])
+    assert plan["issues"] == []
+
+
+def test_get_icon_layout_applies_exact_margin_and_keeps_aspect_ratio():
+    glyph_size, offset, margin = get_icon_layout((10, 20, 110, 70), 64, 50)
+
+    assert margin == 16
+    assert glyph_size == (32, 16)
+    assert offset == (16, 24)
+
+
+def test_render_icon_crops_to_ink_without_touching_edges():
+    for emoji, structure_type in (("😀", "SIMPLE"), ("👍🏽", "SKIN_MODIFIER"), ("✏️", "PRESENTATION_SELECTOR")):
+        image = render_icon(emoji, 48, 4, structure_type, 0.25, False, [], True, str(TEST_FONT_PATH))
+
+        assert image.size == (48, 48)
+        assert check_visual_edges(image, 48, [], True) is False
+
+
+def test_render_icon_applies_exact_margin_from_ink_bbox():
+    image = render_icon("😀", 48, 4, "SIMPLE", 0.0, False, [], True, str(TEST_FONT_PATH))
+
+    # Without a margin ratio only the one-pixel safety border remains around the longer ink side.
+    ink = image.getchannel("A").getbbox()
+    assert ink[0] == 1 and ink[2] == 47
+
+
+def test_rasterize_and_resize_steps_match_render_icon():
+    rasterized = rasterize_icon("👍🏽", 32, 4, "SKIN_MODIFIER", 0.25, [], True, str(TEST_FONT_PATH))
+    image = resize_icon(*rasterized, 32, False, [], True)
+
+    assert rasterized[0].size == (128, 128)
+    assert image.tobytes() == render_icon("👍🏽", 32, 4, "SKIN_MODIFIER", 0.25, False, [], True, str(TEST_FONT_PATH)).tobytes()
+
+
+def test_encode_image_formats_encodes_every_format_from_one_image():
+    image = Image.new("RGBA", (8, 8), (0, 0, 0, 0))
+    image.putpixel((2, 2), (255, 0, 0, 255))
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        encoded = encode_image_formats(image, ("png", "webp"), executor)
+
+    assert list(encoded) == ["png", "webp"]
+    for image_format, encoded_bytes in encoded.items():
+        with Image.open(io.BytesIO(encoded_bytes)) as decoded:
+            assert decoded.format == image_format.upper()
+            assert decoded.convert("RGBA").getpixel((2, 2)) == (255, 0, 0, 255)
+
+
+def test_render_icon_set_async_returns_every_size_in_order():
+    images = asyncio.run(render_icon_set_async("😀", (48, 16, 32), font_paths=(str(TEST_FONT_PATH),)))
+
+    assert list(images) == [16, 32, 48]
+    assert [image.size for image in images.values()] == [(16, 16), (32, 32), (48, 48)]
+
+
+class CountingExecutor(ThreadPoolExecutor):
+    """Thread pool that records the highest number of tasks running at once."""
+
+    def __init__(self, max_workers):
+        super().__init__(max_workers=max_workers)
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, **kwargs):
+        def counted():
+            with self._lock:
+                self.active += 1
+                self.peak = max(self.peak, self.active)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self.active -= 1
+
+        return super().submit(counted)
+
+
+def test_iter_render_batch_async_streams_results_without_blocking_the_loop():
+    executor = CountingExecutor(max_workers=4)
+
+    async def render_batch():
+        ticks = 0
+        stop = asyncio.Event()
+
+        async def ticker():
+            nonlocal ticks
+            while not stop.is_set():
+                ticks += 1
+                await asyncio.sleep(0)
+
+        ticker_task = asyncio.create_task(ticker())
+        with executor:
+            results = [
+                result async for result in iter_render_batch_async(
+                    [("🔥", "fire"), ("🎮", "game"), ("💡", "idea")], (16, 128),
+                    font_paths=(str(TEST_FONT_PATH),), executor=executor, max_in_flight=2,
+                )
+            ]
+        stop.set()
+        await ticker_task
+        return results, ticks
+
+    results, ticks = asyncio.run(render_batch())
+
+    assert sorted((result["alias"], result["size"]) for result in results) == [
+        ("fire", 16), ("fire", 128), ("game", 16), ("game", 128), ("idea", 16), ("idea", 128),
+    ]
+    assert all(result["image"].size == (result["size"], result["size"]) for result in results)
+    assert all(result["font"] == str(TEST_FONT_PATH) for result in results)
+    assert ticks > len(results)
+    assert executor.peak <= 2
+
+
+def test_shared_image_buffer_maps_worker_canvas_without_pickling_pixels():
+    prepare_shared_transport()
+    with ProcessPoolExecutor(max_workers=1) as executor, SharedImageBuffer((128, 128)) as buffer:
+        ink_bbox, margin_pixels, _ = executor.submit(
+            rasterize_icon_shared, buffer.descriptor, "👍🏽", 32, 4, "SKIN_MODIFIER", 0.25, str(TEST_FONT_PATH)
+        ).result()
+        with buffer.image() as canvas:
+            image = resize_icon(canvas, ink_bbox, margin_pixels, 32, False, [], True)
+
+    assert image.tobytes() == render_icon("👍🏽", 32, 4, "SKIN_MODIFIER", 0.25, False, [], True, str(TEST_FONT_PATH)).tobytes()
+
+
+def test_write_shared_image_rejects_images_that_do_not_match_the_buffer():
+    with SharedImageBuffer((4, 4)) as buffer:
+        write_shared_image(buffer.descriptor, Image.new("RGBA", (4, 4), (9, 8, 7, 6)))
+        with buffer.image() as image:
+            assert image.getpixel((3, 3)) == (9, 8, 7, 6)
+
+        with pytest.raises(ValueError, match="does not match the shared buffer"):
+            write_shared_image(buffer.descriptor, Image.new("RGBA", (8, 8)))
+
+
+def test_resample_glyph_keeps_edge_color_with_premultiplied_alpha():
+    glyph = Image.new("RGBA", (400, 400), (0, 0, 0, 0))
+    glyph.paste((255, 255, 255, 255), (101, 101, 299, 299))
+
+    for resample in RESAMPLE_MODES:
+        image = resample_glyph(glyph, (30, 30), resample)
+
+        assert image.mode == "RGBA" and image.size == (30, 30)
+        pixels = image.load()
+        edge_pixels = [pixels[x, y] for x in range(30) for y in range(30) if 0 < pixels[x, y][3] < 255]
+        assert edge_pixels
+        # Straight-alpha filtering would blend the transparent black pixels into the edge colors.
+        assert all(min(pixel[:3]) >= 250 for pixel in edge_pixels)
+
+
+def test_resize_icon_reduce_mode_stays_close_to_lanczos():
+    rasterized = rasterize_icon("😀", 128, 4, "SIMPLE", 0.25, [], True, str(TEST_FONT_PATH))
+    lanczos = resize_icon(*rasterized, 128, False, [], True, "lanczos")
+    reduced = resize_icon(*rasterized, 128, False, [], True, "reduce")
+
+    assert reduced.size == lanczos.size == (128, 128)
+    assert reduced.getchannel("A").getbbox() == lanczos.getchannel("A").getbbox()
+    difference = ImageChops.difference(reduced, lanczos)
+    assert max(ImageStat.Stat(difference).mean) < 3
+
+
+def test_resolve_layout_engine_shapes_only_sequences_with_raqm(monkeypatch):
+    monkeypatch.setattr(render_utils, "has_raqm", lambda: True)
+    assert resolve_layout_engine("auto", "SIMPLE") == "basic"
+    assert resolve_layout_engine("auto", "ZWJ_SEQUENCE") == "raqm"
+    assert resolve_layout_engine("auto", "REGIONAL_FLAG") == "raqm"
+    assert resolve_layout_engine("basic", "SKIN_MODIFIER") == "basic"
+
+    monkeypatch.setattr(render_utils, "has_raqm", lambda: False)
+    assert resolve_layout_engine("auto", "ZWJ_SEQUENCE") == "basic"
+    assert resolve_layout_engine("raqm", "SIMPLE") == "basic"
+
+
+def test_measure_text_caches_shaping_results_across_renders():
+    clear_shaping_cache()
+    first = render_icon("👍🏽", 64, 4, "SKIN_MODIFIER", 0.25, False, [], True, str(TEST_FONT_PATH), layout_engine="basic")
+    misses = measure_text.cache_info().misses
+    second = render_icon("👍🏽", 64, 4, "SKIN_MODIFIER", 0.25, False, [], True, str(TEST_FONT_PATH), layout_engine="basic")
+
+    assert misses > 0
+    assert measure_text.cache_info().misses == misses
+    assert measure_text.cache_info().hits >= misses
+    assert ImageChops.difference(first, second).getbbox() is None
+    clear_shaping_cache()
+    assert measure_text.cache_info().currsize == 0
+
+
+def test_make_variant_derives_state_icons_with_band_operations():
+    icon = Image.new("RGBA", (4, 1), (0, 0, 0, 0))
+    icon.putpixel((0, 0), (255, 0, 0, 255))
+    icon.putpixel((1, 0), (0, 200, 0, 128))
+
+    grayscale = make_variant(icon, "grayscale")
+    disabled = make_variant(icon, "disabled")
+    mono = make_variant(icon, "mono")
+
+    red_luma = icon.convert("L").getpixel((0, 0))
+    assert grayscale.getpixel((0, 0)) == (red_luma, red_luma, red_luma, 255)
+    assert disabled.getpixel((0, 0)) == (red_luma, red_luma, red_luma, round(255 * DISABLED_OPACITY))
+    assert disabled.getpixel((1, 0))[3] == round(128 * DISABLED_OPACITY)
+    assert mono.getpixel((0, 0)) == (0, 0, 0, 255)
+    assert mono.getpixel((1, 0)) == (0, 0, 0, 128)
+    for variant in VARIANTS:
+        assert make_variant(icon, variant).getpixel((3, 0))[3] == 0
+    with pytest.raises(ValueError):
+        make_variant(icon, "sepia")
+
+
+def test_parse_badges_expands_ranges_and_reports_invalid_entries():
+    badges, warnings = parse_badges("1-3, dot, dot:#00ff00, 2, dot:nope, x, 5-2")
+
+    assert [badge["name"] for badge in badges] == ["1", "2", "3", "dot", "dot-00ff00"]
+    assert badges[0]["text"] == "1" and badges[3]["text"] is None
+    assert badges[4]["color"] == (0, 255, 0, 255)
+    assert warnings == [
+        "Skipped --badges entry 5 because 'nope' is not a color name or #rrggbb value.",
+        "Skipped --badges entry 6 because 'x' is not a count, a count range, or a status dot.",
+        "Skipped --badges entry 7 because '5-2' is not a range between 0 and 999.",
+    ]
+
+
+def test_composite_badge_pastes_a_cached_badge_into_the_requested_corner():
+    icon = Image.new("RGBA", (48, 48), (0, 0, 0, 0))
+    badge = {"name": "7", "text": "7", "color": (255, 0, 0, 255)}
+
+    composed = composite_badge(icon, badge, "top-left")
+
+    assert composed.size == (48, 48)
+    assert icon.getchannel("A").getbbox() is None
+    ink = composed.getchannel("A").getbbox()
+    assert ink[0] == 0 and ink[1] == 0 and ink[3] <= round(48 * BADGE_SCALE)
+    assert get_badge_offset((48, 48), (24, 24), "bottom-right") == (24, 24)
+    assert rasterize_badge("7", (255, 0, 0, 255), 24) is rasterize_badge("7", (255, 0, 0, 255), 24)
+
+
+def test_render_watchdog_cancels_over_budget_renders_and_replaces_the_worker():
+    watchdog = RenderWatchdog(workers=1)
+    try:
+        with pytest.raises(RenderTimeout):
+            watchdog.rasterize("💡", 64, 4, "SIMPLE", 0.25, str(TEST_FONT_PATH), timeout=0.000001)
+        assert watchdog.terminated == 1
+
+        rasterized, log_lines = watchdog.rasterize("💡", 64, 4, "SIMPLE", 0.25, str(TEST_FONT_PATH), timeout=60)
+    finally:
+        watchdog.close()
+
+    canvas, ink_bbox, margin_pixels = rasterized
+    expected_lines = []
+    expected_canvas, expected_bbox, expected_margin = rasterize_icon("💡", 64, 4, "SIMPLE", 0.25, expected_lines, True, str(TEST_FONT_PATH))
+    assert (ink_bbox, margin_pixels) == (expected_bbox, expected_margin)
+    assert canvas.tobytes() == expected_canvas.tobytes()
+    # Worker log lines come back for the parent to relay; only their timestamps differ.
+    assert [line.split("] ", 2)[2] for line in log_lines] == [line.split("] ", 2)[2] for line in expected_lines]
+
+
+def make_render_stages(tmp_path, **options):
+    emojis_root = tmp_path / "emojis"
+    emojis_root.mkdir()
+    inventory = OutputInventory.scan(str(emojis_root), ["icons_fire"])
+    inventory.prepare(["icons_fire"])
+    return RenderStages(
+        base_path=str(tmp_path),
+        folder_base="icons",
+        run_log=RunLog(None),
+        inventory=inventory,
+        folder_locks=FolderLocks(str(emojis_root)),
+        memory_governor=MemoryGovernor(500, 4, 1),
+        metrics=create_run_metrics(),
+        icon_sizes=(16, 32),
+        entry_count=1,
+        quiet=True,
+        **options,
+    )
+
+
+def run_render_stages(stages, entry):
+    for task in stages.plan_entry(entry):
+        for stage in (stages.rasterize_task, stages.resize_task, stages.encode_task):
+            (task,) = stage(task)
+        stages.write_task(task)
+
+
+def test_render_stages_write_every_size_and_complete_the_entry(tmp_path):
+    stages = make_render_stages(tmp_path)
+
+    run_render_stages(stages, (1, "🔥", "fire", str(TEST_FONT_PATH)))
+
+    (manifest_entry,) = stages.get_manifest_entries()
+    assert manifest_entry["status"] == "completed"
+    assert [record["path"] for record in manifest_entry["files"]] == ["emojis/icons_fire/emoji_16x16.png", "emojis/icons_fire/emoji_32x32.png"]
+    assert all((tmp_path / record["path"]).stat().st_size == record["bytes"] for record in manifest_entry["files"])
+    assert stages.files_per_format == {"png": 2}
+    assert stages.completed_count == 1
+    assert stages.metrics.get_value("utp_icons", result="rendered") == 2
+
+
+def test_render_stages_reuse_verified_outputs_without_rendering(tmp_path):
+    record = {"path": "emojis/icons_fire/emoji_16x16.png", "emoji": "🔥", "font": str(TEST_FONT_PATH), "size": 16, "format": "png"}
+    stages = make_render_stages(tmp_path, verified_outputs={record["path"]: record})
+
+    tasks = stages.plan_entry((1, "🔥", "fire", str(TEST_FONT_PATH)))
+
+    assert [task["size"] for task in tasks] == [32]
+    assert stages.get_manifest_entries()[0]["files"] == [record]
+
+
+def test_render_stages_abort_when_memory_stays_over_the_limit(tmp_path):
+    stages = make_render_stages(tmp_path, memory_probe=lambda: 10_000.0)
+    task, _ = stages.plan_entry((1, "🔥", "fire", str(TEST_FONT_PATH)))
+    (task,) = stages.resize_task(stages.rasterize_task(task)[0])
+
+    # Every degradation step is taken before the abort.
+    for _ in range(3):
+        stages.encode_task(dict(task))
+    with pytest.raises(MemoryLimitExceeded):
+        stages.encode_task(dict(task))
+    assert stages.memory_governor.steps == ["evict_caches", "reduce_supersampling", "reduce_supersampling"]
+
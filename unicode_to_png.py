@@ -23,38 +23,97 @@ for web and extension projects.
 """
 
 import sys
-import platform
 import os
+import atexit
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import argparse
 import textwrap
+import time
 
 from unicode_to_png import (
+    BADGE_POSITIONS,
+    CONTAINER_FORMATS,
+    DEFAULT_BADGE_POSITION,
+    DEFAULT_CANVAS_LIMIT_MB,
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_IMAGE_FORMAT,
+    DEFAULT_MARGIN_RATIO,
+    DEFAULT_QUEUE_SIZE,
+    DEFAULT_LAYOUT_ENGINE,
+    DEFAULT_LOCK_TIMEOUT,
+    DEFAULT_RESAMPLE_MODE,
+    DEFAULT_SIZE_PROFILE,
+    IMAGE_FORMATS,
+    MAX_SCALE_FACTOR,
+    PIPELINE_STAGES,
+    FileLock,
+    FolderLocks,
+    LAYOUT_ENGINES,
+    RESAMPLE_MODES,
+    SIZE_PROFILES,
+    VARIANTS,
+    MemoryGovernor,
+    MemoryLimitExceeded,
+    MetricsFileWriter,
+    OutputInventory,
+    Pipeline,
+    PipelineStage,
+    ProgressLine,
+    RenderStages,
+    RenderWatchdog,
+    RunLog,
+    build_manifest,
     classify_unicode_structure,
     configure_console_output,
     console_message,
-    get_adjusted_margin,
-    get_adjusted_position,
+    create_run_metrics,
+    filter_catalog,
+    find_shard_manifests,
+    format_codepoints,
+    format_pipeline_stats,
+    get_badge_variant,
+    get_container_sizes,
+    get_default_font_paths,
+    get_font_coverage,
+    get_lock_path,
+    get_manifest_relative_path,
+    get_peak_rss_bytes,
+    get_scale_factor,
+    get_sequence_limit_issue,
     is_emoji,
+    load_emoji_catalog,
+    load_journal,
+    load_manifest,
     log,
+    merge_shard_manifests,
+    open_journal,
+    parse_badges,
     parse_batch,
+    parse_format_list,
+    parse_shard,
+    parse_sizes,
+    parse_stage_workers,
+    has_raqm,
+    plan_icon,
+    prepare_journal_path,
     prepare_log_path,
+    prepare_manifest_path,
+    read_catalog_version,
     read_version,
     safe_print,
     sanitize_folder_name,
-    write_log_if_needed,
+    select_font_for_emoji,
+    select_shard,
+    supports_image_format,
+    verify_journal_records,
+    write_manifest,
 )
 
 # Enforce the minimum supported Python version before running the CLI.
 if sys.version_info < (3, 10):
     sys.exit("[utp] - ERROR - Python 3.10 or higher is required.")
 
-Image = None
-ImageDraw = None
-ImageFont = None
-UnidentifiedImageError = None
-PIL = None
-
 # psutil is optional and only required for memory limit enforcement.
 HAS_PSUTIL = False
 try:
@@ -63,19 +122,15 @@ try:
 except ImportError:
     pass
 
-ICON_SIZES = (16, 19, 32, 38, 48, 128)
-SCALE_FACTOR = 4
-DEFAULT_MARGIN_RATIO = 0.25
+ICON_SIZES = SIZE_PROFILES[DEFAULT_SIZE_PROFILE]
+SCALE_FACTOR = MAX_SCALE_FACTOR
 DEFAULT_MEMORY_LIMIT_MB = 500
+PLAN_FORMATS = ("table", "json")
+
 
 def ensure_runtime_dependencies():
     """Ensure runtime dependencies are installed without modifying the environment."""
-    global Image, ImageDraw, ImageFont, UnidentifiedImageError, PIL
     try:
-        from PIL import Image as PilImage
-        from PIL import ImageDraw as PilImageDraw
-        from PIL import ImageFont as PilImageFont
-        from PIL import UnidentifiedImageError as PilUnidentifiedImageError
         import PIL as PilModule
     except ImportError:
         safe_print(console_message("ERROR", "Pillow is required but is not installed."))
@@ -87,22 +142,34 @@ def ensure_runtime_dependencies():
         safe_print(console_message("ERROR", f"Pillow 12.2.0 or higher is required. Current version: {PilModule.__version__}"))
         return False
 
-    Image = PilImage
-    ImageDraw = PilImageDraw
-    ImageFont = PilImageFont
-    UnidentifiedImageError = PilUnidentifiedImageError
-    PIL = PilModule
     return True
 
 # Configure CLI argument parsing.
 HELP_EPILOG = """
 Usage rules:
-  - Provide either --emoji or --batch.
+  - Provide --emoji, --batch, or --all.
   - Provide --folder for every generation run.
-  - When --emoji and --batch are both provided, --batch is used and --emoji is ignored.
+  - When --emoji and --batch are both provided, --batch is used and --emoji is ignored. --all takes precedence over both.
+  - Use --all to render every RGI emoji of the bundled catalog, optionally filtered with --group and --max-emoji-version.
   - Use --filename-prefix or --filename-prefix-from-folder to customize output file names.
+  - Repeat --font to build an ordered font fallback chain. Each emoji uses the first font that covers all of its codepoints.
+  - Use --sizes with pixel values and/or profiles (chrome, store, pwa, android). Default: chrome.
+  - Use --layout-engine basic|raqm|auto to choose the text layout engine. auto shapes only multi-codepoint emoji with raqm.
+  - Use --format png,webp to encode every size in one or more image formats. Default: png.
+  - Use --containers ico,icns to also write one multi-resolution icon file per output folder.
+  - Use --variants grayscale,disabled,mono to also write state variants of every size from the same resized image.
+  - Use --badges 1-99,dot:green to composite count and status badges onto copies of every size without rendering again.
+  - Use --workers rasterize=4,encode=2 and --queue-size to tune the generation pipeline. --pipeline-stats prints per-stage queue depth.
+  - Use --render-timeout to cancel emoji whose renders exceed a time budget. They are reported as timed out and the run continues.
+  - Use --progress to replace the per-icon console lines with one progress line. Warnings and errors are still printed.
+  - Use --metrics-file to write OpenMetrics counters and render latency histograms for a textfile collector.
+  - Use --plan to preview font sizes, positions, crop boxes, and layout issues for every size without rendering.
+  - Use --shard i/N to render only shard i of N of the batch. Every node computes the same assignment.
+  - Use --resume to skip outputs recorded in the checkpoint journal of an interrupted run with the same options.
+  - Several runs can share the emojis/ root. Each output folder is locked while it is written; --lock-timeout sets the wait.
+  - Use --merge-shards with --folder to combine the per-shard manifests and logs into one report.
   - The CLI never asks for keyboard input. Missing required values return an error.
-  - Windows is required for supported color emoji rendering.
+  - Windows uses Segoe UI Emoji by default. On Linux and macOS, pass --font when no platform emoji font is installed.
 
 Examples:
   Basic:
@@ -112,11 +179,16 @@ Examples:
     python unicode_to_png.py --batch "<emoji>:fire,<emoji>:game" --folder browser_icons --filename-prefix-from-folder
 
   Advanced:
-    python unicode_to_png.py --batch "<emoji>:developer,<emoji>:firefighter" --folder heroes --filename-prefix hero --quiet --autofixmargin
+    python unicode_to_png.py --batch "<emoji>:developer,<emoji>:firefighter" --folder heroes --filename-prefix hero --quiet --edgecheck
 
 Output:
-  - PNG icons are written to emojis/<folder>/<prefix>_<size>x<size>.png.
-  - Runtime logs are written to log/YYYYMMDD_<folder>.log when warnings, errors, or operational events are recorded.
+  - PNG icons are written to emojis/<folder>/<prefix>_<size>x<size>.png (.webp with --format webp).
+  - Icon containers are written to emojis/<folder>/<prefix>.ico and <prefix>.icns when requested.
+  - The run log is written to log/YYYYMMDD_<folder>.log (log/YYYYMMDD_<folder>_shard<i>of<N>.log for sharded runs).
+  - With --per-alias-logs, each batch entry also writes log/YYYYMMDD_<folder>_<alias>.log.
+  - Every run records completed outputs in the checkpoint journal manifest/<folder>.journal.
+  - Every run writes manifest/<folder>.json with the path, byte size, SHA-256, and render parameters of each output.
+  - Sharded runs write manifest/<folder>_shard<i>of<N>.json instead. --merge-shards combines them into manifest/<folder>.json.
 
 More examples:
   python unicode_to_png.py --examples
@@ -138,7 +210,18 @@ Medium batch generation:
 
 Automation with quiet console:
   python unicode_to_png.py --batch "<emoji>:package,<emoji>:rocket" --folder release_assets --quiet
-  Console output is suppressed. Runtime events are still written to log files when collected.
+  Console output is suppressed. Runtime events are still written to the run log.
+
+Large batch with a progress line:
+  python unicode_to_png.py --all --folder catalog --font NotoColorEmoji.ttf --progress
+  Output: [utp] - PROGRESS - 750/3773 emoji (19%), 18.2 emoji/s, ETA 0:02:46
+  The line is redrawn at most every 100 ms. Warnings and errors are printed above it, and every event is still written to the run log.
+
+Run log and per-alias logs:
+  python unicode_to_png.py --batch "<emoji>:package,<emoji>:rocket" --folder release_assets --per-alias-logs --background-log
+  Output: log/YYYYMMDD_release_assets.log with every event tagged by alias, plus
+  log/YYYYMMDD_release_assets_package.log and log/YYYYMMDD_release_assets_rocket.log.
+  --background-log writes the run log from a background thread.
 
 Manual margin control:
   python unicode_to_png.py --emoji "<emoji>" --folder centered_icon --margin 0.2
@@ -155,12 +238,95 @@ Folder-based filename prefix:
     emojis/browser_icons_game/browser_icons_game_*.png
 
 Automatic edge correction:
-  python unicode_to_png.py --emoji "<emoji>" --folder astronaut --autofixmargin
-  Enables edge detection and retries rendering with increased margin when needed.
+  python unicode_to_png.py --emoji "<emoji>" --folder astronaut --edgecheck
+  Crops are computed from the rendered ink, so the margin is exact and the emoji never touches the edges.
+  --edgecheck verifies the final icons. --autofixmargin is kept for compatibility and enables the same check.
+
+Custom icon sizes and profiles:
+  python unicode_to_png.py --emoji "<emoji>" --folder store_icon --sizes store,48
+  Output: emojis/store_icon/emoji_48x48.png, emoji_256x256.png, emoji_512x512.png, emoji_1024x1024.png
+  Large sizes use a lower supersampling factor so each canvas stays under --canvas-limit MB.
+  Add --resample reduce to box-reduce large canvases before the Lanczos pass, about twice as fast for store sizes.
+
+Text layout engine:
+  python unicode_to_png.py --batch "<emoji>:thumbs,<emoji>:coder" --folder team --layout-engine raqm
+  raqm shapes skin tones, ZWJ sequences, and flags into one glyph and requires Pillow with libraqm.
+  The default, auto, uses raqm for multi-codepoint emoji and the faster basic layout for single codepoints.
+
+PNG and lossless WebP from the same render:
+  python unicode_to_png.py --batch "<emoji>:fire,<emoji>:game" --folder dashboard --format png,webp --parallel-encode
+  Output: emojis/dashboard_fire/emoji_16x16.png, emoji_16x16.webp, ... The run summary reports bytes per format.
+
+Pipeline concurrency for large batches:
+  python unicode_to_png.py --batch "<emoji>:fire,<emoji>:game,<emoji>:idea" --folder catalog --sizes store --workers rasterize=4,encode=2 --queue-size 8 --pipeline-stats
+  Stages plan, rasterize, resize, encode, and write are connected by queues of at most --queue-size items.
+  The statistics table shows busy time and queue depth per stage and marks the bottleneck.
+
+OpenMetrics for build dashboards:
+  python unicode_to_png.py --batch "<emoji>:fire,<emoji>:game" --folder dashboard --metrics-file /var/lib/node_exporter/textfile/utp.prom --metrics-interval 15
+  The file is replaced atomically every 15 seconds and once more at the end of the run.
+  It lists icons rendered, skipped, and failed, render latency per size and structure, fit attempts, peak RSS, and bytes written.
+
+Inactive and disabled state variants:
+  python unicode_to_png.py --emoji "<emoji>" --folder toolbar --variants grayscale,disabled,mono
+  Output: emojis/toolbar/emoji_16x16.png, emoji_16x16_grayscale.png, emoji_16x16_disabled.png, emoji_16x16_mono.png, ...
+  Variants are derived from the resized icon with band operations. Nothing is rasterized again.
+
+Count and status badge families:
+  python unicode_to_png.py --emoji "<emoji>" --folder inbox --sizes 16,32 --badges 1-99,dot:green --badge-position top-right
+  Output: emojis/inbox/emoji_16x16.png, emoji_16x16_badge-1.png, ..., emoji_16x16_badge-99.png, emoji_16x16_badge-dot-green.png, ...
+  The emoji is rendered once per size. Each badge is drawn once per size and composited onto copies.
+
+Offline repository of the whole emoji catalog:
+  python unicode_to_png.py --all --folder catalog --font NotoColorEmoji.ttf --chunk-size 250
+  python unicode_to_png.py --all --group smileys_emotion,animals_nature --max-emoji-version 13.0 --folder catalog --resume
+  Aliases come from the Unicode names, for example catalog_grinning_face. Progress is reported after every chunk,
+  and the run manifest is checkpointed. After an interruption, --resume skips every output the journal already records.
+
+Windows and macOS icon containers:
+  python unicode_to_png.py --emoji "<emoji>" --folder app_icon --containers ico,icns
+  Output: emojis/app_icon/emoji_*.png, emoji.ico, and emoji.icns built from the same in-memory renders.
+
+Font fallback chain:
+  python unicode_to_png.py --batch "<emoji>:fire,<emoji>:flag" --folder mixed --font C:/Fonts/primary.ttf --font C:/Windows/Fonts/seguiemj.ttf
+  Font coverage is checked for the whole batch before rendering starts.
+
+Headless Linux or container rendering:
+  python unicode_to_png.py --batch "<emoji>:fire,<emoji>:game" --folder build_icons --font /usr/share/fonts/truetype/noto/NotoColorEmoji.ttf --quiet
+  Renders with the supplied color emoji font. Windows is not required.
+
+Layout plan before a large render:
+  python unicode_to_png.py --batch "<emoji>:fire,<emoji>:game" --folder catalog --sizes chrome,store --plan
+  python unicode_to_png.py --batch "<emoji>:fire,<emoji>:game" --folder catalog --plan json
+  Prints a table, or writes manifest/catalog.plan.json, with the planned font size, position, margin,
+  and crop box of every entry and size. Issues such as does_not_fit or glyph_clipped are listed.
+  Nothing is rasterized or saved.
+
+Sharding a large batch across build nodes:
+  python unicode_to_png.py --batch "<emoji>:fire,<emoji>:game,<emoji>:idea" --folder catalog --shard 1/2
+  python unicode_to_png.py --batch "<emoji>:fire,<emoji>:game,<emoji>:idea" --folder catalog --shard 2/2
+  python unicode_to_png.py --folder catalog --merge-shards
+  Each node renders its share and writes manifest/catalog_shard<i>of2.json. Copy the emojis/, log/,
+  and manifest/ folders of every node into one checkout, then merge into manifest/catalog.json and
+  log/YYYYMMDD_catalog_merged.log.
+
+Concurrent runs on one output root:
+  python unicode_to_png.py --batch "<emoji>:fire,<emoji>:game" --folder team_a --lock-timeout 30
+  python unicode_to_png.py --batch "<emoji>:fire,<emoji>:idea" --folder team_b --lock-timeout 30
+  Both runs render in parallel. Output folders are locked in emojis/.locks/ while they are written, and a
+  second run with the same --folder waits for the first, then exits with an error.
+  Batch aliases that collide after sanitization, such as Fire and fire, are renamed to fire_2 before rendering.
+
+Resuming an interrupted batch:
+  python unicode_to_png.py --batch "<emoji>:fire,<emoji>:game,<emoji>:idea" --folder catalog --resume
+  Outputs recorded in manifest/catalog.journal are verified by SHA-256 and kept. Missing or changed
+  files and unfinished entries are rendered again. Repeat the options of the interrupted run.
 
 Memory monitoring:
   python unicode_to_png.py --batch "<emoji>:brain,<emoji>:science" --folder edu_pack --memlimit 500
   Requires psutil. If psutil is missing, the CLI logs a warning and continues without memory monitoring.
+  Near the limit, the run clears caches, then rasterizes one size at a time, then lowers supersampling.
+  It aborts only when the limit is still exceeded after every step.
 
 Mixed input rule:
   python unicode_to_png.py --emoji "<emoji>" --batch "<emoji>:fire" --folder icons
@@ -168,7 +334,7 @@ Mixed input rule:
 
 Invalid usage examples:
   python unicode_to_png.py
-  Error: No emoji input was provided. Use --emoji or --batch.
+  Error: No emoji input was provided. Use --emoji, --batch, or --all.
 
   python unicode_to_png.py --emoji "<emoji>"
   Error: No output folder name was provided. Use --folder.
@@ -191,11 +357,41 @@ def parse_args():
     parser.add_argument("--emoji", type=str, help="Emoji to generate.", required=False)
     parser.add_argument("--folder", type=str, help="Folder name to save icons", required=False)
     parser.add_argument("--batch", type=str, help="Comma-separated list of emojis to process", required=False)
+    parser.add_argument("--all", action="store_true", help="Render every RGI emoji of the bundled Unicode catalog. Aliases come from the emoji names.")
+    parser.add_argument("--group", type=str, help="With --all, comma-separated catalog groups or subgroups to keep, for example smileys_emotion,flag.", required=False)
+    parser.add_argument("--max-emoji-version", type=str, help="With --all, keep emoji introduced up to this emoji version, for example 13.0.", required=False)
+    parser.add_argument("--chunk-size", type=int, help=f"Entries per progress and checkpoint chunk (default with --all: {DEFAULT_CHUNK_SIZE}).", required=False)
     parser.add_argument("--quiet", action="store_true", help="Suppress console output")
-    parser.add_argument("--memlimit", type=int, help="Maximum memory usage (in MB) before aborting", required=False)
+    parser.add_argument("--progress", action="store_true", help="Show one progress line with done/total, emoji/s, and ETA instead of per-icon console lines. Warnings and errors are still printed.")
+    parser.add_argument("--render-timeout", type=float, help="Render time budget per emoji in seconds. Renders run in worker processes and are cancelled when the budget is exceeded.", required=False)
+    parser.add_argument("--memlimit", type=int, help="Memory limit in MB. Near it the run degrades step by step, and aborts only when every step is used", required=False)
+    parser.add_argument("--lock-timeout", type=float, help=f"Seconds to wait for an output folder or run lock held by another process (default: {DEFAULT_LOCK_TIMEOUT:g}).", required=False)
     parser.add_argument("--margin", type=float, help="Extra margin ratio (0.0 - 1.0) to prevent emoji clipping (default: 0.25)", required=False)
     parser.add_argument("--edgecheck", action="store_true", help="Enable visual edge test to detect emoji touching final image borders.")
-    parser.add_argument("--autofixmargin", action="store_true", help="Enable edge check and re-render with increased margin if the emoji touches an edge.")
+    parser.add_argument("--autofixmargin", action="store_true", help="Kept for compatibility. Crops are computed from the rendered ink, so no retry is needed; enables --edgecheck.")
+    parser.add_argument("--font", type=str, action="append", help="Emoji font file. Repeat to build an ordered fallback chain (default: platform emoji font, e.g. Segoe UI Emoji on Windows or Noto Color Emoji on Linux).", required=False)
+    parser.add_argument("--sizes", type=str, help=f"Comma-separated icon sizes and/or size profiles ({', '.join(SIZE_PROFILES)}). Default: {DEFAULT_SIZE_PROFILE}.", required=False)
+    parser.add_argument("--canvas-limit", type=int, help=f"Maximum supersampling canvas memory per size in MB (default: {DEFAULT_CANVAS_LIMIT_MB})", required=False)
+    parser.add_argument("--resample", choices=RESAMPLE_MODES, default=DEFAULT_RESAMPLE_MODE, help=f"Downscaling mode: lanczos, or reduce to box-reduce large canvases before Lanczos (default: {DEFAULT_RESAMPLE_MODE})")
+    parser.add_argument("--layout-engine", choices=LAYOUT_ENGINES, default=DEFAULT_LAYOUT_ENGINE, help=f"Text layout engine: basic, raqm for complex shaping, or auto to use raqm only for multi-codepoint sequences (default: {DEFAULT_LAYOUT_ENGINE})")
+    parser.add_argument("--format", type=str, help=f"Comma-separated output image formats ({', '.join(IMAGE_FORMATS)}). Default: {DEFAULT_IMAGE_FORMAT}.", required=False)
+    parser.add_argument("--parallel-encode", action="store_true", help="Encode the requested image formats of each size in parallel threads.")
+    parser.add_argument("--workers", type=str, help=f"Comma-separated worker threads per pipeline stage ({', '.join(PIPELINE_STAGES)}), for example rasterize=2,encode=2. Default: 1 per stage.", required=False)
+    parser.add_argument("--queue-size", type=int, help=f"Maximum items waiting in front of each pipeline stage (default: {DEFAULT_QUEUE_SIZE})", required=False)
+    parser.add_argument("--pipeline-stats", action="store_true", help="Print per-stage pipeline throughput and queue depth after the run.")
+    parser.add_argument("--metrics-file", type=str, help="Write OpenMetrics counters and histograms of the run to this file, for example a Prometheus textfile collector .prom file.", required=False)
+    parser.add_argument("--metrics-interval", type=float, help="Also rewrite --metrics-file every N seconds during the run (default: only at the end).", required=False)
+    parser.add_argument("--variants", type=str, help=f"Comma-separated state variants to write next to every size ({', '.join(VARIANTS)}).", required=False)
+    parser.add_argument("--badges", type=str, help="Comma-separated badges to composite onto every size: counts (7), count ranges (1-99), or status dots (dot, dot:green).", required=False)
+    parser.add_argument("--badge-position", choices=BADGE_POSITIONS, default=DEFAULT_BADGE_POSITION, help=f"Icon corner that holds the badge (default: {DEFAULT_BADGE_POSITION})")
+    parser.add_argument("--badge-font", type=str, help="Font file for badge numerals (default: Pillow built-in font).", required=False)
+    parser.add_argument("--containers", type=str, help=f"Comma-separated multi-resolution icon containers to write ({', '.join(CONTAINER_FORMATS)}).", required=False)
+    parser.add_argument("--plan", nargs="?", const="table", choices=PLAN_FORMATS, help="Plan the layout of every entry and size without rendering, then exit. Prints a table (default) or writes a JSON plan file.")
+    parser.add_argument("--shard", type=str, help="Render only shard i of N of the batch, for example 2/4. Entries are assigned by a stable hash.", required=False)
+    parser.add_argument("--per-alias-logs", action="store_true", help="Also write one log file per batch entry next to the run log.")
+    parser.add_argument("--background-log", action="store_true", help="Write the run log from a background thread.")
+    parser.add_argument("--resume", action="store_true", help="Skip outputs recorded in the checkpoint journal of a previous run with the same options after verifying their hashes.")
+    parser.add_argument("--merge-shards", action="store_true", help="Combine the per-shard manifests and logs of --folder into one report and exit.")
     parser.add_argument("--filename-prefix", type=str, help="Custom output filename prefix. Default: emoji.", required=False)
     parser.add_argument("--filename-prefix-from-folder", action="store_true", help="Use the sanitized output folder name as the output filename prefix.")
     parser.add_argument("--examples", action="store_true", help="Show detailed CLI examples and exit.")
@@ -212,89 +408,172 @@ def get_memory_usage_mb():
     except Exception:
         return None
 
-# Load the Segoe UI Emoji font or fall back to the default font.
-def load_font(size, quiet=False):
-    font_path = "C:/Windows/Fonts/seguiemj.ttf"
-    if os.path.exists(font_path):
+def run_layout_plan(emoji_pairs, emoji_fonts, render_sizes, margin_ratio, canvas_limit_mb, plan_format, plan_path, quiet_mode, layout_engine=DEFAULT_LAYOUT_ENGINE):
+    """
+    Plan every entry and size without rasterizing, then print a table or write a JSON plan.
+
+    Args:
+        emoji_pairs (list): Emoji and alias pairs to plan.
+        emoji_fonts (list): Font routed to each pair.
+        render_sizes (tuple): Sizes that a real run would render.
+        margin_ratio (float): Base margin ratio.
+        canvas_limit_mb (int): Supersampling canvas limit per size.
+        plan_format (str): "table" or "json".
+        plan_path (str): JSON plan file path.
+        quiet_mode (bool): Suppress informational console output.
+        layout_engine (str): Text layout engine from LAYOUT_ENGINES.
+
+    Returns:
+        int: Process exit code.
+    """
+    started = time.perf_counter()
+    plan_log = []
+    planned = []
+    for (emoji, alias), emoji_font_path in zip(emoji_pairs, emoji_fonts):
         try:
-            return ImageFont.truetype(font_path, size)
-        except OSError as e:
-            if not quiet:
-                safe_print(console_message("WARNING", f"Segoe UI Emoji could not be loaded. Reason: {e}"))
-        except UnidentifiedImageError as e:
-            if not quiet:
-                safe_print(console_message("WARNING", f"Segoe UI Emoji font format was not recognized. Reason: {e}"))
-    if not quiet:
-        safe_print(console_message("WARNING", "Emoji font was not found or could not be loaded. Default font will be used."))
-    return ImageFont.load_default()
-    
-# Detect if emoji rendering touches the right or bottom edge of the final PNG.
-def check_visual_edges(image, size_label, log_entries, quiet):
+            structure_type = classify_unicode_structure(emoji)
+        except Exception:
+            structure_type = "COMPLEX"
+        for size in render_sizes:
+            scale_factor = get_scale_factor(size, SCALE_FACTOR, canvas_limit_mb)
+            plan = plan_icon(emoji, size, scale_factor, structure_type, margin_ratio, plan_log, True, emoji_font_path, layout_engine)
+            planned.append({"emoji": emoji, "alias": alias, "structure": structure_type, **plan})
+    elapsed = time.perf_counter() - started
+
+    issue_counts = {}
+    for plan in planned:
+        for issue in plan["issues"]:
+            issue_counts[issue] = issue_counts.get(issue, 0) + 1
+
+    if plan_format == "json":
+        document = {
+            "generated_at": datetime.now().isoformat(timespec="seconds"),
+            "tool_version": read_version(),
+            "margin_ratio": margin_ratio,
+            "sizes": list(render_sizes),
+            "issue_counts": issue_counts,
+            "entries": planned,
+        }
+        if not plan_path or not write_manifest(document, plan_path):
+            safe_print(console_message("ERROR", "Layout plan file could not be written."))
+            return 1
+        if not quiet_mode:
+            safe_print(console_message("INFO", f"Layout plan written: {plan_path}."))
+    else:
+        safe_print(f"{'alias':<16} {'size':>5} {'scale':>5} {'font_px':>7} {'structure':<21} {'position':>11} {'crop_box':>21} {'glyph':>9} {'margin':>6}  issues")
+        for plan in planned:
+            position = "-" if plan["position"] is None else f"{plan['position'][0]},{plan['position'][1]}"
+            crop_box = "-" if plan["crop_box"] is None else ",".join(str(value) for value in plan["crop_box"])
+            glyph = "-" if plan["glyph_size"] is None else f"{plan['glyph_size'][0]}x{plan['glyph_size'][1]}"
+            output_margin = "-" if plan["output_margin"] is None else plan["output_margin"]
+            safe_print(
+                f"{plan['alias']:<16} {plan['size']:>5} {plan['scale_factor']:>5} {plan['font_size'] or '-':>7} {plan['structure']:<21}"
+                f" {position:>11} {crop_box:>21} {glyph:>9} {output_margin:>6}  {', '.join(plan['issues']) or '-'}"
+            )
+
+    if not quiet_mode:
+        issue_summary = ", ".join(f"{issue}={count}" for issue, count in sorted(issue_counts.items())) or "none"
+        safe_print(console_message("INFO", f"Planned {len(emoji_pairs)} entries at {len(render_sizes)} size(s) in {elapsed:.2f}s without rendering. Issues: {issue_summary}."))
+    return 0
+
+def merge_shard_reports(folder_base, base_path, quiet_mode):
     """
-    Checks if any opaque pixel touches the right or bottom edge of the image.
-    Logs a warning if detected.
+    Combine the per-shard manifests and logs of an output folder into one report.
 
     Args:
-        image (PIL.Image): Final resized emoji image
-        size_label (int): Output size label (e.g. 128)
-        log_entries (list): Log collector
-        quiet (bool): Suppress console output
+        folder_base (str): Sanitized output folder base name.
+        base_path (str): Project base directory holding the manifest and log folders.
+        quiet_mode (bool): Suppress informational console output.
+
+    Returns:
+        int: Process exit code.
     """
-    try:
-        pixels = image.load()
-        width, height = image.size
-
-        touches_right = any(pixels[width - 1, y][3] != 0 for y in range(height))
-        touches_bottom = any(pixels[x, height - 1][3] != 0 for x in range(width))
-
-        if touches_right or touches_bottom:
-            edge_info = []
-            if touches_right:
-                edge_info.append("right")
-            if touches_bottom:
-                edge_info.append("bottom")
-            log(f"Emoji touches {', '.join(edge_info)} edge(s) at {size_label}x{size_label}.", log_entries, quiet=quiet, level="WARNING")
-            return True
-    except Exception as edge_check_error:
-        log(f"Visual edge test failed for {size_label}x{size_label}.", log_entries, quiet=quiet, level="WARNING", detail=str(edge_check_error))
-    return False
-
-
-def render_with_margin_and_test(img, temp_size, bbox, size, margin_px, enable_check, log_entries, quiet, x, y):
-    """Crop, resize, and optionally test rendered output for right/bottom edge contact."""
-    crop_left = max(x - margin_px, 0)
-    crop_top = max(y - margin_px, 0)
-    crop_right = min(x + (bbox[2] - bbox[0]) + margin_px, temp_size)
-    crop_bottom = min(y + (bbox[3] - bbox[1]) + margin_px, temp_size)
-
-    cropped = img.crop((crop_left, crop_top, crop_right, crop_bottom))
-    resized = cropped.resize((size, size), Image.LANCZOS)
-
-    touches_edge = False
-    if enable_check:
-        touches_edge = check_visual_edges(resized, size, log_entries, quiet)
-
-    return resized, touches_edge
-
-def iter_image_pixels(image):
-    """Return an iterator over image pixels while supporting newer Pillow APIs."""
-    if hasattr(image, "get_flattened_data"):
-        return image.get_flattened_data()
-    return image.getdata()
+    found_manifests = find_shard_manifests(base_path, folder_base)
+    if not found_manifests:
+        safe_print(console_message("ERROR", f"No shard manifests were found for folder '{folder_base}'. Run with --shard i/N first."))
+        return 1
+
+    shard_counts = sorted({count for _, count, _ in found_manifests})
+    if len(shard_counts) > 1:
+        safe_print(console_message("ERROR", f"Shard manifests for different shard counts ({', '.join(str(count) for count in shard_counts)}) were found for folder '{folder_base}'. Remove stale manifests and merge again."))
+        return 1
+
+    merge_warnings = []
+    shard_manifests = []
+    for shard_index, shard_count, manifest_path in found_manifests:
+        manifest = load_manifest(manifest_path)
+        if manifest is None:
+            merge_warnings.append(f"Shard manifest could not be read and will be skipped: {get_manifest_relative_path(manifest_path, base_path)}.")
+            continue
+        shard_manifests.append((shard_index, shard_count, manifest))
+
+    if not shard_manifests:
+        for warning in merge_warnings:
+            safe_print(console_message("WARNING", warning))
+        safe_print(console_message("ERROR", f"No readable shard manifests were found for folder '{folder_base}'."))
+        return 1
+
+    merged, missing_warnings = merge_shard_manifests(shard_manifests)
+    merge_warnings.extend(missing_warnings)
+
+    # Concatenate the run logs and optional per-alias logs in shard order so one file covers the whole batch.
+    merged_log_lines = []
+    for shard_index, shard_count, manifest in shard_manifests:
+        shard_logs = [manifest.get("log_file")] + [entry.get("log_file") for entry in manifest.get("entries", [])]
+        for shard_log in dict.fromkeys(path for path in shard_logs if path):
+            try:
+                with open(os.path.join(base_path, shard_log), "r", encoding="utf-8") as f:
+                    shard_log_lines = f.read().splitlines()
+            except OSError:
+                merge_warnings.append(f"Log file listed by shard {shard_index}/{shard_count} was not found: {shard_log}.")
+                continue
+            merged_log_lines.append(f"===== Shard {shard_index}/{shard_count}: {shard_log} =====")
+            merged_log_lines.extend(shard_log_lines)
+
+    merged_log_file = prepare_log_path(base_path, f"{folder_base}_merged")
+    merged["log_file"] = None
+    if merged_log_lines and merged_log_file:
+        try:
+            with open(merged_log_file, "w", encoding="utf-8") as f:
+                f.write("\n".join(merged_log_lines) + "\n")
+            merged["log_file"] = get_manifest_relative_path(merged_log_file, base_path)
+        except OSError as e:
+            merge_warnings.append(f"Merged log file could not be written: {merged_log_file}. Detail: {e}")
+
+    for warning in merge_warnings:
+        safe_print(console_message("WARNING", warning))
+    merged["warnings"] = merge_warnings
+
+    manifest_path = prepare_manifest_path(base_path, folder_base)
+    if not manifest_path or not write_manifest(merged, manifest_path):
+        safe_print(console_message("ERROR", f"Merged manifest could not be written for folder '{folder_base}'."))
+        return 1
+
+    if not quiet_mode:
+        file_count = sum(shard["files"] for shard in merged["shards"])
+        safe_print(console_message("INFO", f"Merged {len(shard_manifests)} of {merged['shard_count']} shard manifest(s): {len(merged['entries'])} entries, {file_count} file(s)."))
+        safe_print(console_message("INFO", f"Merged report written: {get_manifest_relative_path(manifest_path, base_path)}."))
+    return 0
 
 def main():
     configure_console_output()
     args = parse_args()
     quiet_mode = args.quiet
     startup_warnings = []
+    started_at = datetime.now().isoformat(timespec="seconds")
+    base_path = os.path.dirname(os.path.abspath(__file__))
 
     if args.examples:
         safe_print(build_help_text(EXAMPLES_TEXT))
         sys.exit(0)
 
-    if platform.system() != "Windows":
-        safe_print(console_message("ERROR", "This script requires Windows for supported color emoji rendering."))
-        sys.exit(1)
+    # Merging shard reports only reads manifests and logs, so it runs before any render setup.
+    if args.merge_shards:
+        merge_folder = sanitize_folder_name(args.folder.strip()) if args.folder else ""
+        if not merge_folder:
+            safe_print(console_message("ERROR", "No output folder name was provided. Use --folder with --merge-shards."))
+            sys.exit(1)
+        sys.exit(merge_shard_reports(merge_folder, base_path, quiet_mode))
 
     if not ensure_runtime_dependencies():
         sys.exit(1)
@@ -330,14 +609,28 @@ def main():
                 safe_print(console_message("INFO", "Install psutil to enable --memlimit: pip install psutil"))
 
     # Determine emoji + alias pairs from explicit CLI arguments only.
-    if args.batch:
+    if args.all:
+        if args.batch or args.emoji:
+            startup_warnings.append("--emoji and --batch were ignored because --all was provided.")
+        try:
+            catalog = load_emoji_catalog()
+        except (OSError, ValueError) as catalog_error:
+            safe_print(console_message("ERROR", f"The bundled emoji catalog could not be read. Detail: {catalog_error}"))
+            sys.exit(1)
+        catalog, catalog_warnings = filter_catalog(catalog, args.group, args.max_emoji_version)
+        startup_warnings.extend(catalog_warnings)
+        # Catalog entries are RGI sequences by definition, including flags and ZWJ sequences that --batch rejects.
+        emoji_pairs = [(entry["emoji"], entry["alias"]) for entry in catalog]
+        if not quiet_mode:
+            safe_print(console_message("INFO", f"Emoji catalog {read_catalog_version()} selected {len(emoji_pairs)} entries."))
+    elif args.batch:
         if args.emoji:
             startup_warnings.append("--emoji was ignored because --batch was provided.")
         emoji_pairs, batch_warnings = parse_batch(args.batch)
         startup_warnings.extend(batch_warnings)
     else:
         if not args.emoji:
-            safe_print(console_message("ERROR", "No emoji input was provided. Use --emoji or --batch."))
+            safe_print(console_message("ERROR", "No emoji input was provided. Use --emoji, --batch, or --all."))
             sys.exit(1)
 
         emoji_input = args.emoji.strip()
@@ -347,8 +640,19 @@ def main():
             safe_print(console_message("ERROR", f"Invalid emoji input: '{emoji_input}'."))
             sys.exit(1)
 
+        limit_issue = get_sequence_limit_issue(emoji_input)
+        if limit_issue:
+            safe_print(console_message("ERROR", f"Invalid emoji input: the emoji {limit_issue}."))
+            sys.exit(1)
+
         emoji_pairs = [(emoji_input, "single")]
 
+    if args.progress and quiet_mode:
+        startup_warnings.append("--progress has no effect with --quiet.")
+
+    if not args.all and (args.group or args.max_emoji_version):
+        startup_warnings.append("--group and --max-emoji-version have no effect without --all.")
+
     if not emoji_pairs:
         for warning in startup_warnings:
             safe_print(console_message("WARNING", warning))
@@ -366,8 +670,100 @@ def main():
         safe_print(console_message("ERROR", "No output folder name was provided."))
         sys.exit(1)
     
+    icon_sizes = ICON_SIZES
+    if args.sizes is not None:
+        icon_sizes, size_warnings = parse_sizes(args.sizes)
+        if not icon_sizes:
+            for warning in size_warnings:
+                safe_print(console_message("WARNING", warning))
+            safe_print(console_message("ERROR", "No valid icon sizes were provided. Use --sizes with pixel values or a size profile."))
+            sys.exit(1)
+        startup_warnings.extend(size_warnings)
+
+    canvas_limit_mb = args.canvas_limit if args.canvas_limit and args.canvas_limit > 0 else DEFAULT_CANVAS_LIMIT_MB
+    if args.canvas_limit is not None and args.canvas_limit <= 0:
+        startup_warnings.append(f"Invalid canvas limit '{args.canvas_limit}' was provided. Default canvas limit {DEFAULT_CANVAS_LIMIT_MB} MB will be used.")
+
+    image_formats = (DEFAULT_IMAGE_FORMAT,)
+    if args.format is not None:
+        image_formats, format_warnings = parse_format_list(args.format, IMAGE_FORMATS, "--format")
+        if not image_formats:
+            for warning in format_warnings:
+                safe_print(console_message("WARNING", warning))
+            safe_print(console_message("ERROR", f"No valid output format was provided. Supported values: {', '.join(IMAGE_FORMATS)}."))
+            sys.exit(1)
+        startup_warnings.extend(format_warnings)
+
+    if "webp" in image_formats and not supports_image_format("webp"):
+        image_formats = tuple(image_format for image_format in image_formats if image_format != "webp")
+        if not image_formats:
+            safe_print(console_message("ERROR", "WebP output was requested, but this Pillow build does not support WebP."))
+            sys.exit(1)
+        startup_warnings.append("WebP output was skipped because this Pillow build does not support WebP.")
+
+    containers = ()
+    if args.containers is not None:
+        containers, container_warnings = parse_format_list(args.containers, CONTAINER_FORMATS, "--containers")
+        startup_warnings.extend(container_warnings)
+
+    variants = ()
+    if args.variants is not None:
+        variants, variant_warnings = parse_format_list(args.variants, VARIANTS, "--variants")
+        startup_warnings.extend(variant_warnings)
+
+    # Badges are written as extra variants of the base icon, named badge-<count> or badge-dot[-<color>].
+    badge_variants = {}
+    if args.badges is not None:
+        badges, badge_warnings = parse_badges(args.badges)
+        startup_warnings.extend(badge_warnings)
+        badge_variants = {get_badge_variant(badge): badge for badge in badges}
+    badge_font_path = args.badge_font
+    if badge_font_path and not os.path.isfile(badge_font_path):
+        startup_warnings.append(f"Badge font file was not found: {badge_font_path}. Pillow built-in font will be used.")
+        badge_font_path = None
+    output_variants = variants + tuple(badge_variants)
+
+    stage_workers = dict.fromkeys(PIPELINE_STAGES, 1)
+    if args.workers is not None:
+        stage_workers, worker_warnings = parse_stage_workers(args.workers)
+        startup_warnings.extend(worker_warnings)
+
+    queue_size = args.queue_size if args.queue_size and args.queue_size > 0 else DEFAULT_QUEUE_SIZE
+    if args.queue_size is not None and args.queue_size <= 0:
+        startup_warnings.append(f"Invalid queue size '{args.queue_size}' was provided. Default queue size {DEFAULT_QUEUE_SIZE} will be used.")
+
+    # Budgeted renders run in worker processes, because only a process can be stopped in the middle of a Pillow call.
+    render_timeout = args.render_timeout if args.render_timeout and args.render_timeout > 0 else None
+    if args.render_timeout is not None and render_timeout is None:
+        startup_warnings.append(f"Invalid render timeout '{args.render_timeout}' was ignored. Renders will run without a time budget.")
+
+    # Concurrent processes that share the output root wait this long for each other's folder and run locks.
+    lock_timeout = args.lock_timeout if args.lock_timeout is not None and args.lock_timeout >= 0 else DEFAULT_LOCK_TIMEOUT
+    if args.lock_timeout is not None and args.lock_timeout < 0:
+        startup_warnings.append(f"Invalid lock timeout '{args.lock_timeout}' was provided. Default lock timeout {DEFAULT_LOCK_TIMEOUT:g}s will be used.")
+
+    # Chunks are checkpoints: each one finishes, reports progress, and updates the run manifest before the next starts.
+    chunk_size = args.chunk_size if args.chunk_size and args.chunk_size > 0 else (DEFAULT_CHUNK_SIZE if args.all else None)
+    if args.chunk_size is not None and args.chunk_size <= 0:
+        fallback = f"Default chunk size {DEFAULT_CHUNK_SIZE} will be used." if args.all else "The batch will run as one chunk."
+        startup_warnings.append(f"Invalid chunk size '{args.chunk_size}' was provided. {fallback}")
+
+    metrics_interval = args.metrics_interval if args.metrics_interval and args.metrics_interval > 0 else 0
+    if args.metrics_interval is not None and not args.metrics_file:
+        startup_warnings.append("--metrics-interval has no effect without --metrics-file.")
+    elif args.metrics_interval is not None and args.metrics_interval <= 0:
+        startup_warnings.append(f"Invalid metrics interval '{args.metrics_interval}' was provided. Metrics will be written at the end of the run only.")
+
+    # Container-only sizes are rendered in the same loop but not written as standalone icons.
+    render_sizes = tuple(sorted(set(icon_sizes).union(*(get_container_sizes(container, icon_sizes) for container in containers))))
+
+    if args.layout_engine == "raqm" and not has_raqm():
+        startup_warnings.append("--layout-engine raqm requires Pillow with libraqm. The basic layout engine will be used.")
+
+    # Ink-bbox cropping makes the margin exact in one pass, so --autofixmargin no longer retries.
     enable_edge_check = args.edgecheck or args.autofixmargin
-    enable_autofix_margin = args.autofixmargin
+    if args.autofixmargin and not quiet_mode:
+        safe_print(console_message("INFO", "--autofixmargin no longer re-renders because crops are computed from the rendered ink. Edge check is enabled."))
 
     # Clean the base folder name.
     folder_base = sanitize_folder_name(folder_raw)
@@ -390,155 +786,299 @@ def main():
         if filename_prefix != args.filename_prefix.strip():
             startup_warnings.append(f"Filename prefix was sanitized from '{args.filename_prefix}' to '{filename_prefix}'.")
 
-    base_path = os.path.dirname(os.path.abspath(__file__))
+    # Keep only this node's share of the batch. The assignment depends on the batch alone.
+    shard = None
+    if args.shard is not None:
+        shard = parse_shard(args.shard)
+        if shard is None:
+            safe_print(console_message("ERROR", f"Invalid shard '{args.shard}'. Use --shard i/N with 1 <= i <= N."))
+            sys.exit(1)
+        batch_size = len(emoji_pairs)
+        emoji_pairs = select_shard(emoji_pairs, *shard)
+        if not quiet_mode:
+            safe_print(console_message("INFO", f"Shard {shard[0]}/{shard[1]} selected {len(emoji_pairs)} of {batch_size} batch entries."))
+
+    # Build the font fallback chain and route every emoji before rendering starts.
+    font_paths = get_default_font_paths()
+    if args.font:
+        font_paths = tuple(font_path for font_path in args.font if os.path.isfile(font_path))
+        for font_path in args.font:
+            if not os.path.isfile(font_path):
+                startup_warnings.append(f"Font file was not found and will be skipped: {font_path}.")
+        if not font_paths:
+            startup_warnings.append("No requested font file was found. Default font fallback chain will be used.")
+            font_paths = get_default_font_paths()
+
+    available_font_paths = tuple(font_path for font_path in font_paths if os.path.isfile(font_path))
+    if not available_font_paths:
+        startup_warnings.append("No emoji font was found on this system. Use --font to provide a color emoji font. Default font will be used.")
+    for font_path in available_font_paths:
+        if get_font_coverage(font_path) is None:
+            startup_warnings.append(f"Font coverage could not be read for {font_path}. The font is assumed to cover every emoji.")
+
+    emoji_fonts = []
+    for emoji, alias in emoji_pairs:
+        routed_font_path, missing_codepoints = select_font_for_emoji(emoji, available_font_paths)
+        if routed_font_path is None and available_font_paths:
+            routed_font_path = available_font_paths[0]
+            detail = format_codepoints(missing_codepoints) if missing_codepoints else "no single font covers every codepoint"
+            startup_warnings.append(f"Emoji '{alias}' is not fully covered by the font chain ({detail}). {os.path.basename(routed_font_path)} will be used and may render missing glyphs.")
+        emoji_fonts.append(routed_font_path)
+
+    # A layout plan measures every entry and size, then exits before any output, journal, or log is written.
+    if args.plan:
+        for warning in startup_warnings:
+            if not quiet_mode:
+                safe_print(console_message("WARNING", warning))
+        plan_path = prepare_manifest_path(base_path, f"{folder_base}.plan", shard) if args.plan == "json" else None
+        sys.exit(run_layout_plan(emoji_pairs, emoji_fonts, render_sizes, margin_ratio, canvas_limit_mb, args.plan, plan_path, quiet_mode, args.layout_engine))
+
+    # Describe the render so a resumed run only reuses outputs made with the same options.
+    render_parameters = {
+        "version": read_version(),
+        "sizes": list(icon_sizes),
+        "formats": list(image_formats),
+        "containers": list(containers),
+        "variants": list(variants),
+        "badges": list(badge_variants),
+        "badge_position": args.badge_position if badge_variants else None,
+        "margin_ratio": margin_ratio,
+        "edge_check": enable_edge_check,
+        "resample": args.resample,
+        "layout_engine": args.layout_engine,
+        "canvas_limit_mb": canvas_limit_mb,
+        "fonts": list(available_font_paths),
+        "filename_prefix": filename_prefix,
+        "filename_prefix_from_folder": args.filename_prefix_from_folder,
+    }
+
+    # Two runs with the same --folder and shard would write the same journal, run manifest, and run log.
     emojis_root = os.path.join(base_path, "emojis")
+    run_log_name = f"{folder_base}_shard{shard[0]}of{shard[1]}" if shard else folder_base
+    run_lock = FileLock(get_lock_path(emojis_root, f"{run_log_name}.run"))
+    try:
+        run_locked = run_lock.acquire(lock_timeout)
+    except OSError as lock_error:
+        run_locked = True
+        startup_warnings.append(f"Run lock could not be created. Concurrent runs with the same --folder are not detected. Detail: {lock_error}")
+    if not run_locked:
+        safe_print(console_message("ERROR", f"Another run is writing --folder '{folder_base}'{f' shard {shard[0]}/{shard[1]}' if shard else ''}. Wait for it to finish or use a different --folder."))
+        sys.exit(1)
+    atexit.register(run_lock.release)
+
+    # Open the checkpoint journal. Every completed output is appended and synced to disk.
+    journal_path = prepare_journal_path(base_path, folder_base, shard)
+    verified_outputs = {}
+    if args.resume and journal_path:
+        journal_records, journal_warnings = load_journal(journal_path, render_parameters)
+        startup_warnings.extend(journal_warnings)
+        verified_outputs, failed_outputs = verify_journal_records(journal_records, base_path)
+        if failed_outputs:
+            startup_warnings.append(f"{len(failed_outputs)} journaled output file(s) are missing or changed and will be rendered again.")
+
+    journal_file = None
+    if journal_path:
+        try:
+            journal_file = open_journal(journal_path, render_parameters, verified_outputs.values())
+        except OSError as journal_error:
+            startup_warnings.append(f"Checkpoint journal could not be opened. This run cannot be resumed. Detail: {journal_error}")
+    else:
+        startup_warnings.append("Checkpoint journal path is unavailable. This run cannot be resumed.")
+
+    if args.resume and not quiet_mode:
+        safe_print(console_message("INFO", f"Resume verified {len(verified_outputs)} output file(s) from the checkpoint journal."))
+
+    # Preflight: list the output root once, create every missing output folder in one pass,
+    # and answer existence checks from memory instead of one filesystem call per icon.
+    subfolder_names = [f"{folder_base}" if alias == "single" else f"{folder_base}_{alias}" for _, alias in emoji_pairs]
     try:
         os.makedirs(emojis_root, exist_ok=True)
+        inventory = OutputInventory.scan(emojis_root, subfolder_names)
     except OSError as root_error:
         safe_print(console_message("ERROR", f"Failed to prepare output root directory: {emojis_root}."))
         safe_print(console_message("ERROR", f"Output root error detail: {root_error}"))
         sys.exit(1)
+    existing_folder_count = len(inventory.folders)
+    folder_errors = inventory.prepare(subfolder_names)
+    # Each output folder is locked while its entry is written, so runs that share the root only wait on shared folders.
+    folder_locks = FolderLocks(emojis_root, lock_timeout)
+    atexit.register(folder_locks.release_all)
+
+    encode_executor = ThreadPoolExecutor(max_workers=len(image_formats)) if args.parallel_encode and len(image_formats) > 1 else None
+
+    # One run log records startup warnings once and every entry's events through a single buffered handle.
+    run_log = RunLog(prepare_log_path(base_path, run_log_name), background=args.background_log)
+    # Flush buffered entries even when the run aborts or crashes.
+    atexit.register(run_log.close)
+    for warning in startup_warnings:
+        log(warning, run_log, quiet=quiet_mode, level="WARNING")
+    log(
+        f"Preflight inventory: {existing_folder_count} existing output folder(s) with {sum(len(files) for files in inventory.folders.values())} file(s), "
+        f"{len(inventory.folders) - existing_folder_count} folder(s) created.",
+        run_log, quiet=quiet_mode, level="DEBUG",
+    )
 
-    # Process each emoji and alias pair.
-    for index, (emoji, alias) in enumerate(emoji_pairs, start=1):
-        # Generate folder name based on CLI --folder when not in batch mode.
-        subfolder_name = f"{folder_base}" if alias == "single" else f"{folder_base}_{alias}"
-        active_filename_prefix = subfolder_name if args.filename_prefix_from_folder else filename_prefix
-        output_path = os.path.join(emojis_root, subfolder_name)
-        try:
-            os.makedirs(output_path, exist_ok=True)
-        except OSError as output_error:
-            safe_print(console_message("WARNING", f"Output folder could not be prepared and will be skipped: {output_path}"))
-            safe_print(console_message("WARNING", f"Output folder error detail: {output_error}"))
-            continue
-
-
-        if not os.access(output_path, os.W_OK):
-            safe_print(console_message("WARNING", f"Output folder is not writable and will be skipped: {output_path}"))
-            continue
-
-        log_file = prepare_log_path(base_path, subfolder_name)
-        log_entries = []
-
-        for warning in startup_warnings:
-            log(warning, log_entries, quiet=quiet_mode, level="WARNING")
-
-        log(f"Starting PNG generation for emoji {index} into '{output_path}'.", log_entries, quiet=quiet_mode)
-        log(f"Output filename prefix applied: {active_filename_prefix}.", log_entries, quiet=quiet_mode, level="DEBUG")
-        log(f"Margin ratio applied: {margin_ratio}.", log_entries, quiet=quiet_mode, level="DEBUG")
-
-        for size in ICON_SIZES:
-            temp_size = size * SCALE_FACTOR
-            img = Image.new("RGBA", (temp_size, temp_size), (0, 0, 0, 0))
-            draw = ImageDraw.Draw(img)
-            
-            # Classify emoji before rendering.
-            try:
-                structure_type = classify_unicode_structure(emoji)
-                log(f"Detected Unicode structure: {structure_type}.", log_entries, quiet=quiet_mode, level="DEBUG")
-            except Exception as classify_error:
-                structure_type = "COMPLEX"
-                log("Emoji structure classification failed. Fallback structure COMPLEX will be used.", log_entries, quiet=quiet_mode, level="WARNING", detail=str(classify_error))
-
-            # Load font and compute bounding box with fit checks.
-            font_size = int(temp_size * 0.85)
-            max_attempts = 10
-
-            for attempt in range(max_attempts):
-                font = load_font(font_size, quiet_mode)
-                try:
-                    bbox = draw.textbbox((0, 0), emoji, font=font, embedded_color=True)
-                except TypeError:
-                    bbox = draw.textbbox((0, 0), emoji, font=font)
-
-                width = bbox[2] - bbox[0]
-                height = bbox[3] - bbox[1]
-
-                if width <= int(temp_size * 0.97) and height <= int(temp_size * 0.97):
-                    break
-
-                font_size -= 2
-
-            else:
-                log(f"Emoji did not fit within {temp_size}px after {max_attempts} attempts. Rendering may be clipped.", log_entries, quiet=quiet_mode, level="WARNING")
-
-            # Validate the final bounding box before rendering.
-            if not bbox or len(bbox) != 4:
-                log(f"Invalid bounding box detected after fit attempts. Size {size}px will be skipped.", log_entries, quiet=quiet_mode, level="ERROR")
-                continue
-
-
-            # Compute structure-aware render position.
-            x, y = get_adjusted_position(structure_type, temp_size, bbox, log_entries, quiet_mode)
-
-            # Render the emoji.
-            try:
-                draw.text((x, y), emoji, font=font, embedded_color=True)
-            except TypeError:
-                draw.text((x, y), emoji, font=font)
-
-            if all(pixel[3] == 0 for pixel in iter_image_pixels(img)):
-                log(f"Emoji may not have rendered at {size}x{size}.", log_entries, quiet=quiet_mode, level="WARNING")
-
-            # Compute structure-aware margin.
-            try:
-                margin_pixels = get_adjusted_margin(structure_type, margin_ratio, temp_size)
-                log(f"Adjusted margin: {margin_pixels}px for structure {structure_type}.", log_entries, quiet=quiet_mode, level="DEBUG")
-            except Exception as margin_error:
-                margin_pixels = int(temp_size * margin_ratio)
-                log(f"Margin adaptation failed. Base margin {margin_pixels}px will be used.", log_entries, quiet=quiet_mode, level="WARNING", detail=str(margin_error))
-
-            try:
-                resized_img, needs_retry = render_with_margin_and_test(
-                    img, temp_size, bbox, size, margin_pixels, enable_edge_check, log_entries, quiet_mode, x, y
-                )
-
-                # Retry with increased margin when autofix is enabled.
-                if needs_retry and enable_autofix_margin:
-                    retry_margin = int(margin_pixels * 1.4)
-                    log(f"Re-rendering with increased margin: {retry_margin}px.", log_entries, quiet=quiet_mode)
-                    resized_img, _ = render_with_margin_and_test(
-                        img, temp_size, bbox, size, retry_margin, False, log_entries, quiet_mode, x, y
-                    )
-
-            except Exception as crop_error:
-                log(f"Cropping or resizing failed for {size}x{size}. Size will be skipped.", log_entries, quiet=quiet_mode, level="ERROR", detail=str(crop_error))
-                continue
-
-
-
-            filename = f"{active_filename_prefix}_{size}x{size}.png"
-            file_path = os.path.join(output_path, filename)
-
-            # Enforce memory usage limit when optional monitoring is available.
-            memory_mb = get_memory_usage_mb()
-            if memory_mb:
-                if memory_mb > memory_limit_mb:
-                    log(f"Memory usage exceeded configured limit: {memory_mb:.1f} MB > {memory_limit_mb} MB.", log_entries, quiet=quiet_mode, level="ERROR")
-                    write_log_if_needed(log_entries, log_file)
-                    safe_print(console_message("ERROR", f"Process aborted due to excessive memory usage: {memory_mb:.1f} MB."))
-                    sys.exit(1)
-                elif memory_mb > 300:
-                    log(f"Memory usage is high: {memory_mb:.1f} MB.", log_entries, quiet=quiet_mode, level="WARNING")
+    # Counters and latency histograms are always collected; --metrics-file decides whether they are written.
+    metrics = create_run_metrics(image_formats)
+    run_started = time.perf_counter()
+
+    def refresh_run_gauges(registry):
+        """Update the gauges that describe the whole process before each metrics write."""
+        peak_rss = get_peak_rss_bytes()
+        if peak_rss is not None:
+            registry.set("utp_peak_rss_bytes", peak_rss)
+        registry.set("utp_run_seconds", round(time.perf_counter() - run_started, 3))
+
+    metrics_writer = MetricsFileWriter(metrics, args.metrics_file, metrics_interval, refresh_run_gauges) if args.metrics_file else None
+
+    def close_metrics():
+        """Write the final metrics file and report where it went."""
+        if metrics_writer is None:
+            return
+        if metrics_writer.close():
+            log(f"Metrics written: {args.metrics_file}.", run_log, quiet=quiet_mode)
+        else:
+            log(f"Metrics file could not be written: {args.metrics_file}.", run_log, quiet=False, level="WARNING", detail=metrics_writer.errors[-1])
+
+    # The progress line replaces per-icon console lines; the run log still records every event.
+    progress = ProgressLine(len(emoji_pairs)).start() if args.progress and not quiet_mode else None
+    watchdog = RenderWatchdog(stage_workers["rasterize"]) if render_timeout else None
+    memory_governor = MemoryGovernor(memory_limit_mb, SCALE_FACTOR, stage_workers["rasterize"])
+    # Batch entries flow through bounded stage queues, so only a few canvases and images are alive at any time.
+    stages = RenderStages(
+        base_path=base_path,
+        folder_base=folder_base,
+        run_log=run_log,
+        inventory=inventory,
+        folder_locks=folder_locks,
+        memory_governor=memory_governor,
+        metrics=metrics,
+        icon_sizes=icon_sizes,
+        render_sizes=render_sizes,
+        image_formats=image_formats,
+        containers=containers,
+        output_variants=output_variants,
+        badge_variants=badge_variants,
+        badge_position=args.badge_position,
+        badge_font_path=badge_font_path,
+        margin_ratio=margin_ratio,
+        canvas_limit_mb=canvas_limit_mb,
+        enable_edge_check=enable_edge_check,
+        resample=args.resample,
+        layout_engine=args.layout_engine,
+        filename_prefix=filename_prefix,
+        filename_prefix_from_folder=args.filename_prefix_from_folder,
+        per_alias_logs=args.per_alias_logs,
+        render_timeout=render_timeout,
+        lock_timeout=lock_timeout,
+        verified_outputs=verified_outputs,
+        folder_errors=folder_errors,
+        journal_file=journal_file,
+        watchdog=watchdog,
+        encode_executor=encode_executor,
+        memory_probe=get_memory_usage_mb,
+        on_entry_done=progress.advance if progress is not None else None,
+        entry_count=len(emoji_pairs),
+        quiet=quiet_mode,
+    )
+    pipeline = Pipeline(
+        [
+            PipelineStage("plan", stages.plan_entry, stage_workers["plan"]),
+            PipelineStage("rasterize", stages.rasterize_task, stage_workers["rasterize"]),
+            PipelineStage("resize", stages.resize_task, stage_workers["resize"]),
+            PipelineStage("encode", stages.encode_task, stage_workers["encode"]),
+            PipelineStage("write", stages.write_task, stage_workers["write"]),
+        ],
+        queue_size=queue_size,
+    )
+    batch_entries = [
+        (index, emoji, alias, emoji_font_path)
+        for index, ((emoji, alias), emoji_font_path) in enumerate(zip(emoji_pairs, emoji_fonts), start=1)
+    ]
+
+    def write_run_manifest(stage_stats, status="completed"):
+        """Write the run manifest of every entry planned so far and return its path, or None on failure."""
+        # Record every output with its hash so downstream tools can diff manifests instead of rehashing the tree.
+        # Sharded runs write one manifest per shard for --merge-shards.
+        run_log_path = get_manifest_relative_path(run_log.log_file, base_path) if run_log.log_file else None
+        manifest = build_manifest(
+            folder_base, read_version(), started_at, stages.get_manifest_entries(), render_parameters,
+            shard=shard, log_file=run_log_path, pipeline={"queue_size": queue_size, "stages": stage_stats}, status=status,
+        )
+        manifest_path = prepare_manifest_path(base_path, folder_base, shard)
+        return manifest_path if manifest_path and write_manifest(manifest, manifest_path) else None
+
+    def write_checkpoint_manifest():
+        """Rewrite the run manifest after a chunk so an interrupted catalog run leaves a report."""
+        if write_run_manifest(pipeline.get_stats(), status="running") is None:
+            log(f"Checkpoint manifest could not be written for folder '{folder_base}'.", run_log, quiet=False, level="WARNING")
+
+    memory_error = None
+    try:
+        pipeline_stats = pipeline.run(stages.iter_batch_entries(batch_entries, chunk_size, pipeline, write_checkpoint_manifest))
+    except MemoryLimitExceeded as error:
+        memory_error = error
+    finally:
+        if progress is not None:
+            progress.close()
+        if watchdog is not None:
+            watchdog.close()
+
+    if memory_error is not None:
+        if journal_file is not None:
+            journal_file.close()
+        close_metrics()
+        # Record what was written before the abort; the journal lets --resume continue from here.
+        manifest_path = write_run_manifest(pipeline.get_stats(), status="aborted")
+        if manifest_path:
+            log(f"Partial run manifest written: {get_manifest_relative_path(manifest_path, base_path)}.", run_log, quiet=quiet_mode, level="WARNING")
+        run_log.close()
+        safe_print(console_message("ERROR", f"Process aborted due to excessive memory usage: {memory_error.memory_mb:.1f} MB."))
+        sys.exit(1)
 
-            if os.path.exists(file_path):
-                log(f"Existing output file will be overwritten: {filename}.", log_entries, quiet=quiet_mode, level="WARNING")
+    if encode_executor is not None:
+        encode_executor.shutdown()
+    if journal_file is not None:
+        journal_file.close()
+
+    # Report encoded output bytes per format for the whole run.
+    for image_format in image_formats:
+        log(f"Run summary: {stages.files_per_format[image_format]} {image_format.upper()} file(s), {stages.bytes_per_format[image_format]} bytes.", run_log, quiet=quiet_mode)
+
+    if memory_governor.steps:
+        log(f"Memory limit policy applied {len(memory_governor.steps)} step(s): {', '.join(memory_governor.steps)}.", run_log, quiet=quiet_mode, level="WARNING")
+
+    # Timed-out entries are reported, not fatal: the rest of the batch was rendered.
+    manifest_entries = stages.get_manifest_entries()
+    timed_out_aliases = [entry["alias"] for entry in manifest_entries if entry["status"] == "timed_out"]
+    if timed_out_aliases:
+        log(
+            f"{len(timed_out_aliases)} emoji exceeded the {render_timeout:g}s render budget and are marked timed_out in the run manifest: {', '.join(timed_out_aliases)}.",
+            run_log, quiet=quiet_mode, level="WARNING",
+        )
+
+    locked_aliases = [entry["alias"] for entry in manifest_entries if entry["status"] == "locked"]
+    if locked_aliases:
+        log(
+            f"{len(locked_aliases)} emoji were skipped because another process held their output folder, and are marked locked in the run manifest: {', '.join(locked_aliases)}.",
+            run_log, quiet=quiet_mode, level="WARNING",
+        )
+
+    # Report per-stage throughput and queue depth; the busiest stage per worker limits the run.
+    stats_quiet = quiet_mode or not args.pipeline_stats
+    log(f"Pipeline statistics (queue size {queue_size}):", run_log, quiet=stats_quiet, level="DEBUG")
+    for stats_line in format_pipeline_stats(pipeline_stats):
+        log(stats_line, run_log, quiet=stats_quiet, level="DEBUG")
+
+    close_metrics()
+
+    manifest_path = write_run_manifest(pipeline_stats)
+    if manifest_path:
+        log(f"Run manifest written: {get_manifest_relative_path(manifest_path, base_path)}.", run_log, quiet=quiet_mode)
+    else:
+        log(f"Run manifest could not be written for folder '{folder_base}'.", run_log, quiet=False, level="WARNING")
 
-            try:
-                resized_img.save(file_path)
-                log(f"Icon generated: {filename}.", log_entries, quiet=quiet_mode)
-            except (OSError, IOError) as e:
-                log(f"Failed to save output file: {filename}.", log_entries, quiet=quiet_mode, level="ERROR", detail=str(e))
-                continue
-            finally:
-                # Release image objects before processing the next output size.
-                try:
-                    del draw, resized_img, img
-                except NameError:
-                    pass
-
-        log(f"Completed PNG generation for emoji {index} into '{output_path}'.", log_entries, quiet=quiet_mode)
-        write_log_if_needed(log_entries, log_file)
+    run_log.close()
 
 
 # Entry point when the script is executed directly.
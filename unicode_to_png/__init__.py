@@ -9,24 +9,310 @@
 #
 """Core helpers for the Unicode to PNG CLI."""
 
-from .batch_utils import parse_batch
-from .logging_utils import configure_console_output, console_message, log, safe_print, write_log_if_needed
-from .path_utils import prepare_log_path, sanitize_folder_name
-from .unicode_utils import classify_unicode_structure, get_adjusted_margin, get_adjusted_position, is_emoji
+from .async_utils import DEFAULT_MAX_IN_FLIGHT, iter_render_batch_async, render_icon_set_async
+from .badge_utils import (
+    BADGE_POSITIONS,
+    BADGE_SCALE,
+    DEFAULT_BADGE_POSITION,
+    MAX_BADGE_COUNT,
+    composite_badge,
+    get_badge_offset,
+    get_badge_variant,
+    parse_badges,
+    rasterize_badge,
+)
+from .batch_utils import get_shard_key, parse_batch, parse_shard, resolve_alias_collisions, select_shard
+from .catalog_utils import (
+    CATALOG_PATH,
+    DEFAULT_CHUNK_SIZE,
+    filter_catalog,
+    get_catalog_slug,
+    iter_catalog_chunks,
+    load_emoji_catalog,
+    read_catalog_version,
+)
+from .font_utils import (
+    DEFAULT_FONT_PATHS,
+    clear_font_caches,
+    format_codepoints,
+    get_bitmap_strike_sizes,
+    get_default_font_paths,
+    get_font_coverage,
+    select_font_for_emoji,
+)
+from .journal_utils import (
+    JOURNAL_VERSION,
+    append_journal_record,
+    hash_bytes,
+    hash_file,
+    load_journal,
+    open_journal,
+    prepare_journal_path,
+    record_journal_output,
+    verify_journal_records,
+)
+from .lock_utils import DEFAULT_LOCK_TIMEOUT, LOCK_DIR_NAME, FileLock, FolderLocks, get_lock_path
+from .logging_utils import (
+    DEFAULT_LOG_BUFFER_SIZE,
+    DEFAULT_PROGRESS_INTERVAL,
+    LogView,
+    ProgressLine,
+    RunLog,
+    configure_console_output,
+    console_message,
+    format_progress,
+    log,
+    relay_log_lines,
+    safe_print,
+    write_log_if_needed,
+)
+from .manifest_utils import (
+    MANIFEST_VERSION,
+    build_manifest,
+    find_shard_manifests,
+    get_manifest_relative_path,
+    load_manifest,
+    merge_shard_manifests,
+    prepare_manifest_path,
+    write_manifest,
+)
+from .memory_utils import MEMORY_SETTLE_CHECKS, MEMORY_SOFT_RATIO, MemoryGovernor, MemoryLimitExceeded, clear_render_caches
+from .metrics_utils import (
+    DEFAULT_LATENCY_BUCKETS,
+    ICON_RESULTS,
+    RUN_METRICS,
+    MetricsFileWriter,
+    MetricsRegistry,
+    create_run_metrics,
+    get_peak_rss_bytes,
+    write_metrics_file,
+)
+from .output_utils import (
+    CONTAINER_FORMATS,
+    DEFAULT_IMAGE_FORMAT,
+    IMAGE_FORMATS,
+    IMAGE_SAVE_OPTIONS,
+    encode_image,
+    encode_image_formats,
+    get_container_sizes,
+    parse_format_list,
+    save_icon_containers,
+    supports_image_format,
+    write_file_atomic,
+)
+from .path_utils import OutputInventory, get_log_path, prepare_log_path, sanitize_folder_name
+from .pipeline_utils import (
+    DEFAULT_QUEUE_SIZE,
+    PIPELINE_STAGES,
+    Pipeline,
+    PipelineStage,
+    format_pipeline_stats,
+    parse_stage_workers,
+)
+from .render_utils import (
+    DEFAULT_LAYOUT_ENGINE,
+    DEFAULT_MARGIN_RATIO,
+    DEFAULT_RESAMPLE_MODE,
+    LAYOUT_ENGINES,
+    RESAMPLE_MODES,
+    SHAPING_CACHE_SIZE,
+    check_visual_edges,
+    clear_shaping_cache,
+    fit_font,
+    crop_to_ink,
+    get_icon_layout,
+    get_probe_draw,
+    has_raqm,
+    load_font,
+    measure_bitmap_emoji,
+    measure_text,
+    plan_icon,
+    rasterize_bitmap_emoji,
+    rasterize_icon,
+    render_icon,
+    resample_glyph,
+    resolve_layout_engine,
+    resize_icon,
+)
+from .size_utils import (
+    DEFAULT_CANVAS_LIMIT_MB,
+    DEFAULT_SIZE_PROFILE,
+    MAX_SCALE_FACTOR,
+    SIZE_PROFILES,
+    get_canvas_memory_mb,
+    get_scale_factor,
+    parse_sizes,
+)
+from .stage_utils import HIGH_MEMORY_WARNING_MB, RenderStages
+from .transport_utils import SharedImageBuffer, prepare_shared_transport, rasterize_icon_shared, write_shared_image
+from .unicode_utils import (
+    MAX_SEQUENCE_CODEPOINTS,
+    classify_unicode_structure,
+    get_adjusted_margin,
+    get_adjusted_position,
+    get_sequence_limit_issue,
+    is_emoji,
+)
+from .variant_utils import (
+    DISABLED_OPACITY,
+    MONO_COLOR,
+    VARIANTS,
+    get_variant_filename,
+    make_variant,
+    make_variants,
+)
 from .version import read_version
+from .watchdog_utils import RenderTimeout, RenderWatchdog
 
 __all__ = [
+    "BADGE_POSITIONS",
+    "BADGE_SCALE",
+    "CATALOG_PATH",
+    "CONTAINER_FORMATS",
+    "DEFAULT_BADGE_POSITION",
+    "DEFAULT_CANVAS_LIMIT_MB",
+    "DEFAULT_CHUNK_SIZE",
+    "DEFAULT_FONT_PATHS",
+    "DEFAULT_IMAGE_FORMAT",
+    "DEFAULT_LATENCY_BUCKETS",
+    "DEFAULT_LAYOUT_ENGINE",
+    "DEFAULT_LOCK_TIMEOUT",
+    "DEFAULT_LOG_BUFFER_SIZE",
+    "DEFAULT_MARGIN_RATIO",
+    "DEFAULT_MAX_IN_FLIGHT",
+    "DEFAULT_PROGRESS_INTERVAL",
+    "DEFAULT_QUEUE_SIZE",
+    "DEFAULT_RESAMPLE_MODE",
+    "DEFAULT_SIZE_PROFILE",
+    "DISABLED_OPACITY",
+    "FileLock",
+    "FolderLocks",
+    "HIGH_MEMORY_WARNING_MB",
+    "ICON_RESULTS",
+    "IMAGE_FORMATS",
+    "IMAGE_SAVE_OPTIONS",
+    "JOURNAL_VERSION",
+    "LAYOUT_ENGINES",
+    "LOCK_DIR_NAME",
+    "LogView",
+    "MANIFEST_VERSION",
+    "MAX_BADGE_COUNT",
+    "MAX_SCALE_FACTOR",
+    "MAX_SEQUENCE_CODEPOINTS",
+    "MEMORY_SETTLE_CHECKS",
+    "MEMORY_SOFT_RATIO",
+    "MONO_COLOR",
+    "MemoryGovernor",
+    "MemoryLimitExceeded",
+    "MetricsFileWriter",
+    "MetricsRegistry",
+    "OutputInventory",
+    "PIPELINE_STAGES",
+    "Pipeline",
+    "PipelineStage",
+    "ProgressLine",
+    "RESAMPLE_MODES",
+    "RUN_METRICS",
+    "RenderStages",
+    "RenderTimeout",
+    "RenderWatchdog",
+    "RunLog",
+    "SHAPING_CACHE_SIZE",
+    "SIZE_PROFILES",
+    "SharedImageBuffer",
+    "VARIANTS",
+    "append_journal_record",
+    "build_manifest",
+    "check_visual_edges",
     "classify_unicode_structure",
+    "clear_font_caches",
+    "clear_render_caches",
+    "clear_shaping_cache",
+    "composite_badge",
     "configure_console_output",
     "console_message",
+    "create_run_metrics",
+    "crop_to_ink",
+    "encode_image",
+    "encode_image_formats",
+    "filter_catalog",
+    "find_shard_manifests",
+    "fit_font",
+    "format_codepoints",
+    "format_pipeline_stats",
+    "format_progress",
     "get_adjusted_margin",
     "get_adjusted_position",
+    "get_badge_offset",
+    "get_badge_variant",
+    "get_bitmap_strike_sizes",
+    "get_canvas_memory_mb",
+    "get_catalog_slug",
+    "get_container_sizes",
+    "get_default_font_paths",
+    "get_font_coverage",
+    "get_icon_layout",
+    "get_lock_path",
+    "get_log_path",
+    "get_manifest_relative_path",
+    "get_peak_rss_bytes",
+    "get_probe_draw",
+    "get_scale_factor",
+    "get_sequence_limit_issue",
+    "get_shard_key",
+    "get_variant_filename",
+    "has_raqm",
+    "hash_bytes",
+    "hash_file",
     "is_emoji",
+    "iter_catalog_chunks",
+    "iter_render_batch_async",
+    "load_emoji_catalog",
+    "load_font",
+    "load_journal",
+    "load_manifest",
     "log",
+    "make_variant",
+    "make_variants",
+    "measure_bitmap_emoji",
+    "measure_text",
+    "merge_shard_manifests",
+    "open_journal",
+    "parse_badges",
     "parse_batch",
+    "parse_format_list",
+    "parse_shard",
+    "parse_sizes",
+    "parse_stage_workers",
+    "plan_icon",
+    "prepare_journal_path",
     "prepare_log_path",
+    "prepare_manifest_path",
+    "prepare_shared_transport",
+    "rasterize_badge",
+    "rasterize_bitmap_emoji",
+    "rasterize_icon",
+    "rasterize_icon_shared",
+    "read_catalog_version",
     "read_version",
+    "record_journal_output",
+    "relay_log_lines",
+    "render_icon",
+    "render_icon_set_async",
+    "resample_glyph",
+    "resize_icon",
+    "resolve_alias_collisions",
+    "resolve_layout_engine",
     "safe_print",
     "sanitize_folder_name",
+    "save_icon_containers",
+    "select_font_for_emoji",
+    "select_shard",
+    "supports_image_format",
+    "verify_journal_records",
+    "write_file_atomic",
     "write_log_if_needed",
+    "write_manifest",
+    "write_metrics_file",
+    "write_shared_image",
 ]
@@ -0,0 +1,147 @@
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+# If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/
+#
+# Original Author: Sergio Palma Hidalgo
+# Project URL: https://github.com/del-Pacifico/unicode-to-png
+# Copyright (c) 2025 Sergio Palma Hidalgo
+# All rights reserved.
+#
+"""asyncio render helpers for services that embed Unicode to PNG."""
+
+import asyncio
+import os
+
+from .font_utils import get_default_font_paths, select_font_for_emoji
+from .render_utils import DEFAULT_LAYOUT_ENGINE, DEFAULT_MARGIN_RATIO, DEFAULT_RESAMPLE_MODE, render_icon
+from .size_utils import DEFAULT_CANVAS_LIMIT_MB, DEFAULT_SIZE_PROFILE, MAX_SCALE_FACTOR, SIZE_PROFILES, get_scale_factor
+from .unicode_utils import classify_unicode_structure
+
+DEFAULT_MAX_IN_FLIGHT = 4
+
+
+def _render_size(emoji, size, scale_factor, structure_type, margin_ratio, enable_edge_check, font_path, resample, layout_engine):
+    # Runs in the executor. Log lines are returned with the image so process pools keep them too.
+    log_entries = []
+    image = render_icon(emoji, size, scale_factor, structure_type, margin_ratio, enable_edge_check, log_entries, True, font_path, resample, layout_engine)
+    return image, log_entries
+
+
+def _route_font(emoji, font_paths):
+    available_font_paths = tuple(font_path for font_path in font_paths if os.path.isfile(font_path))
+    if not available_font_paths:
+        return None
+    routed_font_path, _ = select_font_for_emoji(emoji, available_font_paths)
+    return routed_font_path or available_font_paths[0]
+
+
+async def _render_entry_size(emoji, alias, size, structure_type, font_path, options, executor, semaphore):
+    loop = asyncio.get_running_loop()
+    scale_factor = get_scale_factor(size, MAX_SCALE_FACTOR, options["canvas_limit_mb"])
+    try:
+        image, log_entries = await loop.run_in_executor(
+            executor, _render_size, emoji, size, scale_factor, structure_type,
+            options["margin_ratio"], options["enable_edge_check"], font_path, options["resample"], options["layout_engine"],
+        )
+    finally:
+        semaphore.release()
+    return {
+        "emoji": emoji,
+        "alias": alias,
+        "size": size,
+        "scale_factor": scale_factor,
+        "font": font_path,
+        "image": image,
+        "log": log_entries,
+    }
+
+
+async def iter_render_batch_async(
+    emoji_pairs,
+    sizes=SIZE_PROFILES[DEFAULT_SIZE_PROFILE],
+    *,
+    font_paths=None,
+    margin_ratio=DEFAULT_MARGIN_RATIO,
+    canvas_limit_mb=DEFAULT_CANVAS_LIMIT_MB,
+    enable_edge_check=False,
+    resample=DEFAULT_RESAMPLE_MODE,
+    layout_engine=DEFAULT_LAYOUT_ENGINE,
+    executor=None,
+    max_in_flight=DEFAULT_MAX_IN_FLIGHT,
+):
+    """
+    Render every emoji and size without blocking the event loop and yield results as they complete.
+
+    Font routing and rasterization run in the executor. A semaphore bounds the renders in
+    flight, and new renders are only started when one finishes, so memory
+    does not grow with the batch size. Closing the iterator early cancels the
+    renders that have not started.
+
+    Args:
+        emoji_pairs (iterable): (emoji, alias) pairs, for example from parse_batch(...).
+        sizes (tuple): Output icon sizes in pixels.
+        font_paths (tuple): Ordered font fallback chain. Default: platform emoji fonts.
+        margin_ratio (float): Base margin ratio.
+        canvas_limit_mb (float): Maximum supersampling canvas memory per size in MB.
+        enable_edge_check (bool): Test every resized output for edge contact.
+        resample (str): Resampling mode from RESAMPLE_MODES.
+        layout_engine (str): Text layout engine from LAYOUT_ENGINES.
+        executor (concurrent.futures.Executor): Executor for rasterization. Default: the event loop's default executor.
+        max_in_flight (int): Maximum renders and font lookups submitted to the executor at once.
+
+    Yields:
+        dict: emoji, alias, size, scale_factor, font, image (None when the size was skipped), and log lines.
+    """
+    font_paths = get_default_font_paths() if font_paths is None else tuple(font_paths)
+    options = {"margin_ratio": margin_ratio, "canvas_limit_mb": canvas_limit_mb, "enable_edge_check": enable_edge_check, "resample": resample, "layout_engine": layout_engine}
+    sizes = tuple(sorted(set(sizes)))
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(max(1, int(max_in_flight)))
+    pending = set()
+
+    try:
+        for emoji, alias in emoji_pairs:
+            try:
+                structure_type = classify_unicode_structure(emoji)
+            except Exception:
+                structure_type = "COMPLEX"
+            # Coverage lookups may read and parse font files, so they run in the executor too
+            # and take a slot like a render.
+            async with semaphore:
+                font_path = await loop.run_in_executor(executor, _route_font, emoji, font_paths)
+
+            for size in sizes:
+                await semaphore.acquire()
+                pending.add(asyncio.ensure_future(
+                    _render_entry_size(emoji, alias, size, structure_type, font_path, options, executor, semaphore)
+                ))
+                for task in [task for task in pending if task.done()]:
+                    pending.remove(task)
+                    yield task.result()
+
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def render_icon_set_async(emoji, sizes=SIZE_PROFILES[DEFAULT_SIZE_PROFILE], **options):
+    """
+    Render one emoji at every size without blocking the event loop.
+
+    Accepts the keyword options of iter_render_batch_async(...).
+
+    Args:
+        emoji (str): Emoji sequence to render.
+        sizes (tuple): Output icon sizes in pixels.
+
+    Returns:
+        dict: Resized images keyed by size in ascending order. Skipped sizes map to None.
+    """
+    images = {}
+    async for result in iter_render_batch_async([(emoji, "single")], sizes, **options):
+        images[result["size"]] = result["image"]
+    return {size: images[size] for size in sorted(images)}
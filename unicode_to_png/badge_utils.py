@@ -0,0 +1,180 @@
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+# If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/
+#
+# Original Author: Sergio Palma Hidalgo
+# Project URL: https://github.com/del-Pacifico/unicode-to-png
+# Copyright (c) 2025 Sergio Palma Hidalgo
+# All rights reserved.
+#
+"""Count and status badge overlays composited onto resized icons.
+
+Pillow is imported inside the functions so the CLI can still print help and
+version information when Pillow is missing.
+"""
+
+from functools import lru_cache
+import re
+
+BADGE_POSITIONS = ("bottom-right", "top-right", "bottom-left", "top-left")
+DEFAULT_BADGE_POSITION = "bottom-right"
+DEFAULT_BADGE_COLOR = "red"
+BADGE_TEXT_COLOR = (255, 255, 255, 255)
+# Badge height as a fraction of the icon size.
+BADGE_SCALE = 0.5
+# Badges are drawn at this factor and downscaled once, like the emoji canvas.
+BADGE_SUPERSAMPLING = 4
+MAX_BADGE_COUNT = 999
+BADGE_RANGE_PATTERN = re.compile(r"^(\d+)-(\d+)$")
+
+
+def parse_badges(badge_string):
+    """
+    Parse a comma-separated badge list such as "1-99,dot:green".
+
+    Entries are counts ("7"), count ranges ("1-99"), or status dots ("dot" or
+    "dot:<color>" with any Pillow color name or #rrggbb value).
+
+    Args:
+        badge_string (str): Raw --badges option value.
+
+    Returns:
+        tuple: (badges, warnings) where each badge is a dict with name, text, and color.
+    """
+    from PIL import ImageColor
+
+    badges = {}
+    warnings = []
+    for entry_number, entry in enumerate(badge_string.split(","), start=1):
+        token = entry.strip().lower()
+        if not token:
+            continue
+
+        if token == "dot" or token.startswith("dot:"):
+            color_name = token.partition(":")[2].strip() or DEFAULT_BADGE_COLOR
+            try:
+                color = ImageColor.getrgb(color_name)[:3] + (255,)
+            except ValueError:
+                warnings.append(f"Skipped --badges entry {entry_number} because '{color_name}' is not a color name or #rrggbb value.")
+                continue
+            name = "dot" if token == "dot" else f"dot-{color_name.lstrip('#')}"
+            badges.setdefault(name, {"name": name, "text": None, "color": color})
+            continue
+
+        range_match = BADGE_RANGE_PATTERN.match(token)
+        if range_match:
+            first, last = int(range_match.group(1)), int(range_match.group(2))
+        elif token.isdigit():
+            first = last = int(token)
+        else:
+            warnings.append(f"Skipped --badges entry {entry_number} because '{token}' is not a count, a count range, or a status dot.")
+            continue
+
+        if first > last or last > MAX_BADGE_COUNT:
+            warnings.append(f"Skipped --badges entry {entry_number} because '{token}' is not a range between 0 and {MAX_BADGE_COUNT}.")
+            continue
+        default_color = ImageColor.getrgb(DEFAULT_BADGE_COLOR)[:3] + (255,)
+        for count in range(first, last + 1):
+            badges.setdefault(str(count), {"name": str(count), "text": str(count), "color": default_color})
+
+    return list(badges.values()), warnings
+
+
+def get_badge_variant(badge):
+    """Return the output variant name of a badge, used as the filename suffix."""
+    return f"badge-{badge['name']}"
+
+
+def load_badge_font(font_size, font_path=None):
+    """Load the numeral font for count badges, or Pillow's built-in scalable font."""
+    from PIL import ImageFont
+
+    if font_path:
+        try:
+            return ImageFont.truetype(font_path, font_size)
+        except OSError:
+            pass
+    return ImageFont.load_default(font_size)
+
+
+@lru_cache(maxsize=None)
+def rasterize_badge(text, color, height, font_path=None):
+    """
+    Draw one badge at its final height.
+
+    Count badges are pills wide enough for their digits. Status dots are
+    circles. Every badge has a thin white outline so it stays visible on top of
+    any emoji. Results are cached, so each badge is drawn once per size and
+    reused for every entry of the batch.
+
+    Args:
+        text (str): Count to print, or None for a status dot.
+        color (tuple): RGBA fill color.
+        height (int): Badge height in pixels.
+        font_path (str): Optional numeral font for count badges.
+
+    Returns:
+        PIL.Image: RGBA badge image. Treat it as read-only.
+    """
+    from PIL import Image, ImageDraw
+
+    height = max(1, height)
+    scaled_height = height * BADGE_SUPERSAMPLING
+    outline = max(1, scaled_height // 12)
+
+    font = None
+    scaled_width = scaled_height
+    if text:
+        font = load_badge_font(max(1, int(scaled_height * 0.7)), font_path)
+        left, top, right, bottom = ImageDraw.Draw(Image.new("L", (1, 1))).textbbox((0, 0), text, font=font)
+        scaled_width = max(scaled_height, right - left + scaled_height // 2)
+
+    badge = Image.new("RGBA", (scaled_width, scaled_height), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(badge)
+    draw.rounded_rectangle((0, 0, scaled_width - 1, scaled_height - 1), radius=scaled_height // 2, fill=BADGE_TEXT_COLOR)
+    draw.rounded_rectangle(
+        (outline, outline, scaled_width - 1 - outline, scaled_height - 1 - outline),
+        radius=scaled_height // 2 - outline,
+        fill=tuple(color),
+    )
+    if text:
+        draw.text((scaled_width / 2, scaled_height / 2), text, font=font, fill=BADGE_TEXT_COLOR, anchor="mm")
+
+    width = max(1, round(scaled_width / BADGE_SUPERSAMPLING))
+    return badge.resize((width, height), Image.LANCZOS)
+
+
+def get_badge_offset(icon_size, badge_size, position=DEFAULT_BADGE_POSITION):
+    """Return the top-left offset that puts a badge in one corner of the icon."""
+    icon_width, icon_height = icon_size
+    badge_width, badge_height = badge_size
+    x = 0 if position.endswith("left") else max(0, icon_width - badge_width)
+    y = 0 if position.startswith("top") else max(0, icon_height - badge_height)
+    return x, y
+
+
+def composite_badge(icon, badge, position=DEFAULT_BADGE_POSITION, font_path=None):
+    """
+    Return a copy of a resized icon with one badge composited into a corner.
+
+    The icon is never rasterized again: the badge is drawn once per size
+    and alpha-composited onto a copy.
+
+    Args:
+        icon (PIL.Image): Resized RGBA icon.
+        badge (dict): Badge from parse_badges(...).
+        position (str): One of BADGE_POSITIONS.
+        font_path (str): Optional numeral font for count badges.
+
+    Returns:
+        PIL.Image: New RGBA image of the icon size.
+    """
+    from PIL import Image
+
+    badge_image = rasterize_badge(badge["text"], tuple(badge["color"]), round(icon.height * BADGE_SCALE), font_path)
+    if badge_image.width > icon.width:
+        # Three-digit counts on tiny icons are narrowed to the icon width.
+        badge_image = badge_image.resize((icon.width, badge_image.height), Image.LANCZOS)
+    composed = icon.copy()
+    composed.alpha_composite(badge_image, get_badge_offset(icon.size, badge_image.size, position))
+    return composed
@@ -9,13 +9,17 @@
 #
 """Batch input parsing helpers for Unicode to PNG."""
 
+import hashlib
+import re
+
 from .path_utils import sanitize_folder_name
-from .unicode_utils import is_emoji
+from .unicode_utils import get_sequence_limit_issue, is_emoji
 
 
 def parse_batch(batch_string):
-    """Parse the --batch argument into emoji and alias pairs."""
+    """Parse the --batch argument into emoji and alias pairs with unique aliases."""
     pairs = []
+    entry_numbers = []
     warnings = []
     fallback_count = 1
     for entry_number, entry in enumerate(batch_string.split(","), start=1):
@@ -27,6 +31,10 @@ def parse_batch(batch_string):
         if not is_emoji(emoji):
             warnings.append(f"Skipped batch entry {entry_number} because '{emoji}' is not a valid emoji.")
             continue
+        limit_issue = get_sequence_limit_issue(emoji)
+        if limit_issue:
+            warnings.append(f"Skipped batch entry {entry_number} because the emoji {limit_issue}.")
+            continue
 
         # Get alias if present and sanitize it.
         if len(parts) > 1 and parts[1].strip():
@@ -41,4 +49,90 @@ def parse_batch(batch_string):
             warnings.append(f"Batch entry {entry_number} has no alias. Fallback alias '{alias}' was used.")
 
         pairs.append((emoji, alias))
-    return pairs, warnings
+        entry_numbers.append(entry_number)
+
+    pairs, collision_warnings = resolve_alias_collisions(pairs, entry_numbers)
+    return pairs, warnings + collision_warnings
+
+
+def resolve_alias_collisions(pairs, entry_numbers=None):
+    """
+    Give every batch entry its own output folder before rendering starts.
+
+    Aliases are compared case-insensitively, because "Fire" and "fire" are the
+    same folder on Windows and macOS. An exact repeat of an earlier entry is
+    dropped. Another emoji with a taken alias gets the first free numbered
+    alias, such as "fire_2".
+
+    Args:
+        pairs (list): Emoji and alias pairs.
+        entry_numbers (list): Batch entry number of each pair for the warnings. Default: 1, 2, ...
+
+    Returns:
+        tuple: (pairs, warnings) with unique aliases, in batch order.
+    """
+    if entry_numbers is None:
+        entry_numbers = range(1, len(pairs) + 1)
+    resolved = []
+    warnings = []
+    taken = {}
+    for entry_number, (emoji, alias) in zip(entry_numbers, pairs):
+        key = alias.casefold()
+        if key not in taken:
+            taken[key] = (entry_number, emoji)
+            resolved.append((emoji, alias))
+            continue
+
+        first_entry, first_emoji = taken[key]
+        if emoji == first_emoji:
+            warnings.append(f"Skipped batch entry {entry_number} because it repeats entry {first_entry} ('{alias}').")
+            continue
+        suffix = 2
+        while f"{alias}_{suffix}".casefold() in taken:
+            suffix += 1
+        unique_alias = f"{alias}_{suffix}"
+        taken[unique_alias.casefold()] = (entry_number, emoji)
+        resolved.append((emoji, unique_alias))
+        warnings.append(f"Batch entry {entry_number} alias '{alias}' collides with entry {first_entry} after sanitization. Alias '{unique_alias}' was used.")
+    return resolved, warnings
+
+
+def parse_shard(shard_string):
+    """
+    Parse the --shard argument in i/N form, where shards are numbered from 1.
+
+    Returns:
+        tuple or None: (index, count), or None when the value is invalid.
+    """
+    match = re.fullmatch(r"\s*(\d+)\s*/\s*(\d+)\s*", shard_string or "")
+    if not match:
+        return None
+    index, count = int(match.group(1)), int(match.group(2))
+    if count < 1 or not 1 <= index <= count:
+        return None
+    return index, count
+
+
+def get_shard_key(emoji, alias):
+    """Return a stable, platform-independent hash key for a batch entry."""
+    return hashlib.sha256(f"{emoji}\t{alias}".encode("utf-8")).hexdigest()
+
+
+def select_shard(pairs, shard_index, shard_count):
+    """
+    Select the batch entries assigned to one shard.
+
+    Entries are ordered by a stable hash and dealt round-robin, so every node
+    computes the same assignment and shard sizes differ by at most one entry.
+
+    Args:
+        pairs (list): Emoji and alias pairs from parse_batch(...).
+        shard_index (int): Shard number, starting at 1.
+        shard_count (int): Total number of shards.
+
+    Returns:
+        list: Pairs assigned to the shard, in their original batch order.
+    """
+    ranked = sorted(range(len(pairs)), key=lambda position: (get_shard_key(*pairs[position]), position))
+    selected = {position for rank, position in enumerate(ranked) if rank % shard_count == shard_index - 1}
+    return [pair for position, pair in enumerate(pairs) if position in selected]
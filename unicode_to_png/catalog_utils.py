@@ -0,0 +1,129 @@
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+# If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/
+#
+# Original Author: Sergio Palma Hidalgo
+# Project URL: https://github.com/del-Pacifico/unicode-to-png
+# Copyright (c) 2025 Sergio Palma Hidalgo
+# All rights reserved.
+#
+"""Bundled RGI emoji catalog helpers for whole-catalog runs."""
+
+from functools import lru_cache
+import os
+import re
+import unicodedata
+
+CATALOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "emoji_catalog.tsv")
+DEFAULT_CHUNK_SIZE = 250
+
+
+def get_catalog_slug(name):
+    """Return a lowercase ASCII slug of a catalog name, e.g. "Smileys & Emotion" -> "smileys_emotion"."""
+    ascii_name = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode("ascii")
+    return re.sub(r"[^a-z0-9]+", "_", ascii_name.lower()).strip("_")
+
+
+def _parse_version(value):
+    try:
+        return tuple(int(part) for part in value.split("."))
+    except ValueError:
+        return None
+
+
+@lru_cache(maxsize=None)
+def _read_catalog(catalog_path):
+    entries = []
+    with open(catalog_path, encoding="utf-8") as catalog_file:
+        for line in catalog_file:
+            line = line.rstrip("\n")
+            if not line or line.startswith("#"):
+                continue
+            codepoints, group, subgroup, emoji_version, name = line.split("\t")
+            entries.append({
+                "emoji": "".join(chr(int(codepoint, 16)) for codepoint in codepoints.split()),
+                "name": name,
+                "group": group,
+                "subgroup": subgroup,
+                "emoji_version": emoji_version,
+            })
+
+    # Aliases are name slugs. A codepoint suffix keeps the rare colliding slug unique.
+    seen = set()
+    for entry in entries:
+        alias = get_catalog_slug(entry["name"])
+        if alias in seen:
+            alias = f"{alias}_{'_'.join(f'{ord(character):x}' for character in entry['emoji'])}"
+        seen.add(alias)
+        entry["alias"] = alias
+    return tuple(entries)
+
+
+def load_emoji_catalog(catalog_path=CATALOG_PATH):
+    """
+    Load the bundled RGI emoji catalog.
+
+    Args:
+        catalog_path (str): Catalog file built by scripts/build_emoji_catalog.py.
+
+    Returns:
+        tuple: One dict per emoji with emoji, alias, name, group, subgroup, and emoji_version, in Unicode order.
+    """
+    return _read_catalog(os.path.abspath(catalog_path))
+
+
+def read_catalog_version(catalog_path=CATALOG_PATH):
+    """Return the Unicode emoji version recorded in the catalog header, or "unknown"."""
+    with open(catalog_path, encoding="utf-8") as catalog_file:
+        match = re.search(r"Unicode emoji version (\S+?)\.?$", catalog_file.readline().strip())
+    return match.group(1) if match else "unknown"
+
+
+def filter_catalog(entries, groups=None, max_version=None):
+    """
+    Keep the catalog entries of some groups and up to an emoji version.
+
+    Args:
+        entries (tuple): Entries from load_emoji_catalog(...).
+        groups (str): Optional comma-separated group or subgroup names or slugs,
+            e.g. "smileys_emotion,flag".
+        max_version (str): Optional highest emoji version to keep, e.g. "13.0".
+
+    Returns:
+        tuple: (entries, warnings) with the kept entries in catalog order.
+    """
+    warnings = []
+    wanted = set()
+    if groups:
+        known = {get_catalog_slug(entry[key]) for entry in entries for key in ("group", "subgroup")}
+        for entry_number, group in enumerate(groups.split(","), start=1):
+            slug = get_catalog_slug(group)
+            if not slug:
+                continue
+            if slug not in known:
+                warnings.append(f"Skipped --group entry {entry_number} because '{group.strip()}' is not a catalog group or subgroup.")
+                continue
+            wanted.add(slug)
+        if not wanted:
+            return (), warnings
+
+    version_limit = None
+    if max_version:
+        version_limit = _parse_version(max_version.strip())
+        if version_limit is None:
+            warnings.append(f"Invalid emoji version '{max_version}' was ignored. Use a version such as 13.0.")
+
+    kept = tuple(
+        entry for entry in entries
+        if (not wanted or get_catalog_slug(entry["group"]) in wanted or get_catalog_slug(entry["subgroup"]) in wanted)
+        and (version_limit is None or _parse_version(entry["emoji_version"]) <= version_limit)
+    )
+    return kept, warnings
+
+
+def iter_catalog_chunks(entries, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield (chunk_number, chunk_count, entries) slices of at most chunk_size entries."""
+    chunk_size = max(1, int(chunk_size))
+    chunk_count = -(-len(entries) // chunk_size)
+    for chunk_number in range(chunk_count):
+        yield chunk_number + 1, chunk_count, entries[chunk_number * chunk_size:(chunk_number + 1) * chunk_size]
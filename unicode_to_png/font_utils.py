@@ -0,0 +1,260 @@
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+# If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/
+#
+# Original Author: Sergio Palma Hidalgo
+# Project URL: https://github.com/del-Pacifico/unicode-to-png
+# Copyright (c) 2025 Sergio Palma Hidalgo
+# All rights reserved.
+#
+"""Font fallback chain and cmap coverage helpers for Unicode to PNG."""
+
+from functools import lru_cache
+import os
+import platform
+import struct
+
+DEFAULT_FONT_PATHS = (
+    "C:/Windows/Fonts/seguiemj.ttf",  # Segoe UI Emoji
+    "C:/Windows/Fonts/seguisym.ttf",  # Segoe UI Symbol
+)
+PLATFORM_FONT_PATHS = {
+    "Windows": DEFAULT_FONT_PATHS,
+    "Darwin": (
+        "/System/Library/Fonts/Apple Color Emoji.ttc",
+    ),
+    "Linux": (
+        "/usr/share/fonts/truetype/noto/NotoColorEmoji.ttf",
+        "/usr/share/fonts/noto/NotoColorEmoji.ttf",
+        "/usr/share/fonts/google-noto-emoji/NotoColorEmoji.ttf",
+        "/usr/share/fonts/noto-emoji/NotoColorEmoji.ttf",
+    ),
+}
+OUTLINE_TABLES = (b"glyf", b"CFF ", b"CFF2")
+
+# Joiners and variation selectors select glyph variants; fonts are not required to map them.
+IGNORED_CODEPOINTS = frozenset({0x200D, 0xFE0E, 0xFE0F})
+
+
+def _read_format_4(data, offset, codepoints):
+    """Add the codepoints of a cmap format 4 subtable (BMP segments)."""
+    seg_count = struct.unpack_from(">H", data, offset + 6)[0] // 2
+    end_codes = struct.unpack_from(f">{seg_count}H", data, offset + 14)
+    start_codes = struct.unpack_from(f">{seg_count}H", data, offset + 16 + seg_count * 2)
+    for start, end in zip(start_codes, end_codes):
+        if start != 0xFFFF:
+            codepoints.update(range(start, end + 1))
+
+
+def _read_format_12(data, offset, codepoints):
+    """Add the codepoints of a cmap format 12 or 13 subtable (full Unicode groups)."""
+    group_count = struct.unpack_from(">I", data, offset + 12)[0]
+    for group in range(group_count):
+        start, end, _ = struct.unpack_from(">III", data, offset + 16 + group * 12)
+        codepoints.update(range(start, end + 1))
+
+
+def get_default_font_paths(system=None):
+    """Return the default emoji font chain for the current (or given) platform."""
+    return PLATFORM_FONT_PATHS.get(system or platform.system(), DEFAULT_FONT_PATHS)
+
+
+def _read_font_tables(font_path, tags, font_index=0):
+    """
+    Read only some tables of a font instead of the whole file.
+
+    The header and table directory are read first, then each requested table
+    is read from its offset with the length recorded in the directory. Emoji
+    fonts are tens or hundreds of MB, while cmap and the bitmap size tables
+    are a few KB.
+
+    Returns:
+        tuple: ({tag: table bytes} for the requested tables present in the font, frozenset of every table tag).
+    """
+    with open(font_path, "rb") as font_file:
+        try:
+            header = font_file.read(12)
+            if header[:4] == b"ttcf":
+                # Collection header: face offsets follow the 12-byte header.
+                font_file.seek(12 + font_index * 4)
+                font_file.seek(struct.unpack(">I", font_file.read(4))[0])
+                header = font_file.read(12)
+
+            table_count = struct.unpack_from(">H", header, 4)[0]
+            directory = font_file.read(table_count * 16)
+            records = {}
+            for table in range(table_count):
+                tag, _, table_offset, table_length = struct.unpack_from(">4sIII", directory, table * 16)
+                records[tag] = (table_offset, table_length)
+        except struct.error as error:
+            raise ValueError(f"Font data is truncated or malformed: {error}") from error
+
+        tables = {}
+        for tag in tags:
+            if tag not in records:
+                continue
+            table_offset, table_length = records[tag]
+            # Table offsets are from the start of the file, also inside collections.
+            font_file.seek(table_offset)
+            tables[tag] = font_file.read(table_length)
+            if len(tables[tag]) < table_length:
+                raise ValueError(f"Font table {tag.decode('latin-1')} is truncated.")
+    return tables, frozenset(records)
+
+
+def read_cmap_codepoints(font_path, font_index=0):
+    """
+    Read the Unicode codepoints mapped by a TrueType/OpenType font.
+
+    Args:
+        font_path (str): Path to a .ttf, .otf, or .ttc font file.
+        font_index (int): Face index inside a font collection.
+
+    Returns:
+        frozenset: Mapped codepoints.
+
+    Raises:
+        OSError: The file cannot be read.
+        ValueError: The file is not a supported sfnt font or has no cmap table.
+    """
+    tables, _ = _read_font_tables(font_path, (b"cmap",), font_index)
+    data = tables.get(b"cmap")
+    if data is None:
+        raise ValueError("Font has no cmap table.")
+
+    codepoints = set()
+    try:
+        subtable_count = struct.unpack_from(">H", data, 2)[0]
+        for subtable in range(subtable_count):
+            platform_id, encoding_id, offset = struct.unpack_from(">HHI", data, 4 + subtable * 8)
+            # Only Unicode subtables: platform 0, or Windows platform 3 with BMP (1) or full (10) encoding.
+            if platform_id != 0 and not (platform_id == 3 and encoding_id in (1, 10)):
+                continue
+            subtable_format = struct.unpack_from(">H", data, offset)[0]
+            if subtable_format == 4:
+                _read_format_4(data, offset, codepoints)
+            elif subtable_format in (12, 13):
+                _read_format_12(data, offset, codepoints)
+    except struct.error as error:
+        raise ValueError(f"Font data is truncated or malformed: {error}") from error
+
+    return frozenset(codepoints)
+
+
+def read_bitmap_strike_sizes(font_path, font_index=0):
+    """
+    Read the fixed bitmap strike sizes of a color bitmap emoji font.
+
+    Color bitmap fonts such as Noto Color Emoji (CBDT) and Apple Color Emoji
+    (sbix) can only be rendered in color at their strike sizes.
+
+    Args:
+        font_path (str): Path to the font file.
+        font_index (int): Face index inside a font collection.
+
+    Returns:
+        tuple: Sorted strike sizes in pixels, or an empty tuple for outline fonts.
+    """
+    tables, font_tags = _read_font_tables(font_path, (b"CBLC", b"sbix", b"EBLC"), font_index)
+    # Monochrome EBLC strikes only matter when the font has no outlines to scale.
+    if any(tag in font_tags for tag in OUTLINE_TABLES):
+        tables.pop(b"EBLC", None)
+    if not tables:
+        return ()
+
+    strike_sizes = set()
+    try:
+        for tag in (b"CBLC", b"EBLC"):
+            if tag in tables:
+                data = tables[tag]
+                size_count = struct.unpack_from(">I", data, 4)[0]
+                for size_record in range(size_count):
+                    # ppemX is the byte at offset 44 of each 48-byte BitmapSize record.
+                    strike_sizes.add(data[8 + size_record * 48 + 44])
+        if b"sbix" in tables:
+            data = tables[b"sbix"]
+            strike_count = struct.unpack_from(">I", data, 4)[0]
+            for strike in range(strike_count):
+                strike_offset = struct.unpack_from(">I", data, 8 + strike * 4)[0]
+                strike_sizes.add(struct.unpack_from(">H", data, strike_offset)[0])
+    except (struct.error, IndexError) as error:
+        raise ValueError(f"Font bitmap tables are truncated or malformed: {error}") from error
+    return tuple(sorted(size for size in strike_sizes if size > 0))
+
+
+@lru_cache(maxsize=None)
+def _cached_coverage(font_path, modified_time, file_size):
+    # File metadata is part of the key so a replaced font file is indexed again.
+    return read_cmap_codepoints(font_path)
+
+
+@lru_cache(maxsize=None)
+def _cached_strike_sizes(font_path, modified_time, file_size):
+    return read_bitmap_strike_sizes(font_path)
+
+
+def clear_font_caches():
+    """Drop the cached cmap coverage and bitmap strike indexes. They are rebuilt on next use."""
+    _cached_coverage.cache_clear()
+    _cached_strike_sizes.cache_clear()
+
+
+def get_bitmap_strike_sizes(font_path):
+    """Return the cached bitmap strike sizes of a font, or an empty tuple for scalable or unreadable fonts."""
+    try:
+        stat = os.stat(font_path)
+        return _cached_strike_sizes(os.path.abspath(font_path), stat.st_mtime_ns, stat.st_size)
+    except (OSError, ValueError):
+        return ()
+
+
+def get_font_coverage(font_path):
+    """
+    Return the cached cmap coverage index for a font, or None when it cannot be read.
+
+    Args:
+        font_path (str): Path to the font file.
+
+    Returns:
+        frozenset or None: Mapped codepoints.
+    """
+    try:
+        stat = os.stat(font_path)
+        return _cached_coverage(os.path.abspath(font_path), stat.st_mtime_ns, stat.st_size)
+    except (OSError, ValueError):
+        return None
+
+
+def get_required_codepoints(emoji):
+    """Return the codepoints of an emoji sequence that a font must map."""
+    return {ord(character) for character in emoji} - IGNORED_CODEPOINTS
+
+
+def select_font_for_emoji(emoji, font_paths):
+    """
+    Route an emoji to the first font in the chain that covers all of its codepoints.
+
+    Fonts whose coverage cannot be read are treated as covering the emoji, so
+    unreadable cmap tables never block rendering.
+
+    Args:
+        emoji (str): Emoji sequence.
+        font_paths (tuple): Ordered font fallback chain.
+
+    Returns:
+        tuple: (font_path, missing) where font_path is None when no single font
+        covers the emoji, and missing holds the codepoints no font in the chain maps.
+    """
+    required = get_required_codepoints(emoji)
+    covered = set()
+    for font_path in font_paths:
+        coverage = get_font_coverage(font_path)
+        if coverage is None or required <= coverage:
+            return font_path, set()
+        covered.update(coverage)
+    return None, required - covered
+
+
+def format_codepoints(codepoints):
+    """Format codepoints as a sorted, readable U+XXXX list."""
+    return ", ".join(f"U+{codepoint:04X}" for codepoint in sorted(codepoints))
@@ -0,0 +1,162 @@
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+# If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/
+#
+# Original Author: Sergio Palma Hidalgo
+# Project URL: https://github.com/del-Pacifico/unicode-to-png
+# Copyright (c) 2025 Sergio Palma Hidalgo
+# All rights reserved.
+#
+"""Append-only checkpoint journal helpers for resumable Unicode to PNG runs."""
+
+import hashlib
+import json
+import os
+
+from .logging_utils import log
+
+JOURNAL_VERSION = 1
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def prepare_journal_path(base_dir, folder_name, shard=None):
+    """
+    Prepare the full path to a run journal and ensure the manifest directory exists.
+
+    Args:
+        base_dir (str): Project base directory.
+        folder_name (str): Sanitized output folder base name.
+        shard (tuple): Optional (index, count) of a sharded run.
+
+    Returns:
+        str or None: Journal path, or None when the directory cannot be created.
+    """
+    manifest_dir = os.path.join(base_dir, "manifest")
+    try:
+        os.makedirs(manifest_dir, exist_ok=True)
+    except OSError:
+        return None
+
+    suffix = f"_shard{shard[0]}of{shard[1]}" if shard else ""
+    return os.path.join(manifest_dir, f"{folder_name}{suffix}.journal")
+
+
+def hash_bytes(data):
+    """Return the SHA-256 hex digest of in-memory data."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_file(file_path):
+    """Return the SHA-256 hex digest of a file, or None when it cannot be read."""
+    digest = hashlib.sha256()
+    try:
+        with open(file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+                digest.update(chunk)
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+
+def load_journal(journal_path, parameters):
+    """
+    Load completed output records from a run journal.
+
+    The first line holds the render parameters of the run. Every following line
+    records one completed output. A truncated last line from a crash is ignored.
+
+    Args:
+        journal_path (str): Journal file path.
+        parameters (dict): Render parameters of the current run.
+
+    Returns:
+        tuple: (records, warnings) where records maps output paths to their journal record.
+    """
+    try:
+        with open(journal_path, "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+    except FileNotFoundError:
+        return {}, ["No checkpoint journal was found. The run will start from the first entry."]
+    except OSError as error:
+        return {}, [f"Checkpoint journal could not be read. The run will start from the first entry. Detail: {error}"]
+
+    try:
+        header = json.loads(lines[0]) if lines else {}
+    except ValueError:
+        header = {}
+    if header.get("journal_version") != JOURNAL_VERSION or header.get("parameters") != parameters:
+        return {}, ["Checkpoint journal was written with different render parameters. Every output will be rendered again."]
+
+    records = {}
+    skipped_lines = 0
+    for line in lines[1:]:
+        try:
+            record = json.loads(line)
+            records[record["path"]] = record
+        except (ValueError, KeyError, TypeError):
+            skipped_lines += 1
+
+    warnings = []
+    if skipped_lines:
+        warnings.append(f"Skipped {skipped_lines} incomplete checkpoint journal line(s).")
+    return records, warnings
+
+
+def verify_journal_records(records, base_dir):
+    """
+    Check that journaled outputs still exist with their recorded SHA-256 hash.
+
+    Returns:
+        tuple: (verified, failed) where verified maps paths to records and failed lists paths.
+    """
+    verified = {}
+    failed = []
+    for path, record in records.items():
+        if hash_file(os.path.join(base_dir, path)) == record.get("sha256"):
+            verified[path] = record
+        else:
+            failed.append(path)
+    return verified, failed
+
+
+def open_journal(journal_path, parameters, records=()):
+    """
+    Start a journal with the run parameters and the already verified records.
+
+    The compacted journal is written to a temporary file and moved into place,
+    so an interrupted start never loses the previous checkpoint.
+
+    Args:
+        journal_path (str): Journal file path.
+        parameters (dict): Render parameters of the current run.
+        records (iterable): Verified records carried over from a resumed run.
+
+    Returns:
+        file: Journal handle opened for appending.
+    """
+    temp_path = f"{journal_path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        f.write(json.dumps({"journal_version": JOURNAL_VERSION, "parameters": parameters}, ensure_ascii=False) + "\n")
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, journal_path)
+    return open(journal_path, "a", encoding="utf-8")
+
+
+def append_journal_record(journal_file, record):
+    """Append one completed output and force it to disk before the next output starts."""
+    journal_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+    journal_file.flush()
+    os.fsync(journal_file.fileno())
+
+
+def record_journal_output(journal_file, record, log_entries, quiet):
+    """Append a completed output to the checkpoint journal when the journal is open."""
+    if journal_file is None:
+        return
+    try:
+        append_journal_record(journal_file, record)
+    except OSError as journal_error:
+        log(f"Checkpoint journal could not be updated. {record['path']} will be rendered again on resume.", log_entries, quiet=quiet, level="WARNING", detail=str(journal_error))
@@ -0,0 +1,177 @@
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+# If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/
+#
+# Original Author: Sergio Palma Hidalgo
+# Project URL: https://github.com/del-Pacifico/unicode-to-png
+# Copyright (c) 2025 Sergio Palma Hidalgo
+# All rights reserved.
+#
+"""Advisory file locks that let several CLI processes share one output root.
+
+Locks are taken with fcntl.flock on Linux and macOS and msvcrt.locking on
+Windows. The operating system releases them when a process exits, so a
+crashed run never leaves a folder locked. They are advisory: only processes
+that take the same lock are kept apart.
+"""
+
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+LOCK_DIR_NAME = ".locks"
+DEFAULT_LOCK_TIMEOUT = 10.0
+LOCK_POLL_INTERVAL = 0.05
+
+
+def get_lock_path(root, name):
+    """Return the lock file path of an output folder or run name inside an output root."""
+    return os.path.join(root, LOCK_DIR_NAME, f"{name}.lock")
+
+
+def _try_lock(file_descriptor):
+    try:
+        if fcntl is not None:
+            fcntl.flock(file_descriptor, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(file_descriptor, msvcrt.LK_NBLCK, 1)
+    except OSError:
+        return False
+    return True
+
+
+def _unlock(file_descriptor):
+    if fcntl is not None:
+        fcntl.flock(file_descriptor, fcntl.LOCK_UN)
+    else:
+        os.lseek(file_descriptor, 0, os.SEEK_SET)
+        msvcrt.locking(file_descriptor, msvcrt.LK_UNLCK, 1)
+
+
+class FileLock:
+    """
+    Exclusive advisory lock on one lock file.
+
+    The lock file is removed on release so lock directories do not fill up.
+    Because another process may open the file just before it is removed,
+    acquire(...) checks that the file it locked is still the one on disk and
+    retries otherwise.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file_descriptor = None
+
+    @property
+    def locked(self):
+        """True while this object holds the lock."""
+        return self._file_descriptor is not None
+
+    def acquire(self, timeout=0.0):
+        """
+        Take the lock, waiting at most timeout seconds for another holder to release it.
+
+        Args:
+            timeout (float): Seconds to wait. 0 tries once.
+
+        Returns:
+            bool: True when the lock is held, False when it is still held elsewhere after timeout.
+
+        Raises:
+            OSError: The lock file could not be created.
+        """
+        if self.locked:
+            return True
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        deadline = time.monotonic() + max(0.0, timeout)
+        while True:
+            file_descriptor = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o666)
+            if _try_lock(file_descriptor):
+                try:
+                    same_file = os.path.samestat(os.fstat(file_descriptor), os.stat(self.path))
+                except OSError:
+                    same_file = False
+                if same_file:
+                    self._file_descriptor = file_descriptor
+                    return True
+                # The previous holder removed the file after it was opened here.
+                _unlock(file_descriptor)
+                os.close(file_descriptor)
+                continue
+
+            os.close(file_descriptor)
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(LOCK_POLL_INTERVAL)
+
+    def release(self):
+        """Remove the lock file and release the lock. Releasing an unheld lock does nothing."""
+        if not self.locked:
+            return
+        file_descriptor, self._file_descriptor = self._file_descriptor, None
+        try:
+            # Removed while still locked, so a waiting process never locks a file that is about to disappear.
+            os.remove(self.path)
+        except OSError:
+            # Windows does not remove open files. The next holder reuses the file.
+            pass
+        try:
+            _unlock(file_descriptor)
+        finally:
+            os.close(file_descriptor)
+
+
+class FolderLocks:
+    """
+    Advisory locks for the output folders of one run.
+
+    Each folder is locked while its entry is written and released when the
+    entry finishes, so processes that share the output root only wait for
+    each other when they write the same folder.
+    """
+
+    def __init__(self, root, timeout=DEFAULT_LOCK_TIMEOUT):
+        self.root = root
+        self.timeout = timeout
+        self._locks = {}
+        self._guard = threading.Lock()
+
+    def acquire(self, folder_name):
+        """
+        Lock one output folder.
+
+        Returns:
+            bool: True when the folder is locked by this run, False when another process held it for the whole timeout.
+
+        Raises:
+            OSError: The lock file could not be created.
+        """
+        with self._guard:
+            if folder_name in self._locks:
+                return True
+        lock = FileLock(get_lock_path(self.root, folder_name))
+        if not lock.acquire(self.timeout):
+            return False
+        with self._guard:
+            self._locks[folder_name] = lock
+        return True
+
+    def release(self, folder_name):
+        """Release the lock of one output folder, if this run holds it."""
+        with self._guard:
+            lock = self._locks.pop(folder_name, None)
+        if lock is not None:
+            lock.release()
+
+    def release_all(self):
+        """Release every folder lock still held, for example after an aborted run."""
+        with self._guard:
+            folder_names = list(self._locks)
+        for folder_name in folder_names:
+            self.release(folder_name)
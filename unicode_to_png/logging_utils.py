@@ -9,8 +9,25 @@
 #
 """Console and file logging helpers for the Unicode to PNG CLI."""
 
-from datetime import datetime
+from datetime import datetime, timedelta
+import queue
+import re
 import sys
+import threading
+import time
+
+DEFAULT_LOG_BUFFER_SIZE = 64 * 1024
+# Seconds between progress line redraws on a terminal.
+DEFAULT_PROGRESS_INTERVAL = 0.1
+# Redirected output gets one line per redraw, so it is redrawn less often.
+REDIRECTED_PROGRESS_INTERVAL = 1.0
+
+# Pipeline stages print from several threads; one lock keeps console lines whole.
+_CONSOLE_LOCK = threading.Lock()
+# The progress line being shown, if any. Console messages are printed above it.
+_active_progress = None
+# A formatted log line: "[timestamp] [LEVEL] message".
+LOG_LINE_PATTERN = re.compile(r"^\[[^\]]*\] \[([A-Z]+)\] (.*)$", re.DOTALL)
 
 
 def configure_console_output():
@@ -26,12 +43,18 @@ def configure_console_output():
 
 def safe_print(message="", **kwargs):
     """Print text without crashing on legacy Windows console encodings."""
-    try:
-        print(message, **kwargs)
-    except UnicodeEncodeError:
-        encoding = getattr(sys.stdout, "encoding", None) or "utf-8"
-        safe_message = str(message).encode(encoding, errors="replace").decode(encoding, errors="replace")
-        print(safe_message, **kwargs)
+    with _CONSOLE_LOCK:
+        progress = _active_progress
+        if progress is not None:
+            progress._clear()
+        try:
+            print(message, **kwargs)
+        except UnicodeEncodeError:
+            encoding = getattr(sys.stdout, "encoding", None) or "utf-8"
+            safe_message = str(message).encode(encoding, errors="replace").decode(encoding, errors="replace")
+            print(safe_message, **kwargs)
+        if progress is not None:
+            progress._restore()
 
 
 def console_message(level, message):
@@ -40,17 +63,125 @@ def console_message(level, message):
 
 
 def log(message, log_entries, quiet=False, level="INFO", detail=None):
-    """Record a log message and print it to the console unless quiet mode is enabled."""
+    """
+    Record a log message and print it to the console unless quiet mode is enabled.
+
+    While a progress line is shown, INFO and DEBUG messages are only recorded.
+    Warnings and errors are still printed immediately.
+    """
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     normalized_level = level.upper()
     line = f"[{timestamp}] [{normalized_level}] {message}"
     if detail:
         line = f"{line} Detail: {detail}"
-    if not quiet:
+    if _should_print(normalized_level, quiet):
         safe_print(console_message(normalized_level, message))
     log_entries.append(line)
 
 
+def _should_print(level, quiet):
+    return not quiet and not (_active_progress is not None and level in ("INFO", "DEBUG"))
+
+
+def relay_log_lines(lines, log_entries, quiet=False):
+    """
+    Record log lines collected in a worker process and print them as log(...) would have.
+
+    Workers log with quiet=True into a list, which is sent back to the parent
+    with the result, so console output stays in one process.
+    """
+    for line in lines:
+        match = LOG_LINE_PATTERN.match(line)
+        if match and _should_print(match.group(1), quiet):
+            safe_print(console_message(match.group(1), match.group(2).split(" Detail: ", 1)[0]))
+        log_entries.append(line)
+
+
+def format_progress(done, total, elapsed, unit="emoji"):
+    """Return a progress status line such as "[utp] - PROGRESS - 12/30 emoji (40%), 3.5 emoji/s, ETA 0:00:05"."""
+    rate = done / elapsed if elapsed > 0 else 0.0
+    percent = done * 100 // total if total else 100
+    eta = str(timedelta(seconds=round((total - done) / rate))) if rate > 0 else "--:--:--"
+    return console_message("PROGRESS", f"{done}/{total} {unit} ({percent}%), {rate:.1f} {unit}/s, ETA {eta}")
+
+
+class ProgressLine:
+    """
+    Single console status line that replaces the per-icon INFO lines.
+
+    advance(...) redraws the line at most once per interval, so a large batch
+    costs a few console writes per second instead of several per icon. While
+    the line is active, log(...) keeps INFO and DEBUG messages out of the
+    console, and safe_print(...) clears the line, prints the message, and draws
+    the line again below it. Redirected output gets one plain line per redraw.
+    """
+
+    def __init__(self, total, unit="emoji", interval=DEFAULT_PROGRESS_INTERVAL, stream=None, clock=time.monotonic):
+        self.total = total
+        self.unit = unit
+        self.done = 0
+        self.stream = stream if stream is not None else sys.stdout
+        self.clock = clock
+        isatty = getattr(self.stream, "isatty", None)
+        self.overwrite = bool(isatty and isatty())
+        self.interval = interval if self.overwrite else max(interval, REDIRECTED_PROGRESS_INTERVAL)
+        self.started = None
+        self._last_draw = None
+        self._width = 0
+
+    def start(self):
+        """Show the line and route console messages around it."""
+        global _active_progress
+        with _CONSOLE_LOCK:
+            self.started = self.clock()
+            _active_progress = self
+            self._draw()
+        return self
+
+    def advance(self, count=1):
+        """Count finished units and redraw the line when the interval has passed."""
+        with _CONSOLE_LOCK:
+            self.done += count
+            if self._last_draw is None or self.clock() - self._last_draw >= self.interval:
+                self._draw()
+
+    def close(self):
+        """Draw the final state and give the console back to log(...)."""
+        global _active_progress
+        with _CONSOLE_LOCK:
+            if _active_progress is not self:
+                return
+            self._draw()
+            if self.overwrite:
+                self._write("\n")
+                self._width = 0
+            _active_progress = None
+
+    def _write(self, text):
+        try:
+            self.stream.write(text)
+            self.stream.flush()
+        except (OSError, ValueError):
+            pass
+
+    def _draw(self):
+        self._last_draw = self.clock()
+        text = format_progress(self.done, self.total, self._last_draw - self.started, self.unit)
+        if self.overwrite:
+            self._write("\r" + text.ljust(self._width))
+            self._width = len(text)
+        else:
+            self._write(text + "\n")
+
+    def _clear(self):
+        if self.overwrite and self._width:
+            self._write("\r" + " " * self._width + "\r")
+
+    def _restore(self):
+        if self.overwrite and self._width:
+            self._draw()
+
+
 def write_log_if_needed(log_entries, log_file):
     """Write collected log entries to file when entries exist."""
     if not log_entries:
@@ -69,3 +200,102 @@ def write_log_if_needed(log_entries, log_file):
         return False
 
     return True
+
+
+class RunLog:
+    """
+    Run-scoped log that writes every entry through one buffered file handle.
+
+    RunLog exposes append(...), so it can be passed to log(...) wherever a list
+    of log entries is accepted. With background=True a writer thread performs
+    the file I/O so rendering never waits on the disk.
+    """
+
+    def __init__(self, log_file, background=False, buffer_size=DEFAULT_LOG_BUFFER_SIZE):
+        self.log_file = log_file
+        self.entry_count = 0
+        self.error = None
+        self._handle = None
+        self._queue = None
+        self._thread = None
+        # Pipeline stages log from several threads; the lock keeps file lines whole.
+        self._lock = threading.Lock()
+
+        if log_file:
+            try:
+                self._handle = open(log_file, "a", encoding="utf-8", buffering=buffer_size)
+            except OSError as error:
+                self.error = error
+
+        if self._handle is not None and background:
+            self._queue = queue.SimpleQueue()
+            self._thread = threading.Thread(target=self._drain, name="utp-log-writer", daemon=True)
+            self._thread.start()
+
+    def append(self, line):
+        """Record one formatted log line."""
+        with self._lock:
+            self.entry_count += 1
+            if self._queue is not None:
+                self._queue.put(line)
+            elif self._handle is not None:
+                self._write(line)
+
+    def _write(self, line):
+        try:
+            self._handle.write(line + "\n")
+        except OSError as error:
+            self.error = error
+
+    def _drain(self):
+        while True:
+            line = self._queue.get()
+            if line is None:
+                return
+            self._write(line)
+
+    def close(self):
+        """Flush pending entries and close the file. Returns True when every entry was persisted."""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+            self._queue = None
+
+        if self._handle is not None:
+            try:
+                self._handle.close()
+            except OSError as error:
+                self.error = error
+            self._handle = None
+
+        if self.entry_count and not self.log_file:
+            safe_print(console_message("WARNING", "Log file path is unavailable. Runtime log entries were not persisted."))
+            return False
+        if self.error is not None:
+            safe_print(console_message("WARNING", f"Failed to write runtime log file: {self.log_file}."))
+            safe_print(console_message("WARNING", f"Log persistence error detail: {self.error}"))
+            self.error = None
+            return False
+        return True
+
+
+class LogView:
+    """
+    Log collector for one batch entry that writes to the run log.
+
+    Run log lines are tagged with the entry label. When entries is a list, the
+    untagged lines are also kept there for an optional per-entry log file.
+    """
+
+    def __init__(self, run_log, label, entries=None):
+        self.run_log = run_log
+        self.label = label
+        self.entries = entries
+
+    def append(self, line):
+        """Record one formatted log line in the run log and the optional entry list."""
+        parts = line.split("] ", 2)
+        self.run_log.append(f"{parts[0]}] {parts[1]}] [{self.label}] {parts[2]}" if len(parts) == 3 else line)
+        if self.entries is not None:
+            self.entries.append(line)
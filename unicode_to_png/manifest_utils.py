@@ -0,0 +1,167 @@
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+# If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/
+#
+# Original Author: Sergio Palma Hidalgo
+# Project URL: https://github.com/del-Pacifico/unicode-to-png
+# Copyright (c) 2025 Sergio Palma Hidalgo
+# All rights reserved.
+#
+"""Run manifest helpers for Unicode to PNG."""
+
+from datetime import datetime
+import glob
+import json
+import os
+import re
+
+from .output_utils import write_file_atomic
+
+MANIFEST_VERSION = 1
+SHARD_MANIFEST_PATTERN = re.compile(r"_shard(\d+)of(\d+)\.json$")
+
+
+def prepare_manifest_path(base_dir, folder_name, shard=None):
+    """
+    Prepare the full path to a run manifest and ensure the manifest directory exists.
+
+    Args:
+        base_dir (str): Project base directory.
+        folder_name (str): Sanitized output folder base name.
+        shard (tuple): Optional (index, count) of a sharded run.
+
+    Returns:
+        str or None: Manifest path, or None when the directory cannot be created.
+    """
+    manifest_dir = os.path.join(base_dir, "manifest")
+    try:
+        os.makedirs(manifest_dir, exist_ok=True)
+    except OSError:
+        return None
+
+    suffix = f"_shard{shard[0]}of{shard[1]}" if shard else ""
+    return os.path.join(manifest_dir, f"{folder_name}{suffix}.json")
+
+
+def get_manifest_relative_path(path, base_dir):
+    """Return a path relative to the project base directory with forward slashes."""
+    return os.path.relpath(path, base_dir).replace(os.sep, "/")
+
+
+def build_manifest(folder_name, version, started_at, entries, parameters, shard=None, log_file=None, pipeline=None, status="completed"):
+    """
+    Build the manifest document for one run.
+
+    Args:
+        folder_name (str): Sanitized output folder base name.
+        version (str): Tool version that produced the outputs.
+        started_at (str): ISO timestamp of the run start.
+        entries (list): One entry per batch item, each listing its output file records.
+        parameters (dict): Render parameters shared by every output of the run.
+        shard (tuple): Optional (index, count) of a sharded run.
+        log_file (str): Run log path relative to the project base directory.
+        pipeline (dict): Optional queue size and per-stage counters of the run.
+        status (str): "completed", "running" for a checkpoint, or "aborted" for a run stopped early.
+
+    Returns:
+        dict: JSON-serializable manifest.
+    """
+    return {
+        "manifest_version": MANIFEST_VERSION,
+        "tool_version": version,
+        "folder": folder_name,
+        "shard": f"{shard[0]}/{shard[1]}" if shard else None,
+        "status": status,
+        "started_at": started_at,
+        "finished_at": datetime.now().isoformat(timespec="seconds"),
+        "parameters": parameters,
+        "log_file": log_file,
+        "pipeline": pipeline,
+        "entries": entries,
+    }
+
+
+def write_manifest(manifest, manifest_path):
+    """Write a manifest as UTF-8 JSON through an atomic replace. Returns True on success."""
+    content = json.dumps(manifest, ensure_ascii=False, indent=2) + "\n"
+    try:
+        write_file_atomic(manifest_path, content.encode("utf-8"))
+    except OSError:
+        return False
+    return True
+
+
+def load_manifest(manifest_path):
+    """Load a manifest file. Returns None when it is missing or not valid JSON."""
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def find_shard_manifests(base_dir, folder_name):
+    """
+    Find the per-shard manifests written for an output folder.
+
+    Returns:
+        list: (index, count, path) tuples sorted by shard count and index.
+    """
+    pattern = os.path.join(base_dir, "manifest", f"{glob.escape(folder_name)}_shard*of*.json")
+    shard_manifests = []
+    for manifest_path in glob.glob(pattern):
+        match = SHARD_MANIFEST_PATTERN.search(manifest_path)
+        if match:
+            shard_manifests.append((int(match.group(1)), int(match.group(2)), manifest_path))
+    return sorted(shard_manifests, key=lambda item: (item[1], item[0]))
+
+
+def merge_shard_manifests(shard_manifests):
+    """
+    Combine per-shard manifests into one report.
+
+    Args:
+        shard_manifests (list): (index, count, manifest) tuples for one shard count.
+
+    Returns:
+        tuple: (merged, warnings) where merged holds combined entries and per-shard totals.
+    """
+    warnings = []
+    shard_count = shard_manifests[0][1]
+    present = {index for index, _, _ in shard_manifests}
+    missing = [index for index in range(1, shard_count + 1) if index not in present]
+    if missing:
+        warnings.append(f"Shard manifests are missing for shard(s) {', '.join(str(index) for index in missing)} of {shard_count}. The merged report is incomplete.")
+
+    parameters = shard_manifests[0][2].get("parameters")
+    if any(manifest.get("parameters") != parameters for _, _, manifest in shard_manifests):
+        warnings.append("Shard manifests were written with different render parameters. The parameters of the first shard are reported.")
+    unfinished = [index for index, _, manifest in shard_manifests if manifest.get("status", "completed") != "completed"]
+    if unfinished:
+        warnings.append(f"Shard(s) {', '.join(str(index) for index in unfinished)} of {shard_count} did not finish their run. The merged report is incomplete.")
+
+    entries = []
+    shards = []
+    for index, count, manifest in shard_manifests:
+        shard_entries = manifest.get("entries", [])
+        entries.extend(shard_entries)
+        shards.append({
+            "shard": f"{index}/{count}",
+            "status": manifest.get("status", "completed"),
+            "started_at": manifest.get("started_at"),
+            "finished_at": manifest.get("finished_at"),
+            "entries": len(shard_entries),
+            "files": sum(len(entry.get("files", [])) for entry in shard_entries),
+        })
+
+    merged = {
+        "manifest_version": MANIFEST_VERSION,
+        "folder": shard_manifests[0][2].get("folder"),
+        "shard_count": shard_count,
+        "missing_shards": missing,
+        "merged_at": datetime.now().isoformat(timespec="seconds"),
+        "parameters": parameters,
+        "shards": shards,
+        "entries": sorted(entries, key=lambda entry: entry.get("alias", "")),
+    }
+    return merged, warnings
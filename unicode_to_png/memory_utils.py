@@ -0,0 +1,135 @@
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+# If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/
+#
+# Original Author: Sergio Palma Hidalgo
+# Project URL: https://github.com/del-Pacifico/unicode-to-png
+# Copyright (c) 2025 Sergio Palma Hidalgo
+# All rights reserved.
+#
+"""Adaptive degradation of a run whose memory usage nears the --memlimit value."""
+
+from contextlib import contextmanager
+import gc
+import threading
+
+from .badge_utils import rasterize_badge
+from .font_utils import clear_font_caches
+from .render_utils import clear_shaping_cache
+
+# Degradation starts at this fraction of the memory limit.
+MEMORY_SOFT_RATIO = 0.85
+# Memory checks to wait after a step before the next one, so freed memory can show up in the usage.
+MEMORY_SETTLE_CHECKS = 8
+
+
+class MemoryLimitExceeded(RuntimeError):
+    """Raised by a pipeline stage when process memory exceeds --memlimit."""
+
+    def __init__(self, memory_mb):
+        super().__init__(f"Memory usage exceeded the configured limit: {memory_mb:.1f} MB.")
+        self.memory_mb = memory_mb
+
+
+def clear_render_caches():
+    """Drop the font indexes, shaping results, and badge rasters, then collect garbage so the memory can be reused."""
+    clear_font_caches()
+    clear_shaping_cache()
+    rasterize_badge.cache_clear()
+    gc.collect()
+
+
+class MemoryGovernor:
+    """
+    Step-by-step response to memory pressure instead of an immediate abort.
+
+    check(...) is called with the current usage between renders. Above the
+    soft limit it takes the next step, one at a time:
+
+    1. Evict the font, shaping, and badge caches.
+    2. Rasterize one size at a time.
+    3. Halve the maximum supersampling factor, down to 1x, once per step.
+
+    Between steps it waits MEMORY_SETTLE_CHECKS checks unless the hard limit
+    is already crossed. Only when usage is over the hard limit and no step is
+    left does check(...) report that the run must abort.
+    """
+
+    def __init__(self, limit_mb, max_scale_factor, parallelism=1, soft_ratio=MEMORY_SOFT_RATIO, clear_caches=clear_render_caches):
+        self.limit_mb = limit_mb
+        self.soft_limit_mb = limit_mb * soft_ratio
+        self.max_scale_factor = max_scale_factor
+        self.parallelism = max(1, parallelism)
+        self.clear_caches = clear_caches
+        self.steps = []
+        self._caches_evicted = False
+        self._checks_since_step = MEMORY_SETTLE_CHECKS
+        self._lock = threading.Lock()
+        self._slots = threading.Condition()
+        self._active_renders = 0
+
+    def _next_step(self):
+        if not self._caches_evicted:
+            return "evict_caches"
+        if self.parallelism > 1:
+            return "reduce_parallelism"
+        if self.max_scale_factor > 1:
+            return "reduce_supersampling"
+        return None
+
+    def _apply(self, step, usage_mb):
+        prefix = f"Memory usage {usage_mb:.1f} MB is {'over' if usage_mb > self.limit_mb else 'near'} the {self.limit_mb} MB limit."
+        if step == "evict_caches":
+            self.clear_caches()
+            self._caches_evicted = True
+            return f"{prefix} Font, shaping, and badge caches were cleared."
+        if step == "reduce_parallelism":
+            with self._slots:
+                self.parallelism = 1
+            return f"{prefix} Rasterization now runs one size at a time."
+        self.max_scale_factor = max(1, self.max_scale_factor // 2)
+        return f"{prefix} Maximum supersampling factor reduced to {self.max_scale_factor}x for the remaining sizes."
+
+    def check(self, usage_mb):
+        """
+        Take the next degradation step when usage requires it.
+
+        Args:
+            usage_mb (float): Current process memory usage in MB.
+
+        Returns:
+            tuple or None: (step, message) when a step was taken, ("abort", message)
+            when the run must stop, or None when nothing changed.
+        """
+        with self._lock:
+            self._checks_since_step += 1
+            if usage_mb < self.soft_limit_mb:
+                return None
+
+            over_limit = usage_mb > self.limit_mb
+            step = self._next_step()
+            if step is None:
+                if over_limit:
+                    return "abort", f"Memory usage exceeded configured limit: {usage_mb:.1f} MB > {self.limit_mb} MB after every degradation step."
+                return None
+            if not over_limit and self._checks_since_step < MEMORY_SETTLE_CHECKS:
+                return None
+
+            message = self._apply(step, usage_mb)
+            self.steps.append(step)
+            self._checks_since_step = 0
+            return step, message
+
+    @contextmanager
+    def render_slot(self):
+        """Hold one of the parallel render slots while a canvas is drawn."""
+        with self._slots:
+            while self._active_renders >= self.parallelism:
+                self._slots.wait()
+            self._active_renders += 1
+        try:
+            yield
+        finally:
+            with self._slots:
+                self._active_renders -= 1
+                self._slots.notify()
@@ -0,0 +1,256 @@
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+# If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/
+#
+# Original Author: Sergio Palma Hidalgo
+# Project URL: https://github.com/del-Pacifico/unicode-to-png
+# Copyright (c) 2025 Sergio Palma Hidalgo
+# All rights reserved.
+#
+"""OpenMetrics counters, gauges, and histograms for Unicode to PNG runs."""
+
+import math
+import os
+import sys
+import threading
+
+from .output_utils import write_file_atomic
+
+# Render latency buckets in seconds, from small chrome sizes to 2048px store icons.
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+ICON_RESULTS = ("rendered", "skipped", "failed", "timed_out")
+
+# Metric families of a generation run: name, type, help text.
+RUN_METRICS = (
+    ("utp_icons", "counter", "Icon sizes by render result."),
+    ("utp_render_seconds", "histogram", "Rasterize and resize latency per icon size and Unicode structure."),
+    ("utp_fit_attempts", "counter", "Font sizes measured while fitting scalable fonts to the canvas."),
+    ("utp_edge_contacts", "counter", "Resized icons reported by the edge check."),
+    ("utp_files_written", "counter", "Output files written by format."),
+    ("utp_bytes_written", "counter", "Encoded bytes written by format."),
+    ("utp_peak_rss_bytes", "gauge", "Peak resident set size of the process."),
+    ("utp_run_seconds", "gauge", "Elapsed time of the run."),
+)
+
+
+def get_peak_rss_bytes():
+    """
+    Return the peak resident set size of the current process in bytes.
+
+    Uses the resource module on Linux and macOS and the optional psutil
+    package elsewhere.
+
+    Returns:
+        int or None: Peak RSS, or None when it cannot be measured.
+    """
+    try:
+        import resource
+    except ImportError:
+        resource = None
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # macOS reports bytes, Linux reports kilobytes.
+        return int(peak if sys.platform == "darwin" else peak * 1024)
+
+    try:
+        import psutil
+
+        memory_info = psutil.Process(os.getpid()).memory_info()
+        return int(getattr(memory_info, "peak_wset", memory_info.rss))
+    except Exception:
+        return None
+
+
+def _format_value(value):
+    if isinstance(value, float):
+        if math.isinf(value):
+            return "+Inf" if value > 0 else "-Inf"
+        return repr(value)
+    return str(value)
+
+
+def _escape_label_value(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape_label_value(value)}"' for name, value in pairs) + "}"
+
+
+class MetricsRegistry:
+    """
+    Thread-safe metric families rendered in the OpenMetrics text format.
+
+    Families are declared once with describe(...). Samples are keyed by their
+    label values, so pipeline workers can update the same registry.
+    """
+
+    def __init__(self, buckets=DEFAULT_LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._families = {}
+        self._lock = threading.Lock()
+
+    def describe(self, name, metric_type, help_text):
+        """Declare a counter, gauge, or histogram family."""
+        if metric_type not in ("counter", "gauge", "histogram"):
+            raise ValueError(f"Unsupported metric type: {metric_type}.")
+        with self._lock:
+            self._families.setdefault(name, {"type": metric_type, "help": help_text, "samples": {}})
+
+    def _sample(self, name, metric_type, labels):
+        family = self._families.get(name)
+        if family is None or family["type"] != metric_type:
+            raise KeyError(f"Metric {name} is not a declared {metric_type}.")
+        return family["samples"], tuple(sorted(labels.items()))
+
+    def inc(self, name, amount=1, **labels):
+        """Add a non-negative amount to a counter."""
+        if amount < 0:
+            raise ValueError("Counters can only increase.")
+        with self._lock:
+            samples, key = self._sample(name, "counter", labels)
+            samples[key] = samples.get(key, 0) + amount
+
+    def set(self, name, value, **labels):
+        """Set a gauge."""
+        with self._lock:
+            samples, key = self._sample(name, "gauge", labels)
+            samples[key] = value
+
+    def observe(self, name, value, **labels):
+        """Record one observation in a histogram."""
+        with self._lock:
+            samples, key = self._sample(name, "histogram", labels)
+            sample = samples.setdefault(key, {"buckets": [0] * len(self.buckets), "count": 0, "sum": 0.0})
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    sample["buckets"][index] += 1
+            sample["count"] += 1
+            sample["sum"] += value
+
+    def get_value(self, name, **labels):
+        """Return the current value of a counter or gauge sample, or the count of a histogram sample."""
+        with self._lock:
+            family = self._families[name]
+            value = family["samples"].get(tuple(sorted(labels.items())))
+        if isinstance(value, dict):
+            return value["count"]
+        return value
+
+    def render(self):
+        """
+        Render every family in the OpenMetrics text format.
+
+        Returns:
+            str: Exposition text terminated by "# EOF".
+        """
+        lines = []
+        with self._lock:
+            for name, family in self._families.items():
+                lines.append(f"# TYPE {name} {family['type']}")
+                lines.append(f"# HELP {name} {family['help']}")
+                for labels, value in sorted(family["samples"].items()):
+                    if family["type"] == "counter":
+                        lines.append(f"{name}_total{_format_labels(labels)} {_format_value(value)}")
+                    elif family["type"] == "gauge":
+                        lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+                    else:
+                        for bound, bucket_count in zip(self.buckets, value["buckets"]):
+                            lines.append(f"{name}_bucket{_format_labels(labels, (('le', _format_value(float(bound))),))} {bucket_count}")
+                        lines.append(f"{name}_bucket{_format_labels(labels, (('le', '+Inf'),))} {value['count']}")
+                        lines.append(f"{name}_count{_format_labels(labels)} {value['count']}")
+                        lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(float(value['sum']))}")
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+
+def create_run_metrics(image_formats=()):
+    """
+    Create a registry with the metric families of one generation run.
+
+    Icon result counters and the per-format file and byte counters start at
+    zero so dashboards see every series from the first scrape.
+
+    Args:
+        image_formats (tuple): Output formats of the run.
+
+    Returns:
+        MetricsRegistry: Registry with RUN_METRICS declared.
+    """
+    metrics = MetricsRegistry()
+    for name, metric_type, help_text in RUN_METRICS:
+        metrics.describe(name, metric_type, help_text)
+    for result in ICON_RESULTS:
+        metrics.inc("utp_icons", 0, result=result)
+    metrics.inc("utp_fit_attempts", 0)
+    metrics.inc("utp_edge_contacts", 0)
+    for image_format in image_formats:
+        metrics.inc("utp_files_written", 0, format=image_format)
+        metrics.inc("utp_bytes_written", 0, format=image_format)
+    return metrics
+
+
+def write_metrics_file(metrics, file_path):
+    """
+    Write the registry to a metrics file atomically.
+
+    Textfile collectors may read the file at any moment, so it is replaced in
+    one step and never observed half-written.
+
+    Args:
+        metrics (MetricsRegistry): Registry to render.
+        file_path (str): Target file, such as a .prom file in the collector directory.
+
+    Raises:
+        OSError: The file cannot be written.
+    """
+    directory = os.path.dirname(os.path.abspath(file_path))
+    os.makedirs(directory, exist_ok=True)
+    write_file_atomic(file_path, metrics.render().encode("utf-8"))
+
+
+class MetricsFileWriter:
+    """
+    Write a metrics file at the end of a run and, optionally, every interval seconds.
+
+    The before_write callback runs before each write so gauges such as peak RSS
+    and elapsed time are current. Write errors are collected and never stop the run.
+    """
+
+    def __init__(self, metrics, file_path, interval=0, before_write=None):
+        self.metrics = metrics
+        self.file_path = file_path
+        self.interval = interval
+        self.before_write = before_write
+        self.errors = []
+        self._stopped = threading.Event()
+        self._thread = None
+        if interval and interval > 0:
+            self._thread = threading.Thread(target=self._run, name="utp-metrics", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            self.write()
+
+    def write(self):
+        """Refresh the gauges and write the metrics file once."""
+        try:
+            if self.before_write is not None:
+                self.before_write(self.metrics)
+            write_metrics_file(self.metrics, self.file_path)
+            return True
+        except OSError as write_error:
+            self.errors.append(str(write_error))
+            return False
+
+    def close(self):
+        """Stop periodic writes and write the final metrics file."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        return self.write()
@@ -0,0 +1,178 @@
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+# If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/
+#
+# Original Author: Sergio Palma Hidalgo
+# Project URL: https://github.com/del-Pacifico/unicode-to-png
+# Copyright (c) 2025 Sergio Palma Hidalgo
+# All rights reserved.
+#
+"""Output format and icon container helpers for Unicode to PNG."""
+
+import io
+import os
+import tempfile
+
+from .logging_utils import log
+
+IMAGE_FORMATS = ("png", "webp")
+DEFAULT_IMAGE_FORMAT = "png"
+IMAGE_SAVE_OPTIONS = {
+    "png": {"format": "PNG"},
+    "webp": {"format": "WEBP", "lossless": True},
+}
+ICO_MAX_SIZE = 256
+ICNS_SIZES = (32, 64, 128, 256, 512, 1024)
+CONTAINER_FORMATS = ("ico", "icns")
+
+
+def parse_format_list(format_string, supported, option_name):
+    """
+    Parse a comma-separated list of output format names.
+
+    Args:
+        format_string (str): Raw option value, e.g. "png,webp".
+        supported (tuple): Accepted format names in canonical order.
+        option_name (str): CLI option name used in warnings.
+
+    Returns:
+        tuple: (formats, warnings) where formats keeps the canonical order.
+    """
+    requested = set()
+    warnings = []
+    for entry_number, entry in enumerate(format_string.split(","), start=1):
+        token = entry.strip().lower()
+        if not token:
+            continue
+        if token not in supported:
+            warnings.append(f"Skipped {option_name} entry {entry_number} because '{token}' is not supported. Supported values: {', '.join(supported)}.")
+            continue
+        requested.add(token)
+    return tuple(name for name in supported if name in requested), warnings
+
+
+def get_container_sizes(container, icon_sizes):
+    """
+    Return the sizes a container stores, given the icon sizes of the run.
+
+    ICO files store every rendered size up to 256px. ICNS files always store
+    the fixed macOS set, so missing sizes must be rendered for the container.
+
+    Args:
+        container (str): Container format name ("ico" or "icns").
+        icon_sizes (tuple): Icon sizes selected for the run.
+
+    Returns:
+        tuple: Sorted sizes stored in the container.
+    """
+    if container == "ico":
+        return tuple(size for size in sorted(icon_sizes) if size <= ICO_MAX_SIZE)
+    if container == "icns":
+        return ICNS_SIZES
+    return ()
+
+
+def supports_image_format(image_format):
+    """Return True when the installed Pillow build can encode the image format."""
+    if image_format == "webp":
+        from PIL import features
+        return features.check("webp")
+    return True
+
+
+def encode_image(image, image_format):
+    """Encode an image in memory and return the encoded bytes."""
+    buffer = io.BytesIO()
+    image.save(buffer, **IMAGE_SAVE_OPTIONS[image_format])
+    return buffer.getvalue()
+
+
+def encode_image_formats(image, image_formats, executor=None):
+    """
+    Encode one resized image in every requested format.
+
+    Args:
+        image (PIL.Image): Resized icon image.
+        image_formats (tuple): Output image formats, e.g. ("png", "webp").
+        executor (ThreadPoolExecutor): Optional executor used to encode formats in parallel.
+
+    Returns:
+        dict: Encoded bytes keyed by image format, in request order.
+    """
+    if executor is None or len(image_formats) < 2:
+        return {image_format: encode_image(image, image_format) for image_format in image_formats}
+
+    # Image.save() stores encoder options on the image object, so each thread encodes its own copy.
+    futures = {image_format: executor.submit(encode_image, image.copy(), image_format) for image_format in image_formats}
+    return {image_format: future.result() for image_format, future in futures.items()}
+
+
+def write_file_atomic(file_path, data):
+    """
+    Write bytes to a temporary file in the target folder and move it into place.
+
+    Readers and crashes never observe a partially written file: the target path
+    holds either the previous file or the complete new one.
+
+    Args:
+        file_path (str): Final output path.
+        data (bytes): Complete file content.
+
+    Raises:
+        OSError: The temporary file cannot be written or moved into place.
+    """
+    directory, filename = os.path.split(os.path.abspath(file_path))
+    file_descriptor, temp_path = tempfile.mkstemp(prefix=f".{filename}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(file_descriptor, "wb") as temp_file:
+            temp_file.write(data)
+            temp_file.flush()
+            os.fsync(temp_file.fileno())
+        os.replace(temp_path, file_path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+def save_icon_containers(container_images, containers, icon_sizes, output_path, filename_prefix, log_entries, quiet):
+    """
+    Write multi-resolution icon containers from the in-memory resized images.
+
+    Args:
+        container_images (dict): Resized images keyed by output size.
+        containers (tuple): Container formats to write ("ico", "icns").
+        icon_sizes (tuple): Icon sizes selected for the run.
+        output_path (str): Output folder for the container files.
+        filename_prefix (str): Output filename prefix.
+        log_entries (list): Log collector
+        quiet (bool): Suppress console output
+
+    Returns:
+        list: Paths of the container files that were written.
+    """
+    written_paths = []
+    for container in containers:
+        sizes = [size for size in get_container_sizes(container, icon_sizes) if size in container_images]
+        if not sizes:
+            log(f"No rendered sizes are available for the {container.upper()} container. Container will be skipped.", log_entries, quiet=quiet, level="WARNING")
+            continue
+
+        images = [container_images[size] for size in sizes]
+        filename = f"{filename_prefix}.{container}"
+        file_path = os.path.join(output_path, filename)
+        buffer = io.BytesIO()
+        try:
+            if container == "ico":
+                images[-1].save(buffer, format="ICO", sizes=[(size, size) for size in sizes], append_images=images[:-1])
+            else:
+                images[-1].save(buffer, format="ICNS", append_images=images[:-1])
+            write_file_atomic(file_path, buffer.getvalue())
+            written_paths.append(file_path)
+            log(f"Icon container generated: {filename} ({', '.join(str(size) for size in sizes)}px).", log_entries, quiet=quiet)
+        except (OSError, ValueError) as e:
+            log(f"Failed to save icon container: {filename}.", log_entries, quiet=quiet, level="ERROR", detail=str(e))
+
+    return written_paths
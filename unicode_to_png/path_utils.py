@@ -27,6 +27,80 @@ def prepare_log_path(base_dir, folder_name):
     except OSError:
         return None
 
+    return get_log_path(log_dir, folder_name)
+
+
+def get_log_path(log_dir, folder_name):
+    """Return the dated log file path of a folder inside an existing log directory."""
     date_str = datetime.now().strftime("%Y%m%d")
-    log_filename = f"{date_str}_{folder_name}.log"
-    return os.path.join(log_dir, log_filename)
+    return os.path.join(log_dir, f"{date_str}_{folder_name}.log")
+
+
+class OutputInventory:
+    """
+    In-memory inventory of the output folders and files of one run.
+
+    The output root is listed once with os.scandir before rendering starts,
+    missing folders are created in one pass, and existence checks during the
+    run are answered from memory instead of one filesystem call per icon.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.folders = {}
+        self.root_writable = False
+
+    @classmethod
+    def scan(cls, root, folder_names):
+        """
+        List the output root once and the files of every requested folder that already exists.
+
+        Args:
+            root (str): Output root directory, for example the emojis folder.
+            folder_names (iterable): Output subfolder names of the run.
+
+        Returns:
+            OutputInventory: Inventory of the requested folders.
+        """
+        inventory = cls(root)
+        wanted = set(folder_names)
+        with os.scandir(root) as root_entries:
+            existing = [entry.name for entry in root_entries if entry.name in wanted and entry.is_dir()]
+        for folder_name in existing:
+            with os.scandir(os.path.join(root, folder_name)) as folder_entries:
+                inventory.folders[folder_name] = {entry.name for entry in folder_entries if entry.is_file()}
+        inventory.root_writable = os.access(root, os.W_OK)
+        return inventory
+
+    def prepare(self, folder_names):
+        """
+        Create every missing output folder in one pass.
+
+        Args:
+            folder_names (iterable): Output subfolder names of the run.
+
+        Returns:
+            dict: Error detail keyed by the folder names that could not be prepared.
+        """
+        errors = {}
+        for folder_name in dict.fromkeys(folder_names):
+            if folder_name in self.folders:
+                continue
+            if not self.root_writable:
+                errors[folder_name] = f"Output root is not writable: {self.root}"
+                continue
+            try:
+                os.makedirs(os.path.join(self.root, folder_name), exist_ok=True)
+            except OSError as folder_error:
+                errors[folder_name] = str(folder_error)
+                continue
+            self.folders[folder_name] = set()
+        return errors
+
+    def exists(self, folder_name, filename):
+        """Return True when the file was present at scan time or was added during the run."""
+        return filename in self.folders.get(folder_name, ())
+
+    def add(self, folder_name, filename):
+        """Record a file written during the run."""
+        self.folders.setdefault(folder_name, set()).add(filename)
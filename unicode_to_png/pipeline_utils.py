@@ -0,0 +1,230 @@
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+# If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/
+#
+# Original Author: Sergio Palma Hidalgo
+# Project URL: https://github.com/del-Pacifico/unicode-to-png
+# Copyright (c) 2025 Sergio Palma Hidalgo
+# All rights reserved.
+#
+"""Bounded multi-stage pipeline helpers for Unicode to PNG batch runs."""
+
+import queue
+import threading
+import time
+
+PIPELINE_STAGES = ("plan", "rasterize", "resize", "encode", "write")
+DEFAULT_QUEUE_SIZE = 4
+
+# Queue marker that tells one worker to exit after the items in front of it.
+_STOP = object()
+
+
+def parse_stage_workers(value, stage_names=PIPELINE_STAGES):
+    """
+    Parse per-stage worker counts such as "rasterize=2,encode=2".
+
+    Args:
+        value (str): Comma-separated stage=count pairs.
+        stage_names (tuple): Stages that accept a worker count.
+
+    Returns:
+        tuple: (workers, warnings) where workers maps every stage name to its worker count.
+    """
+    workers = dict.fromkeys(stage_names, 1)
+    warnings = []
+    for item in value.split(","):
+        item = item.strip()
+        if not item:
+            continue
+
+        name, separator, count = item.partition("=")
+        name = name.strip().lower()
+        if not separator or name not in workers:
+            warnings.append(f"Invalid --workers entry '{item}' was ignored. Use stage=count with stages: {', '.join(stage_names)}.")
+            continue
+
+        try:
+            count = int(count.strip())
+        except ValueError:
+            count = 0
+        if count < 1:
+            warnings.append(f"Invalid worker count in '{item}' was ignored. Worker counts must be 1 or higher.")
+            continue
+        workers[name] = count
+    return workers, warnings
+
+
+class PipelineStage:
+    """
+    One pipeline stage: a function applied to each item by a fixed number of worker threads.
+
+    The function receives one item and returns an iterable of items for the
+    next stage. An empty iterable drops the item and several items fan it out.
+    The return value of the last stage is ignored.
+    """
+
+    def __init__(self, name, function, workers=1):
+        self.name = name
+        self.function = function
+        self.workers = max(1, int(workers))
+        self.items = 0
+        self.busy_seconds = 0.0
+        self.blocked_seconds = 0.0
+        self.max_depth = 0
+        self.depth_total = 0
+        self.depth_samples = 0
+        self._lock = threading.Lock()
+
+    def get_stats(self, queue_size):
+        """Return the throughput and input queue depth counters of the stage."""
+        return {
+            "stage": self.name,
+            "workers": self.workers,
+            "items": self.items,
+            "busy_seconds": round(self.busy_seconds, 3),
+            "blocked_seconds": round(self.blocked_seconds, 3),
+            "queue_size": queue_size,
+            "max_depth": self.max_depth,
+            "mean_depth": round(self.depth_total / self.depth_samples, 2) if self.depth_samples else 0.0,
+        }
+
+
+class Pipeline:
+    """
+    Run items through stages connected by bounded queues.
+
+    Each stage reads from its own queue of at most queue_size items. A stage
+    whose next queue is full waits, so a slow stage holds back the stages in
+    front of it and the number of items in flight never depends on the batch
+    size. The first exception raised by a stage stops the pipeline and is
+    raised again by run(...).
+    """
+
+    def __init__(self, stages, queue_size=DEFAULT_QUEUE_SIZE):
+        self.stages = list(stages)
+        self.queue_size = max(1, int(queue_size))
+        self.queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        self.error = None
+        self._stopped = threading.Event()
+        self._error_lock = threading.Lock()
+
+    def get_queue_depths(self):
+        """Return the current number of items waiting in front of each stage."""
+        return {stage.name: stage_queue.qsize() for stage, stage_queue in zip(self.stages, self.queues)}
+
+    def is_stopped(self):
+        """Return True once a stage has failed and the remaining items are being drained."""
+        return self._stopped.is_set()
+
+    def get_stats(self):
+        """Return the counters of every stage in pipeline order."""
+        return [stage.get_stats(self.queue_size) for stage in self.stages]
+
+    def _fail(self, error):
+        with self._error_lock:
+            if self.error is None:
+                self.error = error
+        self._stopped.set()
+
+    def _put(self, index, item):
+        stage = self.stages[index]
+        stage_queue = self.queues[index]
+        started = time.perf_counter()
+        stage_queue.put(item)
+        waited = time.perf_counter() - started
+        depth = stage_queue.qsize()
+        with stage._lock:
+            stage.blocked_seconds += waited
+            stage.max_depth = max(stage.max_depth, depth)
+            stage.depth_total += depth
+            stage.depth_samples += 1
+
+    def _work(self, index):
+        stage = self.stages[index]
+        stage_queue = self.queues[index]
+        is_last = index == len(self.stages) - 1
+        while True:
+            item = stage_queue.get()
+            if item is _STOP:
+                return
+            # After a failure the remaining items are drained without work so upstream stages never block.
+            if self._stopped.is_set():
+                continue
+
+            started = time.perf_counter()
+            try:
+                outputs = stage.function(item)
+                outputs = () if is_last or outputs is None else list(outputs)
+            except BaseException as error:
+                self._fail(error)
+                continue
+            finally:
+                with stage._lock:
+                    stage.items += 1
+                    stage.busy_seconds += time.perf_counter() - started
+
+            for output in outputs:
+                self._put(index + 1, output)
+
+    def run(self, source):
+        """
+        Feed items from source through every stage and wait for the pipeline to drain.
+
+        Args:
+            source (iterable): Items for the first stage. It is consumed lazily.
+
+        Returns:
+            list: Per-stage counters from get_stats().
+        """
+        stage_threads = []
+        for index, stage in enumerate(self.stages):
+            threads = [
+                threading.Thread(target=self._work, args=(index,), name=f"utp-{stage.name}-{number}", daemon=True)
+                for number in range(1, stage.workers + 1)
+            ]
+            for thread in threads:
+                thread.start()
+            stage_threads.append(threads)
+
+        try:
+            for item in source:
+                if self._stopped.is_set():
+                    break
+                self._put(0, item)
+        except BaseException as error:
+            self._fail(error)
+        finally:
+            # Stop the stages in order so every item already queued reaches the end.
+            for stage_queue, threads in zip(self.queues, stage_threads):
+                for _ in threads:
+                    stage_queue.put(_STOP)
+                for thread in threads:
+                    thread.join()
+
+        if self.error is not None:
+            raise self.error
+        return self.get_stats()
+
+
+def format_pipeline_stats(stats):
+    """
+    Format per-stage pipeline counters as log lines.
+
+    The stage with the highest busy time per worker is marked as the bottleneck.
+
+    Args:
+        stats (list): Counters from Pipeline.get_stats().
+
+    Returns:
+        list: One header line and one line per stage.
+    """
+    busiest = max(stats, key=lambda stage: stage["busy_seconds"] / stage["workers"], default=None)
+    lines = [f"{'stage':<10} {'workers':>7} {'items':>6} {'busy_s':>8} {'blocked_s':>9} {'max_depth':>9} {'mean_depth':>10}"]
+    for stage in stats:
+        marker = "  <- bottleneck" if stage is busiest and stage["items"] else ""
+        lines.append(
+            f"{stage['stage']:<10} {stage['workers']:>7} {stage['items']:>6} {stage['busy_seconds']:>8.3f}"
+            f" {stage['blocked_seconds']:>9.3f} {stage['max_depth']:>5}/{stage['queue_size']:<3} {stage['mean_depth']:>10.2f}{marker}"
+        )
+    return lines
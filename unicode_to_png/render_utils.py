@@ -0,0 +1,531 @@
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+# If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/
+#
+# Original Author: Sergio Palma Hidalgo
+# Project URL: https://github.com/del-Pacifico/unicode-to-png
+# Copyright (c) 2025 Sergio Palma Hidalgo
+# All rights reserved.
+#
+"""Platform-independent emoji rasterization helpers for Unicode to PNG.
+
+Pillow is imported inside the functions so the CLI can still print help and
+version information when Pillow is missing.
+"""
+
+from functools import lru_cache
+import os
+
+from .font_utils import get_bitmap_strike_sizes, get_default_font_paths
+from .logging_utils import console_message, log, safe_print
+from .unicode_utils import get_adjusted_margin, get_adjusted_position
+
+DEFAULT_MARGIN_RATIO = 0.25
+RESAMPLE_MODES = ("lanczos", "reduce")
+DEFAULT_RESAMPLE_MODE = "lanczos"
+# Box-reduce by whole factors while the crop is at least this many times larger than the target.
+REDUCING_GAP = 2.0
+FONT_FIT_RATIO = 0.85
+FONT_MAX_FILL_RATIO = 0.97
+MAX_FIT_ATTEMPTS = 10
+LAYOUT_ENGINES = ("auto", "basic", "raqm")
+DEFAULT_LAYOUT_ENGINE = "auto"
+# Measured text boxes kept per emoji, font, font size, and layout engine.
+SHAPING_CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=1)
+def has_raqm():
+    """Return True when Pillow was built with libraqm text shaping."""
+    from PIL import features
+
+    return bool(features.check_feature("raqm"))
+
+
+def resolve_layout_engine(layout_engine, structure_type):
+    """
+    Return the Pillow layout engine, "basic" or "raqm", for one emoji.
+
+    "auto" shapes multi-codepoint sequences with RAQM, because skin tones, ZWJ
+    sequences, and flags are font ligatures, and lays out single codepoints
+    with the cheaper BASIC engine. RAQM falls back to BASIC when Pillow was
+    built without libraqm.
+
+    Args:
+        layout_engine (str): One of LAYOUT_ENGINES.
+        structure_type (str): Classification from classify_unicode_structure(...).
+
+    Returns:
+        str: "basic" or "raqm".
+    """
+    if layout_engine == "auto":
+        layout_engine = "basic" if structure_type == "SIMPLE" else "raqm"
+    if layout_engine == "raqm" and not has_raqm():
+        return "basic"
+    return layout_engine
+
+
+# Load the requested emoji font or fall back to the default font.
+def load_font(size, quiet=False, font_path=None, layout_engine=None):
+    from PIL import ImageFont, UnidentifiedImageError
+
+    if font_path is None:
+        font_path = next((path for path in get_default_font_paths() if os.path.exists(path)), None)
+    font_name = os.path.basename(font_path) if font_path else "Emoji font"
+    if font_path and os.path.exists(font_path):
+        try:
+            if layout_engine is not None:
+                engine = ImageFont.Layout.RAQM if layout_engine == "raqm" else ImageFont.Layout.BASIC
+                return ImageFont.truetype(font_path, size, layout_engine=engine)
+            return ImageFont.truetype(font_path, size)
+        except OSError as e:
+            if not quiet:
+                safe_print(console_message("WARNING", f"{font_name} could not be loaded. Reason: {e}"))
+        except UnidentifiedImageError as e:
+            if not quiet:
+                safe_print(console_message("WARNING", f"{font_name} font format was not recognized. Reason: {e}"))
+    if not quiet:
+        safe_print(console_message("WARNING", "Emoji font was not found or could not be loaded. Default font will be used."))
+    return ImageFont.load_default()
+
+
+# Detect if emoji rendering touches the right or bottom edge of the final PNG.
+def check_visual_edges(image, size_label, log_entries, quiet):
+    """
+    Checks if any opaque pixel touches the right or bottom edge of the image.
+    Logs a warning if detected.
+
+    Args:
+        image (PIL.Image): Final resized emoji image
+        size_label (int): Output size label (e.g. 128)
+        log_entries (list): Log collector
+        quiet (bool): Suppress console output
+    """
+    try:
+        pixels = image.load()
+        width, height = image.size
+
+        touches_right = any(pixels[width - 1, y][3] != 0 for y in range(height))
+        touches_bottom = any(pixels[x, height - 1][3] != 0 for x in range(width))
+
+        if touches_right or touches_bottom:
+            edge_info = []
+            if touches_right:
+                edge_info.append("right")
+            if touches_bottom:
+                edge_info.append("bottom")
+            log(f"Emoji touches {', '.join(edge_info)} edge(s) at {size_label}x{size_label}.", log_entries, quiet=quiet, level="WARNING")
+            return True
+    except Exception as edge_check_error:
+        log(f"Visual edge test failed for {size_label}x{size_label}.", log_entries, quiet=quiet, level="WARNING", detail=str(edge_check_error))
+    return False
+
+
+def get_icon_layout(ink_bbox, size, margin_px):
+    """
+    Compute where the inked area of the canvas lands in the output icon.
+
+    The margin is measured on the canvas around the longer ink side and converted
+    to output pixels. At least one transparent output pixel is kept on every side.
+
+    Args:
+        ink_bbox (tuple): Inked area of the canvas (left, top, right, bottom).
+        size (int): Output icon size in pixels.
+        margin_px (int): Margin around the ink in canvas pixels.
+
+    Returns:
+        tuple: (glyph_size, offset, margin) where glyph_size is the (width, height)
+        of the resized ink, offset its paste position, and margin the output margin.
+    """
+    ink_width = ink_bbox[2] - ink_bbox[0]
+    ink_height = ink_bbox[3] - ink_bbox[1]
+    ink_side = max(ink_width, ink_height)
+
+    margin = max(1, round(size * margin_px / (ink_side + 2 * margin_px)))
+    inner_size = max(1, size - 2 * margin)
+    scale = inner_size / ink_side
+    glyph_size = (max(1, round(ink_width * scale)), max(1, round(ink_height * scale)))
+    offset = ((size - glyph_size[0]) // 2, (size - glyph_size[1]) // 2)
+    return glyph_size, offset, margin
+
+
+def resample_glyph(glyph, glyph_size, resample=DEFAULT_RESAMPLE_MODE):
+    """
+    Downscale an RGBA glyph with premultiplied alpha.
+
+    "lanczos" applies one Lanczos pass. "reduce" first box-reduces the glyph by
+    whole factors and finishes with Lanczos, which is about twice as fast for
+    large canvases at a small cost in sharpness. Both modes filter premultiplied
+    color, so transparent pixels never darken the edges.
+
+    Args:
+        glyph (PIL.Image): RGBA glyph cropped from the canvas.
+        glyph_size (tuple): Target (width, height).
+        resample (str): One of RESAMPLE_MODES.
+
+    Returns:
+        PIL.Image: Resized RGBA glyph.
+    """
+    from PIL import Image
+
+    if resample == "reduce":
+        # Pillow premultiplies RGBA during resize(...) but ignores reducing_gap on that path, so premultiply here.
+        return glyph.convert("RGBa").resize(glyph_size, Image.LANCZOS, reducing_gap=REDUCING_GAP).convert("RGBA")
+    return glyph.resize(glyph_size, Image.LANCZOS)
+
+
+def crop_to_ink(img, ink_bbox, size, margin_px, resample=DEFAULT_RESAMPLE_MODE):
+    """Resize the inked area of the canvas once and center it on a transparent output icon."""
+    from PIL import Image
+
+    glyph_size, offset, _ = get_icon_layout(ink_bbox, size, margin_px)
+    icon = Image.new("RGBA", (size, size), (0, 0, 0, 0))
+    icon.paste(resample_glyph(img.crop(ink_bbox), glyph_size, resample), offset)
+    return icon
+
+
+@lru_cache(maxsize=SHAPING_CACHE_SIZE)
+def measure_text(emoji, font_size, font_path=None, layout_engine=None):
+    """
+    Return the text box of an emoji at one font size, shaped once and cached.
+
+    Sizes that share a canvas size, runs that render the same emoji again, and
+    --plan all reuse the shaping result instead of laying out the text again.
+
+    Args:
+        emoji (str): Emoji sequence to measure.
+        font_size (int): Font size in pixels.
+        font_path (str): Font file to load.
+        layout_engine (str): "basic", "raqm", or None for the Pillow default.
+
+    Returns:
+        tuple: (left, top, right, bottom) text box at the origin.
+    """
+    font = load_font(font_size, True, font_path, layout_engine)
+    probe = get_probe_draw()
+    try:
+        return probe.textbbox((0, 0), emoji, font=font, embedded_color=True)
+    except TypeError:
+        return probe.textbbox((0, 0), emoji, font=font)
+
+
+def clear_shaping_cache():
+    """Drop every cached text box."""
+    measure_text.cache_clear()
+
+
+def fit_font(emoji, temp_size, font_path, log_entries, quiet, metrics=None, layout_engine=None):
+    """
+    Shrink a scalable font until the emoji fits inside the render canvas.
+
+    Args:
+        emoji (str): Emoji sequence to render.
+        temp_size (int): Render canvas size.
+        font_path (str): Font file to load.
+        log_entries (list): Log collector
+        quiet (bool): Suppress console output
+        metrics (MetricsRegistry): Optional registry that counts the measured font sizes.
+        layout_engine (str): "basic", "raqm", or None for the Pillow default.
+
+    Returns:
+        tuple: (font, bbox) for the last measured font size.
+    """
+    font_size = int(temp_size * FONT_FIT_RATIO)
+
+    for attempt in range(MAX_FIT_ATTEMPTS):
+        if metrics is not None:
+            metrics.inc("utp_fit_attempts")
+        bbox = measure_text(emoji, font_size, font_path, layout_engine)
+
+        width = bbox[2] - bbox[0]
+        height = bbox[3] - bbox[1]
+
+        if width <= int(temp_size * FONT_MAX_FILL_RATIO) and height <= int(temp_size * FONT_MAX_FILL_RATIO):
+            break
+
+        font_size -= 2
+
+    else:
+        log(f"Emoji did not fit within {temp_size}px after {MAX_FIT_ATTEMPTS} attempts. Rendering may be clipped.", log_entries, quiet=quiet, level="WARNING")
+        font_size += 2
+
+    # Only the chosen size is loaded for drawing.
+    return load_font(font_size, quiet, font_path, layout_engine), bbox
+
+
+def get_probe_draw():
+    """Return a drawing context on a 1x1 image for text measurement without a full canvas."""
+    from PIL import Image, ImageDraw
+
+    return ImageDraw.Draw(Image.new("RGBA", (1, 1)))
+
+
+def measure_bitmap_emoji(emoji, temp_size, font_path, strike_sizes, quiet, layout_engine=None):
+    """
+    Measure an emoji in a fixed-size color bitmap font and compute its scaled size on the canvas.
+
+    Args:
+        emoji (str): Emoji sequence to render.
+        temp_size (int): Render canvas size.
+        font_path (str): Bitmap font file.
+        strike_sizes (tuple): Available strike sizes of the font.
+        quiet (bool): Suppress console output
+        layout_engine (str): "basic", "raqm", or None for the Pillow default.
+
+    Returns:
+        tuple: (font, bbox, scaled_size) where scaled_size is None when nothing was measured.
+    """
+    target_size = int(temp_size * FONT_FIT_RATIO)
+    strike_size = next((strike for strike in strike_sizes if strike >= target_size), strike_sizes[-1])
+    font = load_font(strike_size, quiet, font_path, layout_engine)
+    bbox = measure_text(emoji, strike_size, font_path, layout_engine)
+    width = bbox[2] - bbox[0]
+    height = bbox[3] - bbox[1]
+    if width <= 0 or height <= 0:
+        return font, bbox, None
+
+    scale = target_size / max(width, height)
+    return font, bbox, (max(1, round(width * scale)), max(1, round(height * scale)))
+
+
+def rasterize_bitmap_emoji(emoji, temp_size, font_path, strike_sizes, quiet, layout_engine=None):
+    """
+    Render an emoji from a fixed-size color bitmap font and scale it to the canvas fit size.
+
+    Args:
+        emoji (str): Emoji sequence to render.
+        temp_size (int): Render canvas size.
+        font_path (str): Bitmap font file.
+        strike_sizes (tuple): Available strike sizes of the font.
+        quiet (bool): Suppress console output
+        layout_engine (str): "basic", "raqm", or None for the Pillow default.
+
+    Returns:
+        PIL.Image or None: Scaled glyph image, or None when nothing was measured.
+    """
+    from PIL import Image, ImageDraw
+
+    font, bbox, scaled_size = measure_bitmap_emoji(emoji, temp_size, font_path, strike_sizes, quiet, layout_engine)
+    if scaled_size is None:
+        return None
+    width = bbox[2] - bbox[0]
+    height = bbox[3] - bbox[1]
+
+    glyph = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+    try:
+        ImageDraw.Draw(glyph).text((-bbox[0], -bbox[1]), emoji, font=font, embedded_color=True)
+    except TypeError:
+        ImageDraw.Draw(glyph).text((-bbox[0], -bbox[1]), emoji, font=font)
+
+    return glyph.resize(scaled_size, Image.LANCZOS)
+
+
+def rasterize_icon(emoji, size, scale_factor, structure_type, margin_ratio, log_entries, quiet, font_path=None, metrics=None, layout_engine=DEFAULT_LAYOUT_ENGINE):
+    """
+    Draw one emoji on a supersampled canvas and measure its ink.
+
+    Scalable fonts are fitted by shrinking the font size. Fixed-size color bitmap
+    fonts are rendered at their native strike and scaled onto the canvas.
+
+    Args:
+        emoji (str): Emoji sequence to render.
+        size (int): Output icon size in pixels.
+        scale_factor (int): Supersampling factor applied to the render canvas.
+        structure_type (str): Classification from classify_unicode_structure(...).
+        margin_ratio (float): Base margin ratio.
+        log_entries (list): Log collector
+        quiet (bool): Suppress console output
+        font_path (str): Font routed to this emoji by the fallback chain.
+        metrics (MetricsRegistry): Optional registry for fit attempt counters.
+        layout_engine (str): One of LAYOUT_ENGINES.
+
+    Returns:
+        tuple or None: (canvas, ink_bbox, margin_pixels) for resize_icon(...), or None when the size must be skipped.
+    """
+    from PIL import Image, ImageDraw
+
+    temp_size = size * scale_factor
+    img = Image.new("RGBA", (temp_size, temp_size), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(img)
+    engine = resolve_layout_engine(layout_engine, structure_type)
+
+    strike_sizes = get_bitmap_strike_sizes(font_path) if font_path else ()
+    if strike_sizes:
+        glyph = rasterize_bitmap_emoji(emoji, temp_size, font_path, strike_sizes, quiet, engine)
+        bbox = (0, 0, glyph.width, glyph.height) if glyph is not None else None
+    else:
+        font, bbox = fit_font(emoji, temp_size, font_path, log_entries, quiet, metrics, engine)
+
+    # Validate the final bounding box before rendering.
+    if not bbox or len(bbox) != 4:
+        log(f"Invalid bounding box detected after fit attempts. Size {size}px will be skipped.", log_entries, quiet=quiet, level="ERROR")
+        return None
+
+    # Compute structure-aware render position.
+    x, y = get_adjusted_position(structure_type, temp_size, bbox, log_entries, quiet)
+
+    # Render the emoji.
+    if strike_sizes:
+        img.alpha_composite(glyph, (x, y))
+    else:
+        try:
+            draw.text((x, y), emoji, font=font, embedded_color=True)
+        except TypeError:
+            draw.text((x, y), emoji, font=font)
+
+    # Scan the alpha channel in C instead of iterating pixels in Python; large canvases hold millions of pixels.
+    ink_bbox = img.getchannel("A").getbbox()
+    if ink_bbox is None:
+        log(f"Emoji may not have rendered at {size}x{size}.", log_entries, quiet=quiet, level="WARNING")
+        # Nothing was inked; fall back to the measured layout box.
+        ink_bbox = (x + bbox[0], y + bbox[1], x + bbox[2], y + bbox[3])
+
+    # Compute structure-aware margin.
+    try:
+        margin_pixels = get_adjusted_margin(structure_type, margin_ratio, temp_size)
+        log(f"Adjusted margin: {margin_pixels}px for structure {structure_type}.", log_entries, quiet=quiet, level="DEBUG")
+    except Exception as margin_error:
+        margin_pixels = int(temp_size * margin_ratio)
+        log(f"Margin adaptation failed. Base margin {margin_pixels}px will be used.", log_entries, quiet=quiet, level="WARNING", detail=str(margin_error))
+
+    return img, ink_bbox, margin_pixels
+
+
+def resize_icon(canvas, ink_bbox, margin_pixels, size, enable_edge_check, log_entries, quiet, resample=DEFAULT_RESAMPLE_MODE, metrics=None):
+    """
+    Crop a rasterized canvas to its ink and resize it to the output size.
+
+    The crop is taken from the alpha bounding box of the rendered canvas, so
+    the margin is exact and the glyph never touches the icon edges.
+
+    Args:
+        canvas (PIL.Image): Supersampled canvas from rasterize_icon(...).
+        ink_bbox (tuple): Ink bounding box on the canvas.
+        margin_pixels (int): Margin in canvas pixels.
+        size (int): Output icon size in pixels.
+        enable_edge_check (bool): Test the resized output for edge contact.
+        log_entries (list): Log collector
+        quiet (bool): Suppress console output
+        resample (str): Resampling mode from RESAMPLE_MODES.
+        metrics (MetricsRegistry): Optional registry for edge contact counters.
+
+    Returns:
+        PIL.Image or None: Resized icon, or None when the size must be skipped.
+    """
+    try:
+        resized_img = crop_to_ink(canvas, ink_bbox, size, margin_pixels, resample)
+    except Exception as crop_error:
+        log(f"Cropping or resizing failed for {size}x{size}. Size will be skipped.", log_entries, quiet=quiet, level="ERROR", detail=str(crop_error))
+        return None
+
+    if enable_edge_check and check_visual_edges(resized_img, size, log_entries, quiet) and metrics is not None:
+        metrics.inc("utp_edge_contacts")
+
+    return resized_img
+
+
+def render_icon(emoji, size, scale_factor, structure_type, margin_ratio, enable_edge_check, log_entries, quiet, font_path=None, resample=DEFAULT_RESAMPLE_MODE, layout_engine=DEFAULT_LAYOUT_ENGINE):
+    """
+    Render one emoji at one output size using a supersampled canvas.
+
+    Runs rasterize_icon(...) and resize_icon(...) back to back. Batch runs call
+    the two steps from separate pipeline stages.
+
+    Args:
+        emoji (str): Emoji sequence to render.
+        size (int): Output icon size in pixels.
+        scale_factor (int): Supersampling factor applied to the render canvas.
+        structure_type (str): Classification from classify_unicode_structure(...).
+        margin_ratio (float): Base margin ratio.
+        enable_edge_check (bool): Test the resized output for edge contact.
+        log_entries (list): Log collector
+        quiet (bool): Suppress console output
+        font_path (str): Font routed to this emoji by the fallback chain.
+        resample (str): Resampling mode from RESAMPLE_MODES.
+        layout_engine (str): One of LAYOUT_ENGINES.
+
+    Returns:
+        PIL.Image or None: Resized icon, or None when the size must be skipped.
+    """
+    rasterized = rasterize_icon(emoji, size, scale_factor, structure_type, margin_ratio, log_entries, quiet, font_path, layout_engine=layout_engine)
+    if rasterized is None:
+        return None
+
+    canvas, ink_bbox, margin_pixels = rasterized
+    return resize_icon(canvas, ink_bbox, margin_pixels, size, enable_edge_check, log_entries, quiet, resample)
+
+
+def plan_icon(emoji, size, scale_factor, structure_type, margin_ratio, log_entries, quiet, font_path=None, layout_engine=DEFAULT_LAYOUT_ENGINE):
+    """
+    Plan the layout of one emoji at one output size without rasterizing it.
+
+    Runs the same font fit, position, and margin steps as render_icon(...) on a
+    1x1 measurement surface. Nothing is drawn, resized, or saved.
+
+    Args:
+        emoji (str): Emoji sequence to plan.
+        size (int): Output icon size in pixels.
+        scale_factor (int): Supersampling factor applied to the render canvas.
+        structure_type (str): Classification from classify_unicode_structure(...).
+        margin_ratio (float): Base margin ratio.
+        log_entries (list): Log collector
+        quiet (bool): Suppress console output
+        font_path (str): Font routed to this emoji by the fallback chain.
+        layout_engine (str): One of LAYOUT_ENGINES.
+
+    Returns:
+        dict: Planned font size, glyph box, position, canvas margin, predicted ink
+        crop box, output glyph size and margin, and detected issues.
+    """
+    temp_size = size * scale_factor
+    plan = {
+        "size": size,
+        "scale_factor": scale_factor,
+        "canvas": temp_size,
+        "font": os.path.basename(font_path) if font_path else None,
+        "font_size": None,
+        "bbox": None,
+        "position": None,
+        "margin": None,
+        "crop_box": None,
+        "glyph_size": None,
+        "output_margin": None,
+        "issues": [],
+    }
+    if structure_type == "COMPLEX":
+        plan["issues"].append("complex_structure")
+
+    engine = resolve_layout_engine(layout_engine, structure_type)
+    strike_sizes = get_bitmap_strike_sizes(font_path) if font_path else ()
+    if strike_sizes:
+        font, _, scaled_size = measure_bitmap_emoji(emoji, temp_size, font_path, strike_sizes, quiet, engine)
+        bbox = (0, 0, scaled_size[0], scaled_size[1]) if scaled_size else None
+    else:
+        font, bbox = fit_font(emoji, temp_size, font_path, log_entries, quiet, layout_engine=engine)
+    plan["font_size"] = getattr(font, "size", None)
+
+    if not bbox or len(bbox) != 4 or bbox[2] <= bbox[0] or bbox[3] <= bbox[1]:
+        plan["issues"].append("empty_glyph")
+        return plan
+
+    width = bbox[2] - bbox[0]
+    height = bbox[3] - bbox[1]
+    plan["bbox"] = list(bbox)
+    if width > int(temp_size * FONT_MAX_FILL_RATIO) or height > int(temp_size * FONT_MAX_FILL_RATIO):
+        plan["issues"].append("does_not_fit")
+
+    x, y = get_adjusted_position(structure_type, temp_size, bbox, log_entries, quiet)
+    margin_pixels = get_adjusted_margin(structure_type, margin_ratio, temp_size)
+    # The measured glyph box at the draw position predicts the ink box that render_icon(...) crops.
+    crop_box = (x + bbox[0], y + bbox[1], x + bbox[2], y + bbox[3])
+    glyph_size, _, output_margin = get_icon_layout(crop_box, size, margin_pixels)
+    plan["position"] = [x, y]
+    plan["margin"] = margin_pixels
+    plan["crop_box"] = list(crop_box)
+    plan["glyph_size"] = list(glyph_size)
+    plan["output_margin"] = output_margin
+
+    # Ink outside the canvas is cut off before the crop can include it.
+    if crop_box[0] < 0 or crop_box[1] < 0 or crop_box[2] > temp_size or crop_box[3] > temp_size:
+        plan["issues"].append("glyph_clipped")
+    return plan
@@ -0,0 +1,81 @@
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+# If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/
+#
+# Original Author: Sergio Palma Hidalgo
+# Project URL: https://github.com/del-Pacifico/unicode-to-png
+# Copyright (c) 2025 Sergio Palma Hidalgo
+# All rights reserved.
+#
+"""Icon size profile and supersampling helpers for Unicode to PNG."""
+
+SIZE_PROFILES = {
+    "chrome": (16, 19, 32, 38, 48, 128),
+    "store": (256, 512, 1024),
+    "pwa": (72, 96, 128, 144, 152, 192, 384, 512),
+    "android": (48, 72, 96, 144, 192),
+}
+DEFAULT_SIZE_PROFILE = "chrome"
+MAX_ICON_SIZE = 2048
+MAX_SCALE_FACTOR = 4
+DEFAULT_CANVAS_LIMIT_MB = 16
+RGBA_BYTES_PER_PIXEL = 4
+
+
+def parse_sizes(sizes_string):
+    """
+    Parse the --sizes argument into a sorted tuple of unique icon sizes.
+
+    Args:
+        sizes_string (str): Comma-separated pixel sizes and/or size profile names.
+
+    Returns:
+        tuple: (sizes, warnings) where sizes is a tuple of ints.
+    """
+    sizes = set()
+    warnings = []
+    for entry_number, entry in enumerate(sizes_string.split(","), start=1):
+        token = entry.strip().lower()
+        if not token:
+            warnings.append(f"Skipped size entry {entry_number} because it is empty.")
+            continue
+
+        if token in SIZE_PROFILES:
+            sizes.update(SIZE_PROFILES[token])
+            continue
+
+        try:
+            size = int(token)
+        except ValueError:
+            warnings.append(f"Skipped size entry {entry_number} because '{token}' is neither a number nor a known size profile.")
+            continue
+
+        if not 1 <= size <= MAX_ICON_SIZE:
+            warnings.append(f"Skipped size entry {entry_number} because {size}px is outside the supported range 1-{MAX_ICON_SIZE}px.")
+            continue
+
+        sizes.add(size)
+    return tuple(sorted(sizes)), warnings
+
+
+def get_canvas_memory_mb(canvas_size):
+    """Return the memory in MB used by a square RGBA canvas of the given size."""
+    return canvas_size * canvas_size * RGBA_BYTES_PER_PIXEL / (1024 * 1024)
+
+
+def get_scale_factor(size, max_scale_factor, canvas_limit_mb):
+    """
+    Choose the largest supersampling factor whose canvas stays within the memory cap.
+
+    Args:
+        size (int): Output icon size in pixels.
+        max_scale_factor (int): Highest supersampling factor allowed.
+        canvas_limit_mb (float): Maximum canvas memory per size in MB.
+
+    Returns:
+        int: Supersampling factor, never lower than 1.
+    """
+    for factor in range(max_scale_factor, 1, -1):
+        if get_canvas_memory_mb(size * factor) <= canvas_limit_mb:
+            return factor
+    return 1
@@ -0,0 +1,548 @@
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+# If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/
+#
+# Original Author: Sergio Palma Hidalgo
+# Project URL: https://github.com/del-Pacifico/unicode-to-png
+# Copyright (c) 2025 Sergio Palma Hidalgo
+# All rights reserved.
+#
+"""Render stages of a Unicode to PNG batch run and the state they share.
+
+A batch entry is planned into one task per size. Each task then flows through
+the rasterize, resize, encode, and write stages of a Pipeline, and the write
+stage completes the entry after its last size.
+"""
+
+import os
+import threading
+import time
+
+from .badge_utils import DEFAULT_BADGE_POSITION, composite_badge
+from .catalog_utils import iter_catalog_chunks
+from .journal_utils import hash_bytes, hash_file, record_journal_output
+from .lock_utils import DEFAULT_LOCK_TIMEOUT
+from .logging_utils import LogView, console_message, log, relay_log_lines, safe_print, write_log_if_needed
+from .manifest_utils import get_manifest_relative_path
+from .memory_utils import MemoryLimitExceeded
+from .output_utils import DEFAULT_IMAGE_FORMAT, encode_image_formats, get_container_sizes, save_icon_containers, write_file_atomic
+from .path_utils import get_log_path
+from .render_utils import DEFAULT_LAYOUT_ENGINE, DEFAULT_MARGIN_RATIO, DEFAULT_RESAMPLE_MODE, rasterize_icon, resize_icon
+from .size_utils import DEFAULT_CANVAS_LIMIT_MB, get_canvas_memory_mb, get_scale_factor
+from .unicode_utils import classify_unicode_structure
+from .variant_utils import get_variant_filename, make_variant
+from .watchdog_utils import RenderTimeout
+
+# Memory usage above this value is reported even when the memory governor takes no step.
+HIGH_MEMORY_WARNING_MB = 300
+
+
+class RenderStages:
+    """
+    Pipeline stages of one batch run.
+
+    plan_entry, rasterize_task, resize_task, encode_task, and write_task are the
+    functions of the plan, rasterize, resize, encode, and write stages. The
+    manifest entries, per-format totals, and completed entry count they update
+    are kept on this object, so a stage can be run and checked on its own.
+    """
+
+    def __init__(
+        self,
+        *,
+        base_path,
+        folder_base,
+        run_log,
+        inventory,
+        folder_locks,
+        memory_governor,
+        metrics,
+        icon_sizes,
+        render_sizes=None,
+        image_formats=(DEFAULT_IMAGE_FORMAT,),
+        containers=(),
+        output_variants=(),
+        badge_variants=None,
+        badge_position=DEFAULT_BADGE_POSITION,
+        badge_font_path=None,
+        margin_ratio=DEFAULT_MARGIN_RATIO,
+        canvas_limit_mb=DEFAULT_CANVAS_LIMIT_MB,
+        enable_edge_check=False,
+        resample=DEFAULT_RESAMPLE_MODE,
+        layout_engine=DEFAULT_LAYOUT_ENGINE,
+        filename_prefix="emoji",
+        filename_prefix_from_folder=False,
+        per_alias_logs=False,
+        render_timeout=None,
+        lock_timeout=DEFAULT_LOCK_TIMEOUT,
+        verified_outputs=None,
+        folder_errors=None,
+        journal_file=None,
+        watchdog=None,
+        encode_executor=None,
+        memory_probe=None,
+        on_entry_done=None,
+        entry_count=0,
+        quiet=False,
+    ):
+        """
+        Args:
+            base_path (str): Project base directory. Manifest paths are relative to it.
+            folder_base (str): Sanitized --folder name.
+            run_log (RunLog): Run log of every entry.
+            inventory (OutputInventory): Preflight listing of the output folders. Entries are written below its root.
+            folder_locks (FolderLocks): Locks taken for each output folder while its entry is written.
+            memory_governor (MemoryGovernor): Supersampling and parallelism limits of the run.
+            metrics (MetricsRegistry): Registry of the run metrics.
+            icon_sizes (tuple): Sizes written as standalone icons.
+            render_sizes (tuple): Sizes to render, including container-only sizes. Default: icon_sizes.
+            image_formats (tuple): Output formats of every icon.
+            containers (tuple): Container formats written per entry.
+            output_variants (tuple): State variants and badge variants written next to each icon.
+            badge_variants (dict): Badge of each badge variant name.
+            badge_position (str): Corner of the badges.
+            badge_font_path (str): Font of the badge counts, or None for the Pillow built-in font.
+            margin_ratio (float): Base margin ratio.
+            canvas_limit_mb (float): Maximum supersampling canvas memory per size in MB.
+            enable_edge_check (bool): Test every resized output for edge contact.
+            resample (str): Resampling mode from RESAMPLE_MODES.
+            layout_engine (str): Text layout engine from LAYOUT_ENGINES.
+            filename_prefix (str): Output filename prefix.
+            filename_prefix_from_folder (bool): Use the output folder name as the filename prefix.
+            per_alias_logs (bool): Also write one log per batch entry.
+            render_timeout (float): Render budget of each emoji in seconds, or None.
+            lock_timeout (float): Seconds to wait for an output folder lock.
+            verified_outputs (dict): Journaled output records that are still intact, keyed by path.
+            folder_errors (dict): Output folders that could not be prepared, with the error detail.
+            journal_file (file): Open checkpoint journal, or None.
+            watchdog (RenderWatchdog): Worker processes for budgeted renders, or None.
+            encode_executor (concurrent.futures.Executor): Executor for parallel encodes, or None.
+            memory_probe (callable): Returns the process memory usage in MB, or None when unknown.
+            on_entry_done (callable): Called after each finished or skipped entry.
+            entry_count (int): Number of batch entries.
+            quiet (bool): Suppress console output
+        """
+        self.base_path = base_path
+        self.folder_base = folder_base
+        self.run_log = run_log
+        self.inventory = inventory
+        self.folder_locks = folder_locks
+        self.memory_governor = memory_governor
+        self.metrics = metrics
+        self.icon_sizes = tuple(icon_sizes)
+        self.render_sizes = tuple(render_sizes) if render_sizes is not None else self.icon_sizes
+        self.image_formats = tuple(image_formats)
+        self.containers = tuple(containers)
+        self.output_variants = tuple(output_variants)
+        self.badge_variants = badge_variants or {}
+        self.badge_position = badge_position
+        self.badge_font_path = badge_font_path
+        self.margin_ratio = margin_ratio
+        self.canvas_limit_mb = canvas_limit_mb
+        self.enable_edge_check = enable_edge_check
+        self.resample = resample
+        self.layout_engine = layout_engine
+        self.filename_prefix = filename_prefix
+        self.filename_prefix_from_folder = filename_prefix_from_folder
+        self.per_alias_logs = per_alias_logs
+        self.render_timeout = render_timeout
+        self.lock_timeout = lock_timeout
+        self.verified_outputs = verified_outputs or {}
+        self.folder_errors = folder_errors or {}
+        self.journal_file = journal_file
+        self.watchdog = watchdog
+        self.encode_executor = encode_executor
+        self.memory_probe = memory_probe
+        self.on_entry_done = on_entry_done
+        self.quiet = quiet
+
+        # Per-alias logs share the directory of the run log.
+        self.log_dir = os.path.dirname(run_log.log_file) if run_log.log_file else None
+        self.manifest_entries = [None] * entry_count
+        self.bytes_per_format = dict.fromkeys(self.image_formats, 0)
+        self.files_per_format = dict.fromkeys(self.image_formats, 0)
+        self.started = time.perf_counter()
+        self._output_lock = threading.Lock()
+        self._completed_count = 0
+        self._completed_condition = threading.Condition()
+
+    @property
+    def completed_count(self):
+        """Number of entries that finished or were skipped."""
+        with self._completed_condition:
+            return self._completed_count
+
+    def get_subfolder_name(self, alias):
+        """Return the output folder of a batch entry, or the --folder name when not in batch mode."""
+        return f"{self.folder_base}" if alias == "single" else f"{self.folder_base}_{alias}"
+
+    def get_manifest_entries(self):
+        """Return the manifest entries of every entry planned so far, in batch order."""
+        return [entry for entry in self.manifest_entries if entry is not None]
+
+    def mark_entry_done(self):
+        """Count one finished or skipped entry and wake the chunk feeder."""
+        with self._completed_condition:
+            self._completed_count += 1
+            self._completed_condition.notify_all()
+        if self.on_entry_done is not None:
+            self.on_entry_done()
+
+    def iter_batch_entries(self, batch_entries, chunk_size, pipeline, checkpoint=None):
+        """
+        Feed the batch chunk by chunk, waiting for each chunk to finish before the next one.
+
+        Args:
+            batch_entries (list): (index, emoji, alias, font_path) entries, with indexes starting at 1.
+            chunk_size (int): Entries per chunk, or None to feed the whole batch at once.
+            pipeline (Pipeline): Pipeline that runs the entries. The feeder stops when it fails.
+            checkpoint (callable): Called after every chunk but the last one.
+
+        Yields:
+            tuple: Batch entries in order.
+        """
+        if chunk_size is None:
+            yield from batch_entries
+            return
+
+        for chunk_number, chunk_count, chunk in iter_catalog_chunks(batch_entries, chunk_size):
+            yield from chunk
+            with self._completed_condition:
+                # Wake up regularly so a failed pipeline never leaves the feeder waiting.
+                while self._completed_count < chunk[-1][0] and not pipeline.is_stopped():
+                    self._completed_condition.wait(timeout=0.5)
+            if pipeline.is_stopped():
+                return
+
+            with self._output_lock:
+                file_count = sum(self.files_per_format.values())
+            log(
+                f"Chunk {chunk_number}/{chunk_count} completed: {chunk[-1][0]}/{len(batch_entries)} entries, "
+                f"{file_count} file(s), {time.perf_counter() - self.started:.1f}s elapsed.",
+                self.run_log, quiet=self.quiet,
+            )
+            if chunk_number < chunk_count and checkpoint is not None:
+                checkpoint()
+
+    def plan_entry(self, entry):
+        """Prepare the output folder and logs of one entry and fan it out into the sizes it still needs."""
+        index, emoji, alias, emoji_font_path = entry
+        quiet = self.quiet
+        subfolder_name = self.get_subfolder_name(alias)
+        active_filename_prefix = subfolder_name if self.filename_prefix_from_folder else self.filename_prefix
+        output_path = os.path.join(self.inventory.root, subfolder_name)
+        manifest_entry = {
+            "emoji": emoji,
+            "alias": alias,
+            "output_folder": get_manifest_relative_path(output_path, self.base_path),
+            "font": emoji_font_path,
+            "status": "skipped",
+            "files": [],
+            "log_file": None,
+        }
+        self.manifest_entries[index - 1] = manifest_entry
+        if subfolder_name in self.folder_errors:
+            safe_print(console_message("WARNING", f"Output folder could not be prepared and will be skipped: {output_path}"))
+            safe_print(console_message("WARNING", f"Output folder error detail: {self.folder_errors[subfolder_name]}"))
+            self.mark_entry_done()
+            return []
+        try:
+            folder_locked = self.folder_locks.acquire(subfolder_name)
+        except OSError as lock_error:
+            folder_locked = True
+            log(f"Output folder lock could not be created for '{output_path}'. Concurrent writers are not detected.", self.run_log, quiet=quiet, level="WARNING", detail=str(lock_error))
+        if not folder_locked:
+            log(f"Output folder is locked by another process after {self.lock_timeout:g}s and will be skipped: {output_path}", self.run_log, quiet=False, level="WARNING")
+            manifest_entry["status"] = "locked"
+            self.mark_entry_done()
+            return []
+
+        # Per-alias logs are an optional view of the run log without the startup warnings.
+        alias_log_file = get_log_path(self.log_dir, subfolder_name) if self.per_alias_logs and self.log_dir else None
+        if alias_log_file == self.run_log.log_file:
+            alias_log_file = None
+        alias_entries = [] if alias_log_file else None
+        log_entries = LogView(self.run_log, alias, alias_entries)
+
+        log(f"Starting PNG generation for emoji {index} into '{output_path}'.", log_entries, quiet=quiet)
+        log(f"Output filename prefix applied: {active_filename_prefix}.", log_entries, quiet=quiet, level="DEBUG")
+        log(f"Margin ratio applied: {self.margin_ratio}.", log_entries, quiet=quiet, level="DEBUG")
+        if emoji_font_path:
+            log(f"Font routed by coverage: {os.path.basename(emoji_font_path)}.", log_entries, quiet=quiet, level="DEBUG")
+
+        # Classify emoji once before rendering every size.
+        try:
+            structure_type = classify_unicode_structure(emoji)
+            log(f"Detected Unicode structure: {structure_type}.", log_entries, quiet=quiet, level="DEBUG")
+        except Exception as classify_error:
+            structure_type = "COMPLEX"
+            log("Emoji structure classification failed. Fallback structure COMPLEX will be used.", log_entries, quiet=quiet, level="WARNING", detail=str(classify_error))
+
+        def get_verified_output(file_path):
+            """Return the journaled record of an output when it was made from this emoji and font, else None."""
+            record = self.verified_outputs.get(get_manifest_relative_path(file_path, self.base_path))
+            if record is None or record.get("emoji") != emoji or record.get("font") != emoji_font_path:
+                return None
+            return record
+
+        # Containers are rebuilt from memory, so every size of a pending container must be rendered again.
+        verified_containers = {
+            container: get_verified_output(os.path.join(output_path, f"{active_filename_prefix}.{container}"))
+            for container in self.containers
+        }
+        pending_containers = tuple(container for container in self.containers if verified_containers[container] is None)
+        container_render_sizes = set().union(*(get_container_sizes(container, self.icon_sizes) for container in pending_containers))
+        for container in self.containers:
+            if container not in pending_containers:
+                manifest_entry["files"].append(verified_containers[container])
+
+        job = {
+            "index": index,
+            "emoji": emoji,
+            "alias": alias,
+            "font": emoji_font_path,
+            "structure": structure_type,
+            "output_path": output_path,
+            "subfolder": subfolder_name,
+            "prefix": active_filename_prefix,
+            "log_entries": log_entries,
+            "alias_entries": alias_entries,
+            "alias_log_file": alias_log_file,
+            "manifest_entry": manifest_entry,
+            "pending_containers": pending_containers,
+            "container_render_sizes": container_render_sizes,
+            "container_images": {},
+            "render_budget": self.render_timeout,
+            "timed_out": False,
+        }
+
+        tasks = []
+        for size in self.render_sizes:
+            # Each output of a size is a (variant, format) pair. The base icon has no variant.
+            pending_outputs = []
+            if size in self.icon_sizes:
+                for variant in (None,) + self.output_variants:
+                    for image_format in self.image_formats:
+                        verified_record = get_verified_output(os.path.join(output_path, get_variant_filename(active_filename_prefix, size, variant, image_format)))
+                        if verified_record is not None:
+                            manifest_entry["files"].append(verified_record)
+                        else:
+                            pending_outputs.append((variant, image_format))
+            if not pending_outputs and size not in container_render_sizes:
+                log(f"Verified outputs for {size}x{size} were kept from the checkpoint journal.", log_entries, quiet=quiet, level="DEBUG")
+                continue
+            tasks.append({"job": job, "size": size, "pending_outputs": tuple(pending_outputs)})
+
+        # The write stage completes the entry after its last size. An entry without pending sizes sends one empty task.
+        job["remaining"] = len(tasks)
+        return tasks or [{"job": job, "size": None, "pending_outputs": ()}]
+
+    def rasterize_in_worker(self, job, size, scale_factor):
+        """Rasterize one size in a watchdog worker within the remaining render budget of its emoji."""
+        with self._output_lock:
+            budget = job["render_budget"]
+        started = time.perf_counter()
+        try:
+            rasterized, log_lines = self.watchdog.rasterize(job["emoji"], size, scale_factor, job["structure"], self.margin_ratio, job["font"], timeout=budget, layout_engine=self.layout_engine)
+        except RenderTimeout:
+            with self._output_lock:
+                job["render_budget"] = 0.0
+                job["timed_out"] = True
+            log(f"Render of {size}x{size} exceeded the {self.render_timeout:g}s budget of this emoji and was cancelled. Size will be skipped.", job["log_entries"], quiet=self.quiet, level="ERROR")
+            return None, "timed_out"
+        except RuntimeError as worker_error:
+            log(f"Render worker failed for {size}x{size}. Size will be skipped.", job["log_entries"], quiet=self.quiet, level="ERROR", detail=str(worker_error))
+            return None, "failed"
+
+        with self._output_lock:
+            job["render_budget"] = max(0.0, job["render_budget"] - (time.perf_counter() - started))
+        relay_log_lines(log_lines, job["log_entries"], self.quiet)
+        return rasterized, None
+
+    def rasterize_task(self, task):
+        """Draw one size on its supersampled canvas."""
+        job = task["job"]
+        size = task["size"]
+        if size is not None:
+            if job["timed_out"]:
+                log(f"Size {size}x{size} was skipped because the render budget of this emoji was exhausted.", job["log_entries"], quiet=self.quiet, level="WARNING")
+                task["result"] = "timed_out"
+                return [task]
+
+            # The memory governor may lower the supersampling factor and the number of parallel renders.
+            scale_factor = get_scale_factor(size, self.memory_governor.max_scale_factor, self.canvas_limit_mb)
+            canvas_size = size * scale_factor
+            log(f"Supersampling factor {scale_factor}x applied for {size}x{size} ({canvas_size}px canvas, {get_canvas_memory_mb(canvas_size):.1f} MB).", job["log_entries"], quiet=self.quiet, level="DEBUG")
+            task["scale_factor"] = scale_factor
+            with self.memory_governor.render_slot():
+                started = time.perf_counter()
+                if self.watchdog is None:
+                    rasterized, failure = rasterize_icon(
+                        job["emoji"], size, scale_factor, job["structure"], self.margin_ratio,
+                        job["log_entries"], self.quiet, job["font"], self.metrics, self.layout_engine
+                    ), None
+                else:
+                    rasterized, failure = self.rasterize_in_worker(job, size, scale_factor)
+                task["render_seconds"] = time.perf_counter() - started
+            task["rasterized"] = rasterized
+            if rasterized is None:
+                task["result"] = failure or "skipped"
+        return [task]
+
+    def resize_task(self, task):
+        """Crop the canvas to its ink and resize it, then release the canvas."""
+        rasterized = task.pop("rasterized", None)
+        if rasterized is not None:
+            canvas, ink_bbox, margin_pixels = rasterized
+            started = time.perf_counter()
+            task["image"] = resize_icon(canvas, ink_bbox, margin_pixels, task["size"], self.enable_edge_check, task["job"]["log_entries"], self.quiet, self.resample, self.metrics)
+            task["render_seconds"] += time.perf_counter() - started
+            task["result"] = "skipped" if task["image"] is None else "rendered"
+        return [task]
+
+    def derive_variant(self, resized_img, variant):
+        """Return the base icon, a state variant, or a badged copy of one resized image."""
+        if variant is None:
+            return resized_img
+        if variant in self.badge_variants:
+            return composite_badge(resized_img, self.badge_variants[variant], self.badge_position, self.badge_font_path)
+        return make_variant(resized_img, variant)
+
+    def encode_task(self, task):
+        """Encode every pending format and variant of one size from the same resized image."""
+        job = task["job"]
+        log_entries = job["log_entries"]
+        size = task["size"]
+        resized_img = task.get("image")
+        if resized_img is None or not task["pending_outputs"]:
+            return [task]
+
+        # Near the memory limit, degrade step by step. Abort only when every step is used and the limit is still exceeded.
+        memory_mb = self.memory_probe() if self.memory_probe is not None else None
+        if memory_mb:
+            memory_action = self.memory_governor.check(memory_mb)
+            if memory_action is not None and memory_action[0] == "abort":
+                log(memory_action[1], log_entries, quiet=self.quiet, level="ERROR")
+                if job["alias_entries"] is not None:
+                    write_log_if_needed(job["alias_entries"], job["alias_log_file"])
+                raise MemoryLimitExceeded(memory_mb)
+            if memory_action is not None:
+                log(memory_action[1], log_entries, quiet=self.quiet, level="WARNING")
+            elif memory_mb > HIGH_MEMORY_WARNING_MB:
+                log(f"Memory usage is high: {memory_mb:.1f} MB.", log_entries, quiet=self.quiet, level="WARNING")
+
+        try:
+            task["encoded"] = {}
+            for variant in dict.fromkeys(variant for variant, _ in task["pending_outputs"]):
+                # Variants and badges are derived from the resized icon, never from a second rasterization.
+                variant_img = self.derive_variant(resized_img, variant)
+                variant_formats = tuple(image_format for output_variant, image_format in task["pending_outputs"] if output_variant == variant)
+                for image_format, encoded_bytes in encode_image_formats(variant_img, variant_formats, self.encode_executor).items():
+                    task["encoded"][(variant, image_format)] = encoded_bytes
+        except (OSError, ValueError) as e:
+            log(f"Failed to encode output size {size}x{size}. Size will be skipped.", log_entries, quiet=self.quiet, level="ERROR", detail=str(e))
+            task["result"] = "failed"
+
+        # Release the image unless a container still needs it.
+        if size not in job["container_render_sizes"]:
+            task["image"] = None
+        return [task]
+
+    def write_task(self, task):
+        """Write the encoded files of one size and complete the entry after its last size."""
+        job = task["job"]
+        log_entries = job["log_entries"]
+        size = task["size"]
+        resized_img = task.get("image")
+        if resized_img is not None and size in job["container_render_sizes"]:
+            job["container_images"][size] = resized_img
+        if resized_img is not None and size not in self.icon_sizes:
+            log(f"Container-only size rendered: {size}x{size}.", log_entries, quiet=self.quiet, level="DEBUG")
+
+        for (variant, image_format), encoded_bytes in task.get("encoded", {}).items():
+            filename = get_variant_filename(job["prefix"], size, variant, image_format)
+            file_path = os.path.join(job["output_path"], filename)
+
+            if self.inventory.exists(job["subfolder"], filename):
+                log(f"Existing output file will be overwritten: {filename}.", log_entries, quiet=self.quiet, level="WARNING")
+
+            try:
+                # Write through a temp file so readers never see a truncated icon.
+                write_file_atomic(file_path, encoded_bytes)
+            except OSError as e:
+                log(f"Failed to save output file: {filename}.", log_entries, quiet=self.quiet, level="ERROR", detail=str(e))
+                task["result"] = "failed"
+                continue
+
+            output_record = {
+                "path": get_manifest_relative_path(file_path, self.base_path),
+                "alias": job["alias"],
+                "emoji": job["emoji"],
+                "font": job["font"],
+                "size": size,
+                "format": image_format,
+                "scale_factor": task["scale_factor"],
+                "bytes": len(encoded_bytes),
+                "sha256": hash_bytes(encoded_bytes),
+            }
+            if variant:
+                output_record["variant"] = variant
+            log(f"Icon generated: {filename}.", log_entries, quiet=self.quiet)
+            with self._output_lock:
+                self.bytes_per_format[image_format] += len(encoded_bytes)
+                self.files_per_format[image_format] += 1
+                self.inventory.add(job["subfolder"], filename)
+                self.metrics.inc("utp_files_written", format=image_format)
+                self.metrics.inc("utp_bytes_written", len(encoded_bytes), format=image_format)
+                job["manifest_entry"]["files"].append(output_record)
+                record_journal_output(self.journal_file, output_record, log_entries, self.quiet)
+
+        # Each size is counted once, here, with the outcome of its last stage.
+        if "result" in task:
+            self.metrics.inc("utp_icons", result=task["result"])
+            if task["result"] == "rendered":
+                self.metrics.observe("utp_render_seconds", task["render_seconds"], size=size, structure=job["structure"])
+
+        with self._output_lock:
+            job["remaining"] -= 1
+            entry_finished = job["remaining"] <= 0
+        if entry_finished:
+            self.finish_entry(job)
+
+    def finish_entry(self, job):
+        """Write the pending containers of one entry and record its completion."""
+        log_entries = job["log_entries"]
+        manifest_entry = job["manifest_entry"]
+        container_images = job["container_images"]
+        if job["pending_containers"]:
+            container_paths = save_icon_containers(container_images, job["pending_containers"], self.icon_sizes, job["output_path"], job["prefix"], log_entries, self.quiet)
+            for container_path in container_paths:
+                container_format = os.path.splitext(container_path)[1].lstrip(".")
+                output_record = {
+                    "path": get_manifest_relative_path(container_path, self.base_path),
+                    "alias": job["alias"],
+                    "emoji": job["emoji"],
+                    "font": job["font"],
+                    "size": None,
+                    "format": container_format,
+                    "container_sizes": [size for size in get_container_sizes(container_format, self.icon_sizes) if size in container_images],
+                    "bytes": os.path.getsize(container_path),
+                    "sha256": hash_file(container_path),
+                }
+                with self._output_lock:
+                    manifest_entry["files"].append(output_record)
+                    record_journal_output(self.journal_file, output_record, log_entries, self.quiet)
+                self.metrics.inc("utp_files_written", format=container_format)
+                self.metrics.inc("utp_bytes_written", output_record["bytes"], format=container_format)
+            container_images.clear()
+
+        if job["timed_out"]:
+            log(f"Emoji {job['index']} exceeded its render budget. Outputs in '{job['output_path']}' are incomplete.", log_entries, quiet=self.quiet, level="WARNING")
+            manifest_entry["status"] = "timed_out"
+        else:
+            log(f"Completed PNG generation for emoji {job['index']} into '{job['output_path']}'.", log_entries, quiet=self.quiet)
+            manifest_entry["status"] = "completed"
+        if job["alias_entries"] is not None and write_log_if_needed(job["alias_entries"], job["alias_log_file"]):
+            manifest_entry["log_file"] = get_manifest_relative_path(job["alias_log_file"], self.base_path)
+        self.folder_locks.release(job["subfolder"])
+        self.mark_entry_done()
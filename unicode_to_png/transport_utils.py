@@ -0,0 +1,145 @@
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+# If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/
+#
+# Original Author: Sergio Palma Hidalgo
+# Project URL: https://github.com/del-Pacifico/unicode-to-png
+# Copyright (c) 2025 Sergio Palma Hidalgo
+# All rights reserved.
+#
+"""Shared-memory image hand-off helpers for Unicode to PNG worker processes.
+
+Pillow is imported inside the functions so the CLI can still print help and
+version information when Pillow is missing.
+"""
+
+from contextlib import contextmanager
+from multiprocessing import resource_tracker, shared_memory
+import os
+
+from .render_utils import DEFAULT_LAYOUT_ENGINE, rasterize_icon
+
+MODE_BYTES_PER_PIXEL = {"RGBA": 4, "RGB": 3, "LA": 2, "L": 1}
+
+
+class SharedImageBuffer:
+    """
+    Shared memory block owned by the parent process that holds one image.
+
+    The parent allocates the block before it submits work, so it stays alive
+    on every platform while workers write into it. Windows frees a block as
+    soon as its last handle closes, so a block created by a worker would not
+    survive the hand-off.
+    """
+
+    def __init__(self, size, mode="RGBA"):
+        if mode not in MODE_BYTES_PER_PIXEL:
+            raise ValueError(f"Unsupported shared image mode: {mode}.")
+        width, height = size
+        self._block = shared_memory.SharedMemory(create=True, size=max(1, width * height * MODE_BYTES_PER_PIXEL[mode]))
+        self.descriptor = {"name": self._block.name, "mode": mode, "size": (width, height)}
+
+    @contextmanager
+    def image(self):
+        """
+        Map the buffer as an image without copying its pixels.
+
+        The image is read-only and only valid inside the with block. Operations
+        such as crop(...) and resize(...) return new images that stay valid.
+        """
+        from PIL import Image
+
+        mode = self.descriptor["mode"]
+        image = Image.frombuffer(mode, self.descriptor["size"], self._block.buf, "raw", mode, 0, 1)
+        try:
+            yield image
+        finally:
+            # The image holds a view of the block, so it must be released before the block closes.
+            image.close()
+
+    def close(self):
+        """Free the shared memory block."""
+        if self._block is None:
+            return
+        self._block.close()
+        self._block.unlink()
+        self._block = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def prepare_shared_transport():
+    """
+    Start the shared memory resource tracker before worker processes are created.
+
+    Call this before starting a process pool. Forked workers then share the
+    tracker of the parent, so a block is only freed by the parent. On Windows
+    the call does nothing.
+    """
+    if os.name == "posix":
+        resource_tracker.ensure_running()
+
+
+def write_shared_image(descriptor, image):
+    """
+    Copy an image into a shared buffer allocated by the parent process.
+
+    Args:
+        descriptor (dict): SharedImageBuffer.descriptor. It is small and cheap to pickle.
+        image (PIL.Image): Image with the mode and size of the descriptor.
+
+    Raises:
+        ValueError: The image does not match the descriptor.
+    """
+    from PIL import Image
+
+    if image.mode != descriptor["mode"] or tuple(image.size) != tuple(descriptor["size"]):
+        raise ValueError(f"Image {image.mode} {image.size[0]}x{image.size[1]} does not match the shared buffer.")
+
+    block = shared_memory.SharedMemory(name=descriptor["name"])
+    try:
+        mode = descriptor["mode"]
+        target = Image.frombuffer(mode, image.size, block.buf, "raw", mode, 0, 1)
+        # Buffer-backed images are marked read-only so Pillow copies before writing.
+        # Clearing the flag makes paste(...) write straight into the block: one pass, no intermediate bytes.
+        target.readonly = 0
+        target.paste(image, (0, 0))
+        target.close()
+    finally:
+        block.close()
+
+
+def rasterize_icon_shared(descriptor, emoji, size, scale_factor, structure_type, margin_ratio, font_path=None, layout_engine=DEFAULT_LAYOUT_ENGINE):
+    """
+    Rasterize one size in a worker process and hand the canvas back through shared memory.
+
+    Pass this function to a ProcessPoolExecutor with the descriptor of a
+    SharedImageBuffer of the canvas size. Only the ink box, margin, and log
+    lines are pickled back; the parent maps the canvas and passes it to
+    resize_icon(...).
+
+    Args:
+        descriptor (dict): SharedImageBuffer.descriptor for a (size * scale_factor) square RGBA canvas.
+        emoji (str): Emoji sequence to render.
+        size (int): Output icon size in pixels.
+        scale_factor (int): Supersampling factor applied to the render canvas.
+        structure_type (str): Classification from classify_unicode_structure(...).
+        margin_ratio (float): Base margin ratio.
+        font_path (str): Font routed to this emoji by the fallback chain.
+        layout_engine (str): Text layout engine from LAYOUT_ENGINES.
+
+    Returns:
+        tuple: (ink_bbox, margin_pixels, log_entries), with ink_bbox None when the size must be skipped.
+    """
+    log_entries = []
+    rasterized = rasterize_icon(emoji, size, scale_factor, structure_type, margin_ratio, log_entries, True, font_path, layout_engine=layout_engine)
+    if rasterized is None:
+        return None, None, log_entries
+
+    canvas, ink_bbox, margin_pixels = rasterized
+    write_shared_image(descriptor, canvas)
+    return ink_bbox, margin_pixels, log_entries
@@ -11,6 +11,10 @@
 
 from .logging_utils import log
 
+# Input cap for one emoji. The longest RGI sequences have 10 codepoints, so this limit
+# only rejects junk that would make text layout and font fitting pathologically slow.
+MAX_SEQUENCE_CODEPOINTS = 16
+
 
 def is_emoji(character):
     """Validate whether a character belongs to common Unicode emoji ranges."""
@@ -29,6 +33,22 @@ def is_emoji(character):
     ])
 
 
+def get_sequence_limit_issue(emoji, max_codepoints=MAX_SEQUENCE_CODEPOINTS):
+    """
+    Check an emoji sequence against the input cap.
+
+    Args:
+        emoji (str): Emoji sequence to validate.
+        max_codepoints (int): Highest number of codepoints accepted.
+
+    Returns:
+        str or None: Reason such as "has 40 codepoints, more than the limit of 16", or None within the cap.
+    """
+    if len(emoji) > max_codepoints:
+        return f"has {len(emoji)} codepoints, more than the limit of {max_codepoints}"
+    return None
+
+
 def classify_unicode_structure(emoji: str) -> str:
     """
     Classify the emoji into structural categories.
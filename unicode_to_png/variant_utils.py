@@ -0,0 +1,64 @@
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+# If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/
+#
+# Original Author: Sergio Palma Hidalgo
+# Project URL: https://github.com/del-Pacifico/unicode-to-png
+# Copyright (c) 2025 Sergio Palma Hidalgo
+# All rights reserved.
+#
+"""Derived state variants (grayscale, disabled, monochrome) of resized icons.
+
+Pillow is imported inside the functions so the CLI can still print help and
+version information when Pillow is missing.
+"""
+
+VARIANTS = ("grayscale", "disabled", "mono")
+# Opacity kept by the disabled variant, as in the dimmed toolbar icons of browsers.
+DISABLED_OPACITY = 0.4
+MONO_COLOR = (0, 0, 0)
+
+
+def get_variant_filename(filename_prefix, size, variant, image_format):
+    """Return the output filename of one size, with a variant suffix when variant is set."""
+    suffix = f"_{variant}" if variant else ""
+    return f"{filename_prefix}_{size}x{size}{suffix}.{image_format}"
+
+
+def make_variant(image, variant):
+    """
+    Derive one state variant from a resized RGBA icon without rasterizing again.
+
+    Every step runs as a band operation in Pillow's C code:
+
+    - grayscale: luminance copied into the color bands, alpha kept.
+    - disabled: grayscale with alpha scaled to DISABLED_OPACITY.
+    - mono: a solid MONO_COLOR silhouette with the anti-aliased alpha of the icon.
+
+    Args:
+        image (PIL.Image): Resized RGBA icon.
+        variant (str): One of VARIANTS.
+
+    Returns:
+        PIL.Image: New RGBA image of the same size.
+    """
+    from PIL import Image
+
+    if variant not in VARIANTS:
+        raise ValueError(f"Unsupported icon variant: {variant}.")
+
+    alpha = image.getchannel("A")
+    if variant == "mono":
+        silhouette = Image.new("RGBA", image.size, MONO_COLOR + (0,))
+        silhouette.putalpha(alpha)
+        return silhouette
+
+    luminance = image.convert("L")
+    if variant == "disabled":
+        alpha = alpha.point([round(value * DISABLED_OPACITY) for value in range(256)])
+    return Image.merge("RGBA", (luminance, luminance, luminance, alpha))
+
+
+def make_variants(image, variants):
+    """Return {variant: image} for every requested variant, in request order."""
+    return {variant: make_variant(image, variant) for variant in variants}
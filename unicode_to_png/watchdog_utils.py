@@ -0,0 +1,175 @@
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+# If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/
+#
+# Original Author: Sergio Palma Hidalgo
+# Project URL: https://github.com/del-Pacifico/unicode-to-png
+# Copyright (c) 2025 Sergio Palma Hidalgo
+# All rights reserved.
+#
+"""Render time budgets enforced by terminating worker processes.
+
+A thread cannot be interrupted while Pillow lays out or draws text, so renders
+that must be cancellable run in worker processes. A worker that exceeds its
+budget is terminated and replaced, and the rest of the batch continues.
+"""
+
+import multiprocessing
+import queue
+import threading
+
+from .render_utils import DEFAULT_LAYOUT_ENGINE
+from .transport_utils import SharedImageBuffer, prepare_shared_transport, rasterize_icon_shared
+
+# Seconds a worker may take to start and import the renderer. Startup never counts against a render budget.
+WORKER_START_TIMEOUT = 60.0
+
+
+class RenderTimeout(RuntimeError):
+    """Raised when a render exceeds its time budget and its worker process is terminated."""
+
+    def __init__(self, seconds):
+        super().__init__(f"Render exceeded its time budget of {seconds:.3g}s and was cancelled.")
+        self.seconds = seconds
+
+
+def _serve_renders(connection):
+    """Worker process loop: rasterize requests until the parent sends None or goes away."""
+    connection.send("ready")
+    while True:
+        try:
+            request = connection.recv()
+        except EOFError:
+            return
+        if request is None:
+            return
+        try:
+            connection.send(("ok", rasterize_icon_shared(*request)))
+        except Exception as render_error:
+            connection.send(("error", f"{type(render_error).__name__}: {render_error}"))
+
+
+class RenderWatchdog:
+    """
+    Pool of render worker processes with a time budget per request.
+
+    Workers are started on first use, up to the workers count, and reused.
+    Each request sends a shared canvas descriptor to an idle worker and waits
+    at most timeout seconds for the answer. On timeout the worker is killed,
+    which is the only way to stop a render stuck inside Pillow, and a fresh
+    worker is started by the next request. Workers use the spawn start method
+    on every platform, so they never inherit the locks of pipeline threads.
+    """
+
+    def __init__(self, workers=1):
+        self.workers = max(1, workers)
+        self.terminated = 0
+        self._context = multiprocessing.get_context("spawn")
+        self._idle = queue.SimpleQueue()
+        self._started = 0
+        self._lock = threading.Lock()
+        prepare_shared_transport()
+
+    def _start_worker(self):
+        parent_connection, child_connection = self._context.Pipe()
+        process = self._context.Process(target=_serve_renders, args=(child_connection,), name="utp-render", daemon=True)
+        process.start()
+        child_connection.close()
+        if not parent_connection.poll(WORKER_START_TIMEOUT) or parent_connection.recv() != "ready":
+            self._terminate(process, parent_connection)
+            raise RuntimeError("Render worker process did not start.")
+        return process, parent_connection
+
+    def _acquire(self):
+        with self._lock:
+            start_new = self._idle.empty() and self._started < self.workers
+            if start_new:
+                self._started += 1
+        if not start_new:
+            return self._idle.get()
+        try:
+            return self._start_worker()
+        except BaseException:
+            with self._lock:
+                self._started -= 1
+            raise
+
+    def _terminate(self, process, connection):
+        process.kill()
+        process.join()
+        connection.close()
+
+    def _discard(self, process, connection):
+        self._terminate(process, connection)
+        with self._lock:
+            self._started -= 1
+            self.terminated += 1
+
+    def rasterize(self, emoji, size, scale_factor, structure_type, margin_ratio, font_path=None, timeout=None, layout_engine=DEFAULT_LAYOUT_ENGINE):
+        """
+        Rasterize one size in a worker process within a time budget.
+
+        Args:
+            emoji (str): Emoji sequence to render.
+            size (int): Output icon size in pixels.
+            scale_factor (int): Supersampling factor applied to the render canvas.
+            structure_type (str): Classification from classify_unicode_structure(...).
+            margin_ratio (float): Base margin ratio.
+            font_path (str): Font routed to this emoji by the fallback chain.
+            timeout (float): Seconds the render may take, or None to wait without limit.
+            layout_engine (str): Text layout engine from LAYOUT_ENGINES.
+
+        Returns:
+            tuple: (rasterized, log_lines) where rasterized is the (canvas, ink_bbox, margin_pixels)
+            result of rasterize_icon(...), or None when the size must be skipped.
+
+        Raises:
+            RenderTimeout: The render exceeded timeout and its worker was terminated.
+            RuntimeError: The worker failed or exited unexpectedly.
+        """
+        canvas_side = size * scale_factor
+        process, connection = self._acquire()
+        try:
+            with SharedImageBuffer((canvas_side, canvas_side)) as buffer:
+                connection.send((buffer.descriptor, emoji, size, scale_factor, structure_type, margin_ratio, font_path, layout_engine))
+                if not connection.poll(timeout):
+                    self._discard(process, connection)
+                    process = None
+                    raise RenderTimeout(timeout)
+                status, result = connection.recv()
+                if status != "ok":
+                    raise RuntimeError(result)
+
+                ink_bbox, margin_pixels, log_lines = result
+                if ink_bbox is None:
+                    return None, log_lines
+                # The block is freed on exit, so the canvas is copied out once.
+                with buffer.image() as shared_canvas:
+                    return (shared_canvas.copy(), ink_bbox, margin_pixels), log_lines
+        except (EOFError, OSError) as worker_error:
+            if process is not None:
+                self._discard(process, connection)
+                process = None
+            raise RuntimeError(f"Render worker process exited unexpectedly: {worker_error}") from worker_error
+        finally:
+            if process is not None:
+                self._idle.put((process, connection))
+
+    def close(self):
+        """Stop every idle worker process."""
+        while True:
+            try:
+                process, connection = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                connection.send(None)
+            except OSError:
+                pass
+            process.join(timeout=5)
+            if process.is_alive():
+                process.kill()
+                process.join()
+            connection.close()
+            with self._lock:
+                self._started -= 1